@@ -12,6 +12,10 @@ def create_app(config_object="config.Config"):
     app = Flask(__name__)
     app.config.from_object(config_object)
     
+    # orjson-backed jsonify() (same output as Flask's default provider)
+    from .utils.json_utils import ORJSONProvider
+    app.json = ORJSONProvider(app)
+    
     # Setup logger
     logger = logging.getLogger(__name__)
     if not PRODUCTION_MODE:
@@ -37,9 +41,11 @@ def create_app(config_object="config.Config"):
     from app.services.backup_service import backup_service
     from app.services.data_persistence import data_persistence
     from app.services.scheduler_service import scheduler_service
+    from app.services.audit_service import audit_service
     backup_service.init_app(app)
     data_persistence.init_app(app)
     scheduler_service.init_app(app)
+    audit_service.init_app(app)
     
     # Security headers
     @app.after_request
@@ -189,7 +195,9 @@ def create_app(config_object="config.Config"):
                         business_id = current_user.business_id
                     else:
                         business_id = None
-                return SystemSetting.get_setting(key, default, business_id=business_id)
+                # Cached when the cache backend is shared (receipts and settings pages
+                # read several per render); read directly under a per-process cache
+                return SystemSetting.get_cached_setting(key, default, business_id=business_id)
             except Exception as e:
                 app.logger.warning(f"Error getting setting {key}: {str(e)}")
                 return default
@@ -5,7 +5,7 @@ Handles login, logout, and redirects registration to tenant system
 from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
 from flask_login import login_user, logout_user, current_user, login_required
 from werkzeug.security import check_password_hash
-from .models import User, SystemSetting, AuditLog, SystemMetric
+from .models import User, SystemSetting, SystemMetric
 from .extensions import db
 from datetime import datetime, timezone
 from functools import wraps
@@ -42,33 +42,47 @@ def require_permissions(*required_permissions):
         return decorated_function
     return decorator
 
+def _audit_event(action, entity, entity_id=None, meta=None):
+    """Build the AuditLog column values for an action by the current user"""
+    if current_user.is_authenticated:
+        business_id = current_user.business_id
+        user_id = current_user.id
+    else:
+        business_id = None
+        user_id = None
+    
+    return {
+        'business_id': business_id,
+        'user_id': user_id,
+        'action': action,
+        'entity': entity,
+        'entity_id': entity_id,
+        'meta_json': str(meta) if meta else None,
+        'created_at': datetime.now(timezone.utc)
+    }
+
+def _log_audit_error(e):
+    try:
+        from logging_config import log_audit_error
+        log_audit_error(f"Audit log error: {str(e)}")
+    except ImportError:
+        pass
+
 def log_audit(action, entity, entity_id=None, meta=None):
-    """Log audit trail"""
+    """Log audit trail (queued and written in batches by the audit service)"""
     try:
-        if current_user.is_authenticated:
-            business_id = current_user.business_id
-            user_id = current_user.id
-        else:
-            business_id = None
-            user_id = None
-            
-        audit_log = AuditLog(
-            business_id=business_id,
-            user_id=user_id,
-            action=action,
-            entity=entity,
-            entity_id=entity_id,
-            meta_json=str(meta) if meta else None,
-            created_at=datetime.now(timezone.utc)
-        )
-        db.session.add(audit_log)
-        db.session.commit()
+        from .services.audit_service import audit_service
+        audit_service.enqueue(_audit_event(action, entity, entity_id, meta))
     except Exception as e:
-        try:
-            from logging_config import log_audit_error
-            log_audit_error(f"Audit log error: {str(e)}")
-        except ImportError:
-            pass
+        _log_audit_error(e)
+
+def log_audit_many(entries):
+    """Log several audit entries at once, given as (action, entity, entity_id, meta) tuples"""
+    try:
+        from .services.audit_service import audit_service
+        audit_service.enqueue_many([_audit_event(*entry) for entry in entries])
+    except Exception as e:
+        _log_audit_error(e)
 
 @bp.route('/login', methods=['GET', 'POST'])
 def login():
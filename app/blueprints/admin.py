@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from app.models import User, SystemSetting, AuditLog, BillTemplate, Sale, Business, BusinessNameHistory, db
 from app.auth import require_permissions, log_audit
+from app.blueprints.profile import release_profile_picture
 from app.services.backup_service import backup_service
 from app.services.data_persistence import data_persistence
 from werkzeug.utils import secure_filename
@@ -809,14 +810,12 @@ def upload_profile_picture():
         if user_id:
             user = User.query.get(user_id)
             if user:
-                # Remove old profile picture if exists
-                if user.profile_picture:
-                    old_file_path = os.path.join(upload_dir, user.profile_picture)
-                    if os.path.exists(old_file_path):
-                        os.remove(old_file_path)
-                
+                previous_picture = user.profile_picture
                 user.profile_picture = filename
                 db.session.commit()
+                
+                # Remove old profile picture unless another user shares it
+                release_profile_picture(previous_picture)
         
         return jsonify({
             'success': True, 
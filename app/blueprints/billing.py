@@ -160,10 +160,8 @@ def upgrade():
     business = get_current_business()
     
     if request.method == 'GET':
-        # Get available plans from SubscriptionPlan configuration
-        from ..models import SubscriptionPlan
-        plans_query = SubscriptionPlan.query.filter_by(is_active=True, is_visible=True).order_by(SubscriptionPlan.display_order).all()
-        plans = [plan.to_dict() for plan in plans_query]
+        # Get available plans from SubscriptionPlan configuration (cached)
+        plans = SubscriptionService.get_visible_plans()
         current_plan = business.subscription_plan
         
         return render_template('billing/upgrade.html',
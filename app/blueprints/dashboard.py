@@ -46,7 +46,7 @@ def today_kpis():
             Sale.created_at >= today_start,
             Sale.created_at < today_end,
             Sale.payment_method.in_(['cash', 'online', 'account']),
-            ~Sale.invoice_no.like('%-PAY-%')
+            Sale.is_payment_record == False
         )
     ).scalar() or 0
     
@@ -69,7 +69,7 @@ def today_kpis():
             Sale.created_at >= yesterday_start,
             Sale.created_at < yesterday_end,
             Sale.payment_method != 'credit',
-            ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+            Sale.is_payment_record == False  # Exclude credit payment sale records
         )
     ).scalar() or 0
     
@@ -96,7 +96,7 @@ def today_kpis():
             Sale.business_id == current_user.business_id,
             Sale.created_at >= today_start,
             Sale.created_at < today_end,
-            ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+            Sale.is_payment_record == False  # Exclude credit payment sale records
         )
     ).count()
     
@@ -106,7 +106,7 @@ def today_kpis():
             Sale.business_id == current_user.business_id,
             Sale.created_at >= yesterday_start,
             Sale.created_at < yesterday_end,
-            ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+            Sale.is_payment_record == False  # Exclude credit payment sale records
         )
     ).count()
     
@@ -168,7 +168,7 @@ def weekly_sales():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= day_start,
                 Sale.created_at < day_end,
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude only credit payment tracking records
+                Sale.is_payment_record == False  # Exclude only credit payment tracking records
             )
         ).scalar() or 0
         
@@ -199,7 +199,7 @@ def weekly_summary():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= week_start,
                 Sale.created_at < week_end,
-                ~Sale.invoice_no.like('%-PAY-%')
+                Sale.is_payment_record == False
             )
         ).scalar() or 0
         
@@ -209,7 +209,7 @@ def weekly_summary():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= week_start,
                 Sale.created_at < week_end,
-                ~Sale.invoice_no.like('%-PAY-%')
+                Sale.is_payment_record == False
             )
         ).count()
         
@@ -229,7 +229,7 @@ def weekly_summary():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= prev_week_start_dt,
                 Sale.created_at < prev_week_end_dt,
-                ~Sale.invoice_no.like('%-PAY-%')
+                Sale.is_payment_record == False
             )
         ).scalar() or 0
         
@@ -252,7 +252,7 @@ def weekly_summary():
                     Sale.business_id == current_user.business_id,
                     Sale.created_at >= day_start,
                     Sale.created_at < day_end,
-                    ~Sale.invoice_no.like('%-PAY-%')
+                    Sale.is_payment_record == False
                 )
             ).scalar() or 0
             
@@ -321,7 +321,7 @@ def revenue_details():
                 Sale.created_at >= today_start,
                 Sale.created_at < today_end,
                 Sale.payment_method.in_(['cash', 'online', 'account']),
-                ~Sale.invoice_no.like('%-PAY-%')
+                Sale.is_payment_record == False
             )
         ).scalar() or 0
         
@@ -344,7 +344,7 @@ def revenue_details():
                 Sale.created_at >= yesterday_start,
                 Sale.created_at < yesterday_end,
                 Sale.payment_method != 'credit',
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+                Sale.is_payment_record == False  # Exclude credit payment sale records
             )
         ).scalar() or 0
         
@@ -370,7 +370,7 @@ def revenue_details():
                 Sale.created_at >= today_start,
                 Sale.created_at < today_end,
                 Sale.payment_method == 'cash',
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+                Sale.is_payment_record == False  # Exclude credit payment sale records
             )
         ).scalar() or 0
         
@@ -393,7 +393,7 @@ def revenue_details():
                 Sale.created_at >= today_start,
                 Sale.created_at < today_end,
                 Sale.payment_method.in_(['online', 'bank_transfer', 'account']),
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+                Sale.is_payment_record == False  # Exclude credit payment sale records
             )
         ).scalar() or 0
         
@@ -514,7 +514,7 @@ def orders_details():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= today_start,
                 Sale.created_at < today_end,
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+                Sale.is_payment_record == False  # Exclude credit payment sale records
             )
         ).count()
         
@@ -526,7 +526,7 @@ def orders_details():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= yesterday_start,
                 Sale.created_at < yesterday_end,
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+                Sale.is_payment_record == False  # Exclude credit payment sale records
             )
         ).count()
         
@@ -550,7 +550,7 @@ def orders_details():
                 Sale.business_id == current_user.business_id,
                 Sale.created_at >= today_start,
                 Sale.created_at < today_end,
-                ~Sale.invoice_no.like('%-PAY-%')  # Exclude credit payment sale records
+                Sale.is_payment_record == False  # Exclude credit payment sale records
             )
         ).order_by(Sale.created_at.desc()).limit(10).all()
         
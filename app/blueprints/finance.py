@@ -1,16 +1,138 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
-from datetime import datetime, date, timezone, timedelta
-from sqlalchemy import func, and_
-from ..models import Sale, Expense, DailyClosing, CreditPayment
-from ..extensions import db
+from datetime import datetime, date, time, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, and_, select, insert, delete, bindparam, event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from ..models import Sale, Expense, DailyClosing, CreditPayment, User
+from ..extensions import db, cache
 from ..auth import require_permissions, log_audit
 from ..utils.timezone_utils import safe_fromisoformat
 from ..utils.business_hours import get_business_day, get_business_day_range
 from ..utils.currency_utils import get_system_currency, get_currency_symbol
+from ..utils.pagination import keyset_paginate
+from ..utils.json_utils import json_response
 
 bp = Blueprint('finance', __name__)
 
+# Revenue = Cash Sales + Account Sales + Credit Payments Received
+# Exclude credit payment tracking sales AND unpaid credit sales
+_PAYMENT_METHODS = ('cash', 'online', 'account')
+_NOT_PAY_TRACKING = Sale.is_payment_record == False
+_IS_FINANCE_SALE = and_(_NOT_PAY_TRACKING, Sale.payment_method.in_(_PAYMENT_METHODS))
+
+# Aggregate statements are built once at import time and executed with bound
+# parameters, so every request hits the engine's compiled-query cache.
+_SALES_TOTAL_STMT = select(func.sum(Sale.total)).where(
+    Sale.business_id == bindparam('biz'),
+    Sale.created_at >= bindparam('start'),
+    Sale.created_at < bindparam('end'),
+    _IS_FINANCE_SALE
+)
+
+_CREDIT_PAYMENTS_TOTAL_STMT = select(func.sum(CreditPayment.payment_amount)).where(
+    CreditPayment.business_id == bindparam('biz'),
+    CreditPayment.payment_date >= bindparam('start'),
+    CreditPayment.payment_date < bindparam('end')
+)
+
+_EXPENSES_TOTAL_STMT = select(func.sum(Expense.amount)).where(
+    Expense.business_id == bindparam('biz'),
+    Expense.incurred_at >= bindparam('start'),
+    Expense.incurred_at < bindparam('end')
+)
+
+_TOTAL_STMTS = (_SALES_TOTAL_STMT, _CREDIT_PAYMENTS_TOTAL_STMT, _EXPENSES_TOTAL_STMT)
+
+# Shared worker threads for running the independent aggregates concurrently
+_aggregate_executor = ThreadPoolExecutor(max_workers=len(_TOTAL_STMTS), thread_name_prefix='finance-aggregate')
+
+def _run_total(app, engine, stmt, params):
+    # Each worker uses its own pooled connection, returned on exit
+    with app.app_context(), engine.connect() as conn:
+        return conn.execute(stmt, params).scalar() or 0
+
+def _can_run_parallel(engine):
+    """Only fan out when enabled and the pool has idle capacity for every aggregate"""
+    if not current_app.config.get('FINANCE_PARALLEL_AGGREGATES'):
+        return False
+    pool = engine.pool
+    return isinstance(pool, QueuePool) and pool.size() - pool.checkedout() >= len(_TOTAL_STMTS)
+
+def _period_totals(business_id, start, end):
+    """Return (sales, credit_payments, expenses) totals for [start, end)"""
+    params = {'biz': business_id, 'start': start, 'end': end}
+    
+    engine = db.engine
+    if _can_run_parallel(engine):
+        # Overlap the three DB round-trips instead of serializing them
+        app = current_app._get_current_object()
+        futures = [_aggregate_executor.submit(_run_total, app, engine, stmt, params) for stmt in _TOTAL_STMTS]
+        return tuple(future.result() for future in futures)
+    
+    return tuple(db.session.execute(stmt, params).scalar() or 0 for stmt in _TOTAL_STMTS)
+
+# Dashboard summary cache: polled frequently, changes only when money moves
+SUMMARY_CACHE_TIMEOUT = 30  # seconds
+
+# Models feeding the summary and the timestamp column that places each row in time
+_SUMMARY_SOURCES = {Sale: 'created_at', Expense: 'incurred_at', CreditPayment: 'payment_date'}
+
+def _summary_cache_key(business_id):
+    return f'finsum:{business_id}'
+
+def _as_naive_utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def invalidate_financial_summary(business_id, changed_at=None):
+    """
+    Drop the cached financial summary for a business
+    
+    Args:
+        business_id: Business whose summary changed
+        changed_at: Timestamp of the changed row; the cache is kept when it falls
+            outside the cached today/month window (None always invalidates)
+    """
+    cache_key = _summary_cache_key(business_id)
+    if changed_at is not None:
+        cached = cache.get(cache_key)
+        if not cached:
+            return
+        window_start, window_end = cached[1]
+        if not window_start <= _as_naive_utc(changed_at) < window_end:
+            return
+    cache.delete(cache_key)
+
+@event.listens_for(Session, 'before_flush')
+def _collect_summary_changes(session, flush_context, instances):
+    """Record (business_id, timestamp) for every summary row being written"""
+    changes = session.info.setdefault('finsum_changes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        attr = _SUMMARY_SOURCES.get(type(obj))
+        if attr is None or (obj in session.dirty and not session.is_modified(obj)):
+            continue
+        changes.add((obj.business_id, getattr(obj, attr)))
+        # A moved row also changes the window it was moved out of
+        for old_value in inspect(obj).attrs[attr].history.deleted:
+            changes.add((obj.business_id, old_value))
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_summary_on_commit(session):
+    for business_id, changed_at in session.info.pop('finsum_changes', ()):
+        invalidate_financial_summary(business_id, changed_at)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_summary_changes(session, previous_transaction):
+    session.info.pop('finsum_changes', None)
+
+def _calendar_day_range(day):
+    """Return the [start, end) datetime range covering a calendar date"""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
 @bp.route('/')
 @login_required
 @require_permissions('finance.view')
@@ -25,77 +147,52 @@ def index():
 def financial_summary():
     # Get current business day (accounts for new_day_start_time)
     today = get_business_day()
+    
+    # Serve from cache while the business day is unchanged and no writes happened
+    cache_key = _summary_cache_key(current_user.business_id)
+    cached = cache.get(cache_key)
+    if cached and cached[0] == today:
+        return json_response(cached[2])
+    
     today_start, today_end = get_business_day_range(today)
     
-    # Today's revenue (excluding credit payment tracking sales + including credit payments received)
     # Today's revenue = Cash Sales + Account Sales + Credit Payments Received
-    # Exclude credit payment tracking sales AND unpaid credit sales
-    # MULTI-TENANT: Filter by business_id
-    cash_account_sales = db.session.query(func.sum(Sale.total)).filter(
-        Sale.business_id == current_user.business_id,
-        Sale.created_at >= today_start,
-        Sale.created_at < today_end,
-        ~Sale.invoice_no.like('%-PAY-%'),
-        Sale.payment_method.in_(['cash', 'online', 'account'])
-    ).scalar() or 0
-    
     # MULTI-TENANT: Filter by business_id
-    credit_payments_revenue = db.session.query(func.sum(CreditPayment.payment_amount)).filter(
-        CreditPayment.business_id == current_user.business_id,
-        CreditPayment.payment_date >= today_start,
-        CreditPayment.payment_date < today_end
-    ).scalar() or 0
+    cash_account_sales, credit_payments_revenue, today_expenses = _period_totals(
+        current_user.business_id, today_start, today_end
+    )
     
+    # Convert each SQL total to float exactly once
     today_revenue = float(cash_account_sales) + float(credit_payments_revenue)
-    
-    # Today's expenses
-    # MULTI-TENANT: Filter by business_id
-    today_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.business_id == current_user.business_id,
-        Expense.incurred_at >= today_start,
-        Expense.incurred_at < today_end
-    ).scalar() or 0
-    
-    # Today's profit
-    today_profit = float(today_revenue) - float(today_expenses)
+    today_expenses = float(today_expenses)
     
     # This month's totals
     month_start = today.replace(day=1)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
     
     # This month's revenue = Cash Sales + Account Sales + Credit Payments Received
-    # Exclude credit payment tracking sales AND unpaid credit sales
-    # MULTI-TENANT: Filter by business_id
-    month_cash_account_sales = db.session.query(func.sum(Sale.total)).filter(
-        Sale.business_id == current_user.business_id,
-        func.date(Sale.created_at) >= month_start,
-        ~Sale.invoice_no.like('%-PAY-%'),
-        Sale.payment_method.in_(['cash', 'online', 'account'])
-    ).scalar() or 0
-    
     # MULTI-TENANT: Filter by business_id
-    month_credit_payments = db.session.query(func.sum(CreditPayment.payment_amount)).filter(
-        CreditPayment.business_id == current_user.business_id,
-        func.date(CreditPayment.payment_date) >= month_start
-    ).scalar() or 0
+    month_range = (datetime.combine(month_start, time.min), datetime.combine(next_month_start, time.min))
+    month_cash_account_sales, month_credit_payments, month_expenses = _period_totals(
+        current_user.business_id, *month_range
+    )
     
     month_revenue = float(month_cash_account_sales) + float(month_credit_payments)
+    month_expenses = float(month_expenses)
     
-    # MULTI-TENANT: Filter by business_id
-    month_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.business_id == current_user.business_id,
-        func.date(Expense.incurred_at) >= month_start
-    ).scalar() or 0
-    
-    month_profit = float(month_revenue) - float(month_expenses)
+    summary = {
+        'today_revenue': today_revenue,
+        'today_expenses': today_expenses,
+        'net_profit': today_revenue - today_expenses,
+        'month_revenue': month_revenue,
+        'month_expenses': month_expenses,
+        'month_profit': month_revenue - month_expenses
+    }
+    # Cache with the UTC window the figures cover, so writes outside it keep the entry
+    window = (min(today_start, month_range[0]), max(today_end, month_range[1]))
+    cache.set(cache_key, (today, window, summary), timeout=SUMMARY_CACHE_TIMEOUT)
     
-    return jsonify({
-        'today_revenue': float(today_revenue),
-        'today_expenses': float(today_expenses),
-        'net_profit': today_profit,
-        'month_revenue': float(month_revenue),
-        'month_expenses': float(month_expenses),
-        'month_profit': month_profit
-    })
+    return json_response(summary)
 
 @bp.route('/api/expenses')
 @login_required
@@ -104,7 +201,7 @@ def list_expenses():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     category = request.args.get('category')
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = request.args.get('per_page', 50, type=int)
     
     # MULTI-TENANT: Filter by business_id
@@ -119,20 +216,21 @@ def list_expenses():
     if category:
         query = query.filter(Expense.category == category)
     
-    expenses = query.order_by(Expense.incurred_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Keyset pagination on (incurred_at, id) - no COUNT(*) or OFFSET scans
+    try:
+        expenses, next_cursor = keyset_paginate(
+            query, [Expense.incurred_at, Expense.id], cursor=cursor, per_page=per_page
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'success': True,
-        'expenses': [expense.to_dict() for expense in expenses.items],
+        'expenses': [expense.to_dict() for expense in expenses],
         'pagination': {
-            'total': expenses.total,
-            'pages': expenses.pages,
-            'page': page,
             'per_page': per_page,
-            'has_prev': expenses.has_prev,
-            'has_next': expenses.has_next
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor
         }
     })
 
@@ -143,27 +241,32 @@ def create_expense():
     data = request.get_json()
     
     try:
+        # INSERT ... RETURNING materializes the row in one round-trip; serialize
+        # before commit so nothing is reloaded after expire-on-commit
         # MULTI-TENANT: Add business_id
-        expense = Expense(
+        expense = db.session.scalar(insert(Expense).values(
             business_id=current_user.business_id,
             category=data['category'],
             note=data.get('note', ''),
             amount=data['amount'],
             incurred_at=safe_fromisoformat(data.get('incurred_at')),
             user_id=current_user.id
-        )
+        ).returning(Expense))
+        expense_data = expense.to_dict()
+        incurred_at = expense.incurred_at
         
-        db.session.add(expense)
         db.session.commit()
+        # ORM insert statements bypass the flush, so invalidate explicitly
+        invalidate_financial_summary(current_user.business_id, incurred_at)
         
-        log_audit('create', 'expense', expense.id, {
-            'category': expense.category,
-            'amount': float(expense.amount)
+        log_audit('create', 'expense', expense_data['id'], {
+            'category': expense_data['category'],
+            'amount': expense_data['amount']
         })
         
         return jsonify({
             'success': True,
-            'expense': expense.to_dict()
+            'expense': expense_data
         }), 201
         
     except Exception as e:
@@ -177,8 +280,20 @@ def list_daily_closings():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 30, type=int)
     
+    # Fetch only the serialized columns, joining the user's name in the same query (no per-row lazy load)
     # MULTI-TENANT: Filter by business_id
-    closings = DailyClosing.query.filter_by(business_id=current_user.business_id).order_by(DailyClosing.date.desc()).paginate(
+    closings = db.session.query(
+        DailyClosing.id,
+        DailyClosing.date,
+        DailyClosing.opening_cash,
+        DailyClosing.sales_total,
+        DailyClosing.expense_total,
+        DailyClosing.closing_cash,
+        DailyClosing.created_at,
+        User.full_name.label('user_name')
+    ).outerjoin(User, User.id == DailyClosing.user_id).filter(
+        DailyClosing.business_id == current_user.business_id
+    ).order_by(DailyClosing.date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
@@ -191,7 +306,7 @@ def list_daily_closings():
             'sales_total': float(closing.sales_total),
             'expense_total': float(closing.expense_total),
             'closing_cash': float(closing.closing_cash),
-            'user': closing.user.full_name,
+            'user': closing.user_name,
             'created_at': closing.created_at.isoformat()
         } for closing in closings.items],
         'pagination': {
@@ -216,29 +331,14 @@ def create_daily_closing():
     
     try:
         # Calculate totals for the day = Cash Sales + Account Sales + Credit Payments Received
-        # Exclude credit payment tracking sales AND unpaid credit sales
         # MULTI-TENANT: Filter by business_id
-        cash_account_sales_total = db.session.query(func.sum(Sale.total)).filter(
-            Sale.business_id == current_user.business_id,
-            func.date(Sale.created_at) == closing_date,
-            ~Sale.invoice_no.like('%-PAY-%'),
-            Sale.payment_method.in_(['cash', 'online', 'account'])
-        ).scalar() or 0
-        
-        credit_payments_total = db.session.query(func.sum(CreditPayment.payment_amount)).filter(
-            CreditPayment.business_id == current_user.business_id,
-            func.date(CreditPayment.payment_date) == closing_date
-        ).scalar() or 0
+        cash_account_sales_total, credit_payments_total, expense_total = _period_totals(
+            current_user.business_id, *_calendar_day_range(closing_date)
+        )
         
         sales_total = float(cash_account_sales_total) + float(credit_payments_total)
         
-        # MULTI-TENANT: Filter by business_id
-        expense_total = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.business_id == current_user.business_id,
-            func.date(Expense.incurred_at) == closing_date
-        ).scalar() or 0
-        
-        closing = DailyClosing(
+        closing_id = db.session.execute(insert(DailyClosing).values(
             business_id=current_user.business_id,
             date=closing_date,
             opening_cash=data['opening_cash'],
@@ -247,14 +347,13 @@ def create_daily_closing():
             closing_cash=data['closing_cash'],
             notes=data.get('notes', ''),
             user_id=current_user.id
-        )
+        ).returning(DailyClosing.id)).scalar_one()
         
-        db.session.add(closing)
         db.session.commit()
         
-        log_audit('create', 'daily_closing', closing.id, {
+        log_audit('create', 'daily_closing', closing_id, {
             'date': closing_date.isoformat(),
-            'sales_total': float(sales_total),
+            'sales_total': sales_total,
             'closing_cash': float(data['closing_cash'])
         })
         
@@ -271,7 +370,10 @@ def create_daily_closing():
 def get_expense(expense_id):
     """Get a specific expense"""
     try:
-        expense = Expense.query.get_or_404(expense_id)
+        # MULTI-TENANT: Only look up rows in the user's business
+        expense = Expense.query.filter_by(id=expense_id, business_id=current_user.business_id).first()
+        if not expense:
+            return jsonify({'error': 'Expense not found'}), 404
         return jsonify({
             'success': True,
             'expense': expense.to_dict()
@@ -285,7 +387,10 @@ def get_expense(expense_id):
 def update_expense(expense_id):
     """Update an expense"""
     try:
-        expense = Expense.query.get_or_404(expense_id)
+        # MULTI-TENANT: Only look up rows in the user's business
+        expense = Expense.query.filter_by(id=expense_id, business_id=current_user.business_id).first()
+        if not expense:
+            return jsonify({'error': 'Expense not found'}), 404
         data = request.get_json()
         
         # Store old values for audit
@@ -328,15 +433,24 @@ def update_expense(expense_id):
 def delete_expense(expense_id):
     """Delete an expense"""
     try:
-        expense = Expense.query.get_or_404(expense_id)
+        # Single DELETE ... RETURNING fetches the audit fields and removes the row
+        # MULTI-TENANT: Only delete within the user's business
+        deleted = db.session.execute(
+            delete(Expense).where(
+                Expense.id == expense_id,
+                Expense.business_id == current_user.business_id
+            ).returning(Expense.category, Expense.amount, Expense.incurred_at)
+        ).first()
+        if deleted is None:
+            return jsonify({'error': 'Expense not found'}), 404
         
-        log_audit('delete', 'expense', expense.id, {
-            'category': expense.category,
-            'amount': float(expense.amount)
-        })
-        
-        db.session.delete(expense)
         db.session.commit()
+        invalidate_financial_summary(current_user.business_id, deleted.incurred_at)
+        
+        log_audit('delete', 'expense', expense_id, {
+            'category': deleted.category,
+            'amount': float(deleted.amount)
+        })
         
         return jsonify({'success': True})
         
@@ -357,32 +471,16 @@ def get_closing_data():
         closing_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
         # Calculate totals for the day = Cash Sales + Account Sales + Credit Payments Received
-        # Exclude credit payment tracking sales AND unpaid credit sales
         # MULTI-TENANT: Filter by business_id
-        cash_account_sales_total = db.session.query(func.sum(Sale.total)).filter(
-            Sale.business_id == current_user.business_id,
-            func.date(Sale.created_at) == closing_date,
-            ~Sale.invoice_no.like('%-PAY-%'),
-            Sale.payment_method.in_(['cash', 'online', 'account'])
-        ).scalar() or 0
-        
-        # MULTI-TENANT: Filter by business_id
-        credit_payments_total = db.session.query(func.sum(CreditPayment.payment_amount)).filter(
-            CreditPayment.business_id == current_user.business_id,
-            func.date(CreditPayment.payment_date) == closing_date
-        ).scalar() or 0
+        cash_account_sales_total, credit_payments_total, expense_total = _period_totals(
+            current_user.business_id, *_calendar_day_range(closing_date)
+        )
         
         sales_total = float(cash_account_sales_total) + float(credit_payments_total)
         
-        # MULTI-TENANT: Filter by business_id
-        expense_total = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.business_id == current_user.business_id,
-            func.date(Expense.incurred_at) == closing_date
-        ).scalar() or 0
-        
-        return jsonify({
+        return json_response({
             'success': True,
-            'sales_total': float(sales_total),
+            'sales_total': sales_total,
             'expense_total': float(expense_total)
         })
         
@@ -398,7 +496,10 @@ def get_closing_data():
 def get_daily_closing(closing_id):
     """Get a specific daily closing"""
     try:
-        closing = DailyClosing.query.get_or_404(closing_id)
+        # MULTI-TENANT: Only look up rows in the user's business
+        closing = DailyClosing.query.filter_by(id=closing_id, business_id=current_user.business_id).first()
+        if not closing:
+            return jsonify({'error': 'Daily closing not found'}), 404
         return jsonify({
             'success': True,
             'closing': closing.to_dict()
@@ -412,7 +513,10 @@ def get_daily_closing(closing_id):
 def update_daily_closing(closing_id):
     """Update a daily closing"""
     try:
-        closing = DailyClosing.query.get_or_404(closing_id)
+        # MULTI-TENANT: Only look up rows in the user's business
+        closing = DailyClosing.query.filter_by(id=closing_id, business_id=current_user.business_id).first()
+        if not closing:
+            return jsonify({'error': 'Daily closing not found'}), 404
         data = request.get_json()
         
         # Store old values for audit
@@ -457,17 +561,25 @@ def update_daily_closing(closing_id):
 def delete_daily_closing(closing_id):
     """Delete a daily closing"""
     try:
-        closing = DailyClosing.query.get_or_404(closing_id)
-        
-        log_audit('delete', 'daily_closing', closing.id, {
-            'date': closing.date.isoformat(),
-            'sales_total': float(closing.sales_total),
-            'closing_cash': float(closing.closing_cash)
-        })
+        # Single DELETE ... RETURNING fetches the audit fields and removes the row
+        # MULTI-TENANT: Only delete within the user's business
+        deleted = db.session.execute(
+            delete(DailyClosing).where(
+                DailyClosing.id == closing_id,
+                DailyClosing.business_id == current_user.business_id
+            ).returning(DailyClosing.date, DailyClosing.sales_total, DailyClosing.closing_cash)
+        ).first()
+        if deleted is None:
+            return jsonify({'error': 'Daily closing not found'}), 404
         
-        db.session.delete(closing)
         db.session.commit()
         
+        log_audit('delete', 'daily_closing', closing_id, {
+            'date': deleted.date.isoformat(),
+            'sales_total': float(deleted.sales_total),
+            'closing_cash': float(deleted.closing_cash)
+        })
+        
         return jsonify({'success': True})
         
     except Exception as e:
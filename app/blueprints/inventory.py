@@ -1,14 +1,53 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, make_response
 from flask_login import login_required, current_user
 from datetime import datetime, timezone
-from sqlalchemy import func
+import json
+import hashlib
+from sqlalchemy import func, select, update, event
+from sqlalchemy.orm import Session, joinedload
 from ..models import MenuItem, InventoryLot, PurchaseOrder, PurchaseOrderLine, Supplier, InventoryItem
-from ..extensions import db
+from ..extensions import db, cache
 from ..auth import require_permissions, log_audit
 from ..utils.currency_utils import get_system_currency, get_currency_symbol
+from ..utils.pagination import page_info, keyset_paginate
+from ..utils.json_utils import json_list_response
+from ..utils.search_utils import contains_pattern, LIKE_ESCAPE
 
 bp = Blueprint('inventory', __name__)
 
+# Active supplier list cache: fetched for every PO form, rarely changes
+SUPPLIER_CACHE_TIMEOUT = 60  # seconds
+
+def _supplier_cache_key(business_id):
+    return f'suppliers:{business_id}'
+
+def invalidate_supplier_list(business_id):
+    """Drop the cached active supplier list for a business"""
+    cache.delete(_supplier_cache_key(business_id))
+
+@event.listens_for(Session, 'before_flush')
+def _collect_inventory_changes(session, flush_context, instances):
+    """Record businesses whose inventory items or suppliers are being written"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, InventoryItem):
+            session.info.setdefault('inventory_stats_changes', set()).add(obj.business_id)
+        elif isinstance(obj, Supplier):
+            session.info.setdefault('supplier_list_changes', set()).add(obj.business_id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_inventory_caches_on_commit(session):
+    for business_id in session.info.pop('inventory_stats_changes', ()):
+        InventoryItem.invalidate_stats_cache(business_id)
+    for business_id in session.info.pop('supplier_list_changes', ()):
+        invalidate_supplier_list(business_id)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_inventory_changes(session, previous_transaction):
+    session.info.pop('inventory_stats_changes', None)
+    session.info.pop('supplier_list_changes', None)
+
 @bp.route('/')
 @login_required
 @require_permissions('inventory.view')
@@ -26,26 +65,42 @@ def list_inventory():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
     
+    # Per-item stock levels as correlated subqueries (served by ix_inventory_lots_item_cover)
+    # so the page does not have to GROUP BY the whole join
+    stock_qty = select(
+        func.coalesce(func.sum(InventoryLot.qty_on_hand), 0)
+    ).where(InventoryLot.item_id == MenuItem.id).correlate(MenuItem).scalar_subquery()
+    avg_cost = select(
+        func.avg(InventoryLot.unit_cost)
+    ).where(InventoryLot.item_id == MenuItem.id).correlate(MenuItem).scalar_subquery()
+    
     # MULTI-TENANT: Query inventory with stock levels filtered by business_id
     query = db.session.query(
         MenuItem.id,
         MenuItem.sku,
         MenuItem.name,
-        func.coalesce(func.sum(InventoryLot.qty_on_hand), 0).label('stock_qty'),
-        func.avg(InventoryLot.unit_cost).label('avg_cost')
+        stock_qty.label('stock_qty'),
+        avg_cost.label('avg_cost')
     ).filter(
         MenuItem.business_id == current_user.business_id
-    ).outerjoin(InventoryLot).group_by(MenuItem.id, MenuItem.sku, MenuItem.name)
+    )
     
     if q:
-        search_pattern = f'%{q}%'
-        query = query.filter(MenuItem.name.ilike(search_pattern))
+        search_pattern = contains_pattern(q)
+        query = query.filter(MenuItem.name.ilike(search_pattern, escape=LIKE_ESCAPE))
     
     if low_stock:
-        query = query.having(func.coalesce(func.sum(InventoryLot.qty_on_hand), 0) < 10)
+        query = query.filter(stock_qty < 10)
     
-    # Execute query with pagination
-    items = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Execute query with pagination; the window COUNT returns the total with the
+    # page rows instead of re-running the subqueries in a separate COUNT query
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    items = query.add_columns(func.count().over().label('total_count')).limit(per_page).offset((page - 1) * per_page).all()
+    if items:
+        total = items[0].total_count
+    else:
+        total = query.count() if page > 1 else 0  # Page past the end
     
     return jsonify({
         'items': [{
@@ -55,9 +110,9 @@ def list_inventory():
             'stock_qty': float(item.stock_qty),
             'avg_cost': float(item.avg_cost) if item.avg_cost else 0,
             'is_low_stock': item.stock_qty < 10
-        } for item in items.items],
-        'total': items.total,
-        'pages': items.pages,
+        } for item in items],
+        'total': total,
+        'pages': page_info(page, per_page, total)['pages'],
         'current_page': page
     })
 
@@ -102,47 +157,82 @@ def list_purchase_orders():
     status = request.args.get('status', '')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
     
     # MULTI-TENANT: Filter by business_id
-    query = PurchaseOrder.query.filter_by(business_id=current_user.business_id)
+    # Eager-load suppliers so supplier_name does not lazy-load one row per PO
+    query = PurchaseOrder.query.options(
+        joinedload(PurchaseOrder.supplier)
+    ).filter_by(business_id=current_user.business_id)
     
     if status:
         query = query.filter(PurchaseOrder.status == status)
     
+    # Keyset pagination on id when a cursor is passed (empty for the first page) -
+    # preferred, as deep pages cost no OFFSET scan or COUNT(*); page numbers still work
+    if cursor is not None:
+        try:
+            pos, next_cursor = keyset_paginate(query, [PurchaseOrder.id], cursor=cursor, per_page=per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'purchase_orders': [purchase_order_summary(po) for po in pos],
+            'per_page': per_page,
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor
+        })
+    
     pos = query.order_by(PurchaseOrder.id.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
     return jsonify({
-        'purchase_orders': [{
-            'id': po.id,
-            'po_number': po.po_number,
-            'supplier_name': po.supplier.name,
-            'date': po.date.isoformat(),
-            'status': po.status,
-            'total': float(po.total),
-            'created_at': po.created_at.isoformat()
-        } for po in pos.items],
+        'purchase_orders': [purchase_order_summary(po) for po in pos.items],
         'total': pos.total,
         'pages': pos.pages,
         'current_page': page
     })
 
+def purchase_order_summary(po):
+    """Serialize a purchase order (with its supplier loaded) for the PO list"""
+    return {
+        'id': po.id,
+        'po_number': po.po_number,
+        'supplier_name': po.supplier.name,
+        'date': po.date.isoformat(),
+        'status': po.status,
+        'total': float(po.total),
+        'created_at': po.created_at.isoformat()
+    }
+
 @bp.route('/api/suppliers')
 @login_required
 @require_permissions('inventory.view')
 def list_suppliers():
-    # MULTI-TENANT: Filter by business_id
-    suppliers = Supplier.query.filter(
-        Supplier.business_id == current_user.business_id,
-        Supplier.is_active == True
-    ).all()
-    return jsonify([{
-        'id': supplier.id,
-        'name': supplier.name,
-        'phone': supplier.phone,
-        'email': supplier.email
-    } for supplier in suppliers])
+    cache_key = _supplier_cache_key(current_user.business_id)
+    suppliers = cache.get(cache_key)
+    if suppliers is None:
+        # Project only the listed columns (ix_suppliers_business_active covers the filter)
+        # MULTI-TENANT: Filter by business_id
+        rows = db.session.query(
+            Supplier.id,
+            Supplier.name,
+            Supplier.phone,
+            Supplier.email
+        ).filter(
+            Supplier.business_id == current_user.business_id,
+            Supplier.is_active == True
+        ).all()
+        suppliers = [{
+            'id': supplier.id,
+            'name': supplier.name,
+            'phone': supplier.phone,
+            'email': supplier.email
+        } for supplier in rows]
+        cache.set(cache_key, suppliers, timeout=SUPPLIER_CACHE_TIMEOUT)
+    
+    return jsonify(suppliers)
 
 # InventoryItem CRUD endpoints
 @bp.route('/api/inventory-items')
@@ -152,6 +242,7 @@ def get_inventory_items():
     """Get inventory items with pagination and filters"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
     category = request.args.get('category', '').strip()
     status = request.args.get('status', '').strip()
     search = request.args.get('search', '').strip()
@@ -161,8 +252,8 @@ def get_inventory_items():
     
     # Apply filters
     if category:
-        category_pattern = f'%{category}%'
-        query = query.filter(InventoryItem.category.ilike(category_pattern))
+        category_pattern = contains_pattern(category)
+        query = query.filter(InventoryItem.category.ilike(category_pattern, escape=LIKE_ESCAPE))
     
     if status == 'active':
         query = query.filter(InventoryItem.is_active == True)
@@ -170,39 +261,73 @@ def get_inventory_items():
         query = query.filter(InventoryItem.is_active == False)
     
     if search:
-        search_pattern = f'%{search}%'
+        search_pattern = contains_pattern(search)
         query = query.filter(
-            InventoryItem.name.ilike(search_pattern) |
-            InventoryItem.sku.ilike(search_pattern)
+            InventoryItem.name.ilike(search_pattern, escape=LIKE_ESCAPE) |
+            InventoryItem.sku.ilike(search_pattern, escape=LIKE_ESCAPE)
         )
     
-    # Calculate statistics for all items (not just current page)
-    all_items = query.all()
-    total_stock_value = sum((item.current_stock or 0) * (item.unit_cost or 0) for item in all_items)
-    total_items_count = len(all_items)
+    # Calculate statistics for all items (not just current page) in the database,
+    # cached briefly so paging through unchanged filters skips the aggregate
+    stats_key = InventoryItem.stats_cache_key(current_user.business_id, category, status, search)
+    statistics = cache.get(stats_key)
+    if statistics is None:
+        total_stock_value, total_items_count = query.with_entities(
+            func.coalesce(func.sum(
+                func.coalesce(InventoryItem.current_stock, 0) * func.coalesce(InventoryItem.unit_cost, 0)
+            ), 0),
+            func.count(InventoryItem.id)
+        ).one()
+        
+        statistics = {
+            'total_stock_value': float(total_stock_value),
+            'total_items': total_items_count
+        }
+        cache.set(stats_key, statistics, timeout=InventoryItem.STATS_CACHE_TIMEOUT)
+    total_items_count = statistics['total_items']
     
+    # Read-only page: fetch plain column rows instead of hydrating ORM objects
+    rows_query = query.with_entities(*InventoryItem.list_columns())
     
-    # Get paginated results
-    items = query.order_by(InventoryItem.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Keyset pagination on (created_at, id) when a cursor is passed (empty for the
+    # first page) - preferred for deep pages; page numbers still work
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_paginate(
+                rows_query, [InventoryItem.created_at, InventoryItem.id], cursor=cursor, per_page=per_page
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return json_list_response('items', items, InventoryItem.row_to_dict, {
+            'success': True,
+            'statistics': statistics,
+            'pagination': {
+                'total': total_items_count,
+                'per_page': per_page,
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor
+            }
+        })
     
-    return jsonify({
+    # Get paginated results; the statistics count doubles as the pagination total
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    items = rows_query.order_by(InventoryItem.created_at.desc()).limit(per_page).offset((page - 1) * per_page).all()
+    pagination = page_info(page, per_page, total_items_count)
+    
+    return json_list_response('items', items, InventoryItem.row_to_dict, {
         'success': True,
-        'items': [item.to_dict() for item in items.items],
-        'statistics': {
-            'total_stock_value': total_stock_value,
-            'total_items': total_items_count
-        },
+        'statistics': statistics,
         'pagination': {
-            'total': items.total,
-            'pages': items.pages,
+            'total': pagination['total'],
+            'pages': pagination['pages'],
             'page': page,
             'per_page': per_page,
-            'has_prev': items.has_prev,
-            'has_next': items.has_next,
-            'prev_num': items.prev_num,
-            'next_num': items.next_num
+            'has_prev': pagination['has_prev'],
+            'has_next': pagination['has_next'],
+            'prev_num': pagination['prev_num'],
+            'next_num': pagination['next_num']
         }
     })
 
@@ -233,6 +358,7 @@ def create_inventory_item():
         
         db.session.add(item)
         db.session.commit()
+        InventoryItem.invalidate_category_cache(item.business_id)
         
         log_audit('create', 'inventory_item', item.id, {
             'name': item.name,
@@ -250,19 +376,23 @@ def create_inventory_item():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
+def get_inventory_item_or_404(item_id, for_update=False):
+    """Load an inventory item of the user's business (any business for system administrators) in one query"""
+    query = InventoryItem.query.filter(InventoryItem.id == item_id)
+    # MULTI-TENANT: Only system administrators may reach other businesses' items
+    if current_user.role != 'system_administrator':
+        query = query.filter(InventoryItem.business_id == current_user.business_id)
+    if for_update:
+        query = query.with_for_update()
+    return query.first_or_404()
+
 @bp.route('/api/inventory-items/<int:item_id>')
 @login_required
 @require_permissions('inventory.view')
 def get_inventory_item(item_id):
     """Get a specific inventory item"""
     # MULTI-TENANT: Verify item belongs to user's business
-    if current_user.role == 'system_administrator':
-        item = InventoryItem.query.get_or_404(item_id)
-    else:
-        item = InventoryItem.query.filter_by(
-            id=item_id,
-            business_id=current_user.business_id
-        ).first_or_404()
+    item = get_inventory_item_or_404(item_id)
     return jsonify({
         'success': True,
         'item': item.to_dict()
@@ -274,14 +404,8 @@ def get_inventory_item(item_id):
 def update_inventory_item(item_id):
     """Update an inventory item"""
     try:
-        # MULTI-TENANT: Verify item belongs to user's business
-        if current_user.role == 'system_administrator':
-            item = InventoryItem.query.get_or_404(item_id)
-        else:
-            item = InventoryItem.query.filter_by(
-                id=item_id,
-                business_id=current_user.business_id
-            ).first_or_404()
+        # MULTI-TENANT: Verify item belongs to user's business (row locked for the edit)
+        item = get_inventory_item_or_404(item_id, for_update=True)
         data = request.get_json()
         
         # Store old values for audit
@@ -306,6 +430,7 @@ def update_inventory_item(item_id):
         item.is_active = data.get('is_active', item.is_active)
         
         db.session.commit()
+        InventoryItem.invalidate_category_cache(item.business_id)
         
         log_audit('update', 'inventory_item', item.id, {
             'old_values': old_values,
@@ -328,22 +453,25 @@ def update_inventory_item(item_id):
 def delete_inventory_item(item_id):
     """Delete an inventory item (soft delete by setting is_active=False)"""
     try:
-        # MULTI-TENANT: Verify item belongs to user's business
-        if current_user.role == 'system_administrator':
-            item = InventoryItem.query.get_or_404(item_id)
-        else:
-            item = InventoryItem.query.filter_by(
-                id=item_id,
-                business_id=current_user.business_id
-            ).first_or_404()
+        # Soft delete with a single UPDATE ... RETURNING (fetches the audit fields, no SELECT)
+        stmt = update(InventoryItem).where(InventoryItem.id == item_id)
+        # MULTI-TENANT: Only system administrators may reach other businesses' items
+        if current_user.role != 'system_administrator':
+            stmt = stmt.where(InventoryItem.business_id == current_user.business_id)
+        deleted = db.session.execute(
+            stmt.values(is_active=False).returning(InventoryItem.business_id, InventoryItem.name, InventoryItem.sku)
+        ).first()
+        if deleted is None:
+            return jsonify({'success': False, 'error': 'Inventory item not found'}), 404
         
-        # Soft delete
-        item.is_active = False
         db.session.commit()
+        # Bulk UPDATE bypasses the flush hooks, so invalidate explicitly
+        InventoryItem.invalidate_category_cache(deleted.business_id)
+        InventoryItem.invalidate_stats_cache(deleted.business_id)
         
-        log_audit('delete', 'inventory_item', item.id, {
-            'name': item.name,
-            'sku': item.sku
+        log_audit('delete', 'inventory_item', item_id, {
+            'name': deleted.name,
+            'sku': deleted.sku
         })
         
         return jsonify({'success': True, 'message': 'Inventory item deleted successfully'})
@@ -380,85 +508,89 @@ def get_inventory_categories():
     ]
     
     # Get ALL existing categories from ALL businesses (system-wide)
-    existing_categories = db.session.query(InventoryItem.category).distinct().filter(
-        InventoryItem.is_active == True
-    ).all()
+    existing_categories = InventoryItem.get_active_categories()
     
     # Combine predefined and existing categories
     all_categories = set(predefined_categories)
-    all_categories.update([cat[0] for cat in existing_categories if cat[0]])
+    all_categories.update(existing_categories)
     
     return jsonify({
         'success': True,
         'categories': sorted(list(all_categories))
     })
 
+# Unit list is static, so its JSON body and ETag are built once at import
+_INVENTORY_UNITS = [
+    # Weight Units
+    {'value': 'kg', 'label': 'Kilograms (kg)'},
+    {'value': 'g', 'label': 'Grams (g)'},
+    {'value': 'mg', 'label': 'Milligrams (mg)'},
+    {'value': 'lbs', 'label': 'Pounds (lbs)'},
+    {'value': 'oz', 'label': 'Ounces (oz)'},
+    {'value': 'ton', 'label': 'Tons (ton)'},
+    {'value': 'quintal', 'label': 'Quintal (100kg)'},
+    {'value': 'maund', 'label': 'Maund (37.32kg)'},
+    
+    # Volume Units
+    {'value': 'l', 'label': 'Liters (l)'},
+    {'value': 'ml', 'label': 'Milliliters (ml)'},
+    {'value': 'gal', 'label': 'Gallons (gal)'},
+    {'value': 'qt', 'label': 'Quarts (qt)'},
+    {'value': 'pt', 'label': 'Pints (pt)'},
+    {'value': 'fl_oz', 'label': 'Fluid Ounces (fl oz)'},
+    
+    # Count Units
+    {'value': 'pcs', 'label': 'Pieces (pcs)'},
+    {'value': 'dozen', 'label': 'Dozen (dozen)'},
+    {'value': 'pack', 'label': 'Packs (pack)'},
+    {'value': 'box', 'label': 'Boxes (box)'},
+    {'value': 'case', 'label': 'Cases (case)'},
+    {'value': 'bag', 'label': 'Bags (bag)'},
+    {'value': 'bottle', 'label': 'Bottles (bottle)'},
+    {'value': 'can', 'label': 'Cans (can)'},
+    {'value': 'jar', 'label': 'Jars (jar)'},
+    {'value': 'tube', 'label': 'Tubes (tube)'},
+    
+    # Cooking Units
+    {'value': 'cups', 'label': 'Cups (cups)'},
+    {'value': 'tbsp', 'label': 'Tablespoons (tbsp)'},
+    {'value': 'tsp', 'label': 'Teaspoons (tsp)'},
+    {'value': 'pinch', 'label': 'Pinch (pinch)'},
+    {'value': 'dash', 'label': 'Dash (dash)'},
+    
+    # Length Units
+    {'value': 'm', 'label': 'Meters (m)'},
+    {'value': 'cm', 'label': 'Centimeters (cm)'},
+    {'value': 'mm', 'label': 'Millimeters (mm)'},
+    {'value': 'ft', 'label': 'Feet (ft)'},
+    {'value': 'in', 'label': 'Inches (in)'},
+    
+    # Area Units
+    {'value': 'sqm', 'label': 'Square Meters (sq m)'},
+    {'value': 'sqft', 'label': 'Square Feet (sq ft)'},
+    
+    # Special Units
+    {'value': 'roll', 'label': 'Rolls (roll)'},
+    {'value': 'sheet', 'label': 'Sheets (sheet)'},
+    {'value': 'slice', 'label': 'Slices (slice)'},
+    {'value': 'portion', 'label': 'Portions (portion)'},
+    {'value': 'serving', 'label': 'Servings (serving)'}
+]
+_INVENTORY_UNITS_JSON = json.dumps({'success': True, 'units': _INVENTORY_UNITS}).encode()
+_INVENTORY_UNITS_ETAG = hashlib.md5(_INVENTORY_UNITS_JSON).hexdigest()
+
 @bp.route('/api/inventory-units')
 @login_required
 @require_permissions('inventory.view')
 def get_inventory_units():
     """Get comprehensive inventory units for all types of measurements"""
-    units = [
-        # Weight Units
-        {'value': 'kg', 'label': 'Kilograms (kg)'},
-        {'value': 'g', 'label': 'Grams (g)'},
-        {'value': 'mg', 'label': 'Milligrams (mg)'},
-        {'value': 'lbs', 'label': 'Pounds (lbs)'},
-        {'value': 'oz', 'label': 'Ounces (oz)'},
-        {'value': 'ton', 'label': 'Tons (ton)'},
-        {'value': 'quintal', 'label': 'Quintal (100kg)'},
-        {'value': 'maund', 'label': 'Maund (37.32kg)'},
-        
-        # Volume Units
-        {'value': 'l', 'label': 'Liters (l)'},
-        {'value': 'ml', 'label': 'Milliliters (ml)'},
-        {'value': 'gal', 'label': 'Gallons (gal)'},
-        {'value': 'qt', 'label': 'Quarts (qt)'},
-        {'value': 'pt', 'label': 'Pints (pt)'},
-        {'value': 'fl_oz', 'label': 'Fluid Ounces (fl oz)'},
-        
-        # Count Units
-        {'value': 'pcs', 'label': 'Pieces (pcs)'},
-        {'value': 'dozen', 'label': 'Dozen (dozen)'},
-        {'value': 'pack', 'label': 'Packs (pack)'},
-        {'value': 'box', 'label': 'Boxes (box)'},
-        {'value': 'case', 'label': 'Cases (case)'},
-        {'value': 'bag', 'label': 'Bags (bag)'},
-        {'value': 'bottle', 'label': 'Bottles (bottle)'},
-        {'value': 'can', 'label': 'Cans (can)'},
-        {'value': 'jar', 'label': 'Jars (jar)'},
-        {'value': 'tube', 'label': 'Tubes (tube)'},
-        
-        # Cooking Units
-        {'value': 'cups', 'label': 'Cups (cups)'},
-        {'value': 'tbsp', 'label': 'Tablespoons (tbsp)'},
-        {'value': 'tsp', 'label': 'Teaspoons (tsp)'},
-        {'value': 'pinch', 'label': 'Pinch (pinch)'},
-        {'value': 'dash', 'label': 'Dash (dash)'},
-        
-        # Length Units
-        {'value': 'm', 'label': 'Meters (m)'},
-        {'value': 'cm', 'label': 'Centimeters (cm)'},
-        {'value': 'mm', 'label': 'Millimeters (mm)'},
-        {'value': 'ft', 'label': 'Feet (ft)'},
-        {'value': 'in', 'label': 'Inches (in)'},
-        
-        # Area Units
-        {'value': 'sqm', 'label': 'Square Meters (sq m)'},
-        {'value': 'sqft', 'label': 'Square Feet (sq ft)'},
-        
-        # Special Units
-        {'value': 'roll', 'label': 'Rolls (roll)'},
-        {'value': 'sheet', 'label': 'Sheets (sheet)'},
-        {'value': 'slice', 'label': 'Slices (slice)'},
-        {'value': 'portion', 'label': 'Portions (portion)'},
-        {'value': 'serving', 'label': 'Servings (serving)'}
-    ]
-    
-    return jsonify({
-        'success': True,
-        'units': units
-    })
+    response = make_response(_INVENTORY_UNITS_JSON)
+    response.mimetype = 'application/json'
+    response.set_etag(_INVENTORY_UNITS_ETAG)
+    response.cache_control.private = True
+    response.cache_control.max_age = 86400
+    # Answers If-None-Match with an empty 304
+    return response.make_conditional(request)
 
 @bp.route('/api/next-inventory-sku')
 @login_required
@@ -1,12 +1,98 @@
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import func, insert, select, update
 from ..models import MenuItem, MenuCategory, InventoryItem, MenuRecipe
 from ..extensions import db
 from ..auth import require_permissions, log_audit
 from ..utils.currency_utils import get_system_currency, get_currency_symbol
+from ..utils.pagination import keyset_paginate
+from ..utils.json_utils import json_list_response
+from ..utils.search_utils import contains_pattern, LIKE_ESCAPE
 
 bp = Blueprint('menu', __name__)
 
+def recipe_item_rows(menu_item_id, recipe_items):
+    """Build MenuRecipe insert mappings from the recipe_items request payload"""
+    return [{
+        'menu_item_id': menu_item_id,
+        'inventory_item_id': recipe_data['inventory_item_id'],
+        'quantity': recipe_data['quantity'],
+        'unit': recipe_data.get('unit', 'unit')  # Default to 'unit' if not provided
+    } for recipe_data in recipe_items]
+
+def invalid_recipe_inventory_ids(recipe_items):
+    """Return recipe inventory_item_ids that are not inventory items of the user's business"""
+    ids = {int(recipe_data['inventory_item_id']) for recipe_data in recipe_items}
+    if not ids:
+        return set()
+    
+    # One IN query for the whole recipe
+    # MULTI-TENANT: Recipes may only use the business's own inventory items
+    valid_ids = set(db.session.scalars(
+        select(InventoryItem.id).where(
+            InventoryItem.id.in_(ids),
+            InventoryItem.business_id == current_user.business_id
+        )
+    ))
+    return ids - valid_ids
+
+def invalid_recipe_response(invalid_ids):
+    return jsonify({'error': f'Invalid inventory items: {sorted(invalid_ids)}'}), 400
+
+def replace_recipe_items(menu_item_id, recipe_items):
+    """Replace a menu item's recipe with one DELETE and one multi-row INSERT (caller commits)"""
+    MenuRecipe.query.filter_by(menu_item_id=menu_item_id).delete(synchronize_session=False)
+    if recipe_items:
+        db.session.bulk_insert_mappings(MenuRecipe, recipe_item_rows(menu_item_id, recipe_items))
+
+def recipe_dicts_by_item(menu_item_ids):
+    """Load MenuRecipe.to_dict()-shaped recipe lines for several menu items in one query"""
+    recipes = {}
+    if not menu_item_ids:
+        return recipes
+    
+    rows = db.session.query(
+        MenuRecipe.id,
+        MenuRecipe.menu_item_id,
+        MenuRecipe.inventory_item_id,
+        InventoryItem.name.label('inventory_item_name'),
+        InventoryItem.sku.label('inventory_item_sku'),
+        MenuRecipe.quantity,
+        MenuRecipe.unit,
+        InventoryItem.current_stock
+    ).outerjoin(
+        InventoryItem, MenuRecipe.inventory_item_id == InventoryItem.id
+    ).filter(MenuRecipe.menu_item_id.in_(menu_item_ids)).order_by(MenuRecipe.id).all()
+    
+    for row in rows:
+        recipes.setdefault(row.menu_item_id, []).append({
+            'id': row.id,
+            'menu_item_id': row.menu_item_id,
+            'inventory_item_id': row.inventory_item_id,
+            'inventory_item_name': row.inventory_item_name,
+            'inventory_item_sku': row.inventory_item_sku,
+            'quantity': float(row.quantity),
+            'unit': row.unit,
+            'current_stock': float(row.current_stock) if row.current_stock is not None else 0
+        })
+    return recipes
+
+def menu_item_row_to_dict(row, recipes):
+    """Serialize a projected menu item row the same way as MenuItem.to_dict()"""
+    return {
+        'id': row.id,
+        'sku': row.sku,
+        'name': row.name,
+        'category_id': row.category_id,
+        'category': row.category,
+        'price': float(row.price),
+        'tax_rate': float(row.tax_rate * 100),  # Convert to percentage
+        'is_active': row.is_active,
+        'recipe_items': recipes.get(row.id, []),
+        'created_at': row.created_at.isoformat(),
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None
+    }
+
 @bp.route('/')
 @login_required
 @require_permissions('menu.view')
@@ -20,14 +106,22 @@ def index():
 @require_permissions('menu.view')
 def list_categories():
     # Categories are shared across all businesses (business_id=None)
-    categories = MenuCategory.query.filter_by(business_id=None).order_by(MenuCategory.order_index).all()
+    # Count items with one GROUP BY instead of loading every category's items
+    categories = db.session.query(
+        MenuCategory,
+        func.count(MenuItem.id).label('item_count')
+    ).outerjoin(
+        MenuItem, MenuItem.category_id == MenuCategory.id
+    ).filter(
+        MenuCategory.business_id == None
+    ).group_by(MenuCategory.id).order_by(MenuCategory.order_index).all()
     return jsonify([{
         'id': cat.id,
         'name': cat.name,
         'order_index': cat.order_index,
         'is_active': cat.is_active,
-        'item_count': len(cat.items)
-    } for cat in categories])
+        'item_count': item_count
+    } for cat, item_count in categories])
 
 @bp.route('/api/categories', methods=['POST'])
 @login_required
@@ -71,23 +165,55 @@ def list_items():
     q = request.args.get('q', '').strip()
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
+    cursor = request.args.get('cursor')
     
+    # Read-only list: project columns (and the category name) instead of hydrating MenuItem objects
     # MULTI-TENANT: Filter by business_id
-    query = MenuItem.query.filter_by(business_id=current_user.business_id)
+    query = db.session.query(
+        MenuItem.id,
+        MenuItem.sku,
+        MenuItem.name,
+        MenuItem.category_id,
+        MenuCategory.name.label('category'),
+        MenuItem.price,
+        MenuItem.tax_rate,
+        MenuItem.is_active,
+        MenuItem.created_at,
+        MenuItem.updated_at
+    ).outerjoin(
+        MenuCategory, MenuItem.category_id == MenuCategory.id
+    ).filter(
+        MenuItem.business_id == current_user.business_id
+    )
     
     if category_id:
         query = query.filter(MenuItem.category_id == category_id)
     
     if q:
-        search_pattern = f'%{q}%'
-        query = query.filter(MenuItem.name.ilike(search_pattern))
+        search_pattern = contains_pattern(q)
+        query = query.filter(MenuItem.name.ilike(search_pattern, escape=LIKE_ESCAPE))
+    
+    # Keyset pagination on id when a cursor is passed (empty for the first page) -
+    # preferred, as deep pages cost no OFFSET scan or COUNT(*); page numbers still work
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_paginate(query, [MenuItem.id], cursor=cursor, per_page=per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        recipes = recipe_dicts_by_item([item.id for item in items])
+        return json_list_response('items', items, lambda item: menu_item_row_to_dict(item, recipes), {
+            'per_page': per_page,
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor
+        })
     
     items = query.order_by(MenuItem.id.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    return jsonify({
-        'items': [item.to_dict() for item in items.items],
+    recipes = recipe_dicts_by_item([item.id for item in items.items])
+    return json_list_response('items', items.items, lambda item: menu_item_row_to_dict(item, recipes), {
         'total': items.total,
         'pages': items.pages,
         'current_page': page
@@ -100,6 +226,12 @@ def create_item():
     data = request.get_json()
     
     try:
+        # Validate recipe ingredients before writing anything
+        recipe_items = data.get('recipe_items', [])
+        invalid_ids = invalid_recipe_inventory_ids(recipe_items)
+        if invalid_ids:
+            return invalid_recipe_response(invalid_ids)
+        
         # MULTI-TENANT: Generate SKU if not provided
         sku = data.get('sku') or MenuItem.generate_next_sku(current_user.business_id)
         
@@ -117,16 +249,9 @@ def create_item():
         db.session.add(item)
         db.session.flush()  # Get the item ID
         
-        # Add recipe items if provided
-        recipe_items = data.get('recipe_items', [])
-        for recipe_data in recipe_items:
-            recipe = MenuRecipe(
-                menu_item_id=item.id,
-                inventory_item_id=recipe_data['inventory_item_id'],
-                quantity=recipe_data['quantity'],
-                unit=recipe_data.get('unit', 'unit')  # Default to 'unit' if not provided
-            )
-            db.session.add(recipe)
+        # Add recipe items if provided, in one multi-row INSERT
+        if recipe_items:
+            db.session.execute(insert(MenuRecipe), recipe_item_rows(item.id, recipe_items))
         
         db.session.commit()
         
@@ -158,6 +283,12 @@ def update_item(item_id):
     data = request.get_json()
     
     try:
+        # Validate recipe ingredients before changing anything
+        if 'recipe_items' in data:
+            invalid_ids = invalid_recipe_inventory_ids(data.get('recipe_items', []))
+            if invalid_ids:
+                return invalid_recipe_response(invalid_ids)
+        
         item.name = data.get('name', item.name)
         item.category_id = data.get('category_id', item.category_id)
         item.price = data.get('price', item.price)
@@ -166,19 +297,7 @@ def update_item(item_id):
         
         # Update recipe items if provided
         if 'recipe_items' in data:
-            # Remove existing recipe items
-            MenuRecipe.query.filter_by(menu_item_id=item.id).delete()
-            
-            # Add new recipe items
-            recipe_items = data.get('recipe_items', [])
-            for recipe_data in recipe_items:
-                recipe = MenuRecipe(
-                    menu_item_id=item.id,
-                    inventory_item_id=recipe_data['inventory_item_id'],
-                    quantity=recipe_data['quantity'],
-                    unit=recipe_data.get('unit', 'unit')  # Default to 'unit' if not provided
-                )
-                db.session.add(recipe)
+            replace_recipe_items(item.id, data.get('recipe_items', []))
         
         db.session.commit()
         
@@ -201,20 +320,25 @@ def update_item(item_id):
 @login_required
 @require_permissions('menu.edit')
 def delete_item(item_id):
-    # MULTI-TENANT: Verify item belongs to user's business
-    item = MenuItem.query.filter_by(
-        id=item_id,
-        business_id=current_user.business_id
-    ).first_or_404()
-    
     try:
-        # Soft delete - mark as inactive
-        item.is_active = False
+        # Soft delete - mark as inactive with a single UPDATE ... RETURNING (no SELECT)
+        # MULTI-TENANT: Only deactivate within the user's business
+        deleted = db.session.execute(
+            update(MenuItem).where(
+                MenuItem.id == item_id,
+                MenuItem.business_id == current_user.business_id
+            ).values(is_active=False).returning(MenuItem.sku, MenuItem.name)
+        ).first()
+        if deleted is None:
+            return jsonify({'error': 'Menu item not found'}), 404
+        
         db.session.commit()
+        # Core UPDATEs bypass the flush hooks, so invalidate explicitly
+        MenuItem.invalidate_menu_cache(current_user.business_id)
         
-        log_audit('delete', 'menu_item', item.id, {
-            'sku': item.sku,
-            'name': item.name
+        log_audit('delete', 'menu_item', item_id, {
+            'sku': deleted.sku,
+            'name': deleted.name
         })
         
         return jsonify({
@@ -263,8 +387,8 @@ def list_inventory_items():
     )
     
     if q:
-        search_pattern = f'%{q}%'
-        query = query.filter(InventoryItem.name.ilike(search_pattern))
+        search_pattern = contains_pattern(q)
+        query = query.filter(InventoryItem.name.ilike(search_pattern, escape=LIKE_ESCAPE))
     
     if category:
         query = query.filter(InventoryItem.category == category)
@@ -280,13 +404,8 @@ def list_inventory_items():
 @require_permissions('menu.view')
 def list_inventory_categories():
     # MULTI-TENANT: Filter by business_id
-    categories = db.session.query(InventoryItem.category).filter(
-        InventoryItem.business_id == current_user.business_id,
-        InventoryItem.is_active == True
-    ).distinct().all()
-    
     return jsonify({
-        'categories': [cat[0] for cat in categories if cat[0]]
+        'categories': InventoryItem.get_active_categories(current_user.business_id)
     })
 
 # Recipe Management
@@ -316,21 +435,16 @@ def update_item_recipe(item_id):
     data = request.get_json()
     
     try:
-        # Remove existing recipe items
-        MenuRecipe.query.filter_by(menu_item_id=item.id).delete()
-        
-        # Add recipe items if provided
         recipe_items = data.get('recipe_items', [])
-        for recipe_data in recipe_items:
-            recipe = MenuRecipe(
-                menu_item_id=item.id,
-                inventory_item_id=recipe_data['inventory_item_id'],
-                quantity=recipe_data['quantity'],
-                unit=recipe_data.get('unit', 'unit')  # Default to 'unit' if not provided
-            )
-            db.session.add(recipe)
+        invalid_ids = invalid_recipe_inventory_ids(recipe_items)
+        if invalid_ids:
+            return invalid_recipe_response(invalid_ids)
+        
+        replace_recipe_items(item.id, recipe_items)
         
         db.session.commit()
+        # Bulk recipe writes bypass the flush hooks, so invalidate explicitly
+        MenuItem.invalidate_menu_cache(current_user.business_id)
         
         log_audit('update', 'menu_recipe', item.id, {
             'menu_item': item.name,
@@ -355,24 +469,47 @@ def deduct_inventory_for_order(menu_item_id, quantity):
     """
     try:
         from flask_login import current_user
-        item = MenuItem.query.get(menu_item_id)
-        if not item or item.business_id != current_user.business_id:
+        # MULTI-TENANT: Verify item belongs to user's business
+        item = MenuItem.query.filter_by(
+            id=menu_item_id,
+            business_id=current_user.business_id
+        ).first()
+        if not item:
             return False  # Item not found or access denied
         if not item.recipe_items:
             return True  # No recipe to deduct from
         
-        # Check if sufficient stock exists for all ingredients
+        # Total required per ingredient (a recipe may list the same ingredient twice)
+        required = {}
         for recipe in item.recipe_items:
-            required_qty = recipe.quantity * quantity
-            if recipe.inventory_item.current_stock < required_qty:
-                return False  # Insufficient stock
+            required[recipe.inventory_item_id] = required.get(recipe.inventory_item_id, 0) + recipe.quantity * quantity
         
-        # Deduct from inventory
-        for recipe in item.recipe_items:
-            required_qty = recipe.quantity * quantity
-            recipe.inventory_item.current_stock -= required_qty
+        # Lock all ingredient rows in one SELECT so the check and the deduction agree
+        stock = dict(db.session.query(
+            InventoryItem.id,
+            InventoryItem.current_stock
+        ).filter(InventoryItem.id.in_(required)).with_for_update().all())
+        
+        # Check if sufficient stock exists for all ingredients
+        if any(stock.get(inventory_item_id, 0) < required_qty for inventory_item_id, required_qty in required.items()):
+            db.session.rollback()
+            return False  # Insufficient stock
+        
+        # Deduct from inventory; the guard makes each UPDATE a no-op if stock ran out meanwhile
+        for inventory_item_id, required_qty in required.items():
+            result = db.session.execute(
+                update(InventoryItem).where(
+                    InventoryItem.id == inventory_item_id,
+                    InventoryItem.current_stock >= required_qty
+                ).values(current_stock=InventoryItem.current_stock - required_qty)
+            )
+            if result.rowcount == 0:
+                db.session.rollback()
+                return False  # Insufficient stock
         
         db.session.commit()
+        # Core UPDATEs bypass the flush hooks, so invalidate explicitly
+        InventoryItem.invalidate_stats_cache(current_user.business_id)
         return True
         
     except Exception as e:
@@ -1,80 +1,257 @@
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, current_app, render_template, request, jsonify, make_response, session
 from flask_login import login_required, current_user
 from datetime import datetime, timezone
-from sqlalchemy import and_
-from ..models import MenuItem, MenuCategory, Sale, SaleLine, InventoryLot, CreditSale, InventoryItem, MenuRecipe
-from ..extensions import db
-from ..auth import require_permissions, log_audit
+from decimal import Decimal, InvalidOperation
+import hashlib
+from sqlalchemy import and_, bindparam, case, cast, event, func, insert, or_, select, update, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from ..models import MenuItem, MenuCategory, Sale, SaleLine, InventoryLot, CreditSale, CreditPayment, InventoryItem, MenuRecipe, SystemSetting
+from ..extensions import db, cache
+from ..auth import require_permissions, log_audit, log_audit_many
 from ..utils.currency_utils import get_system_currency, get_currency_symbol
+from ..utils.search_utils import contains_pattern, LIKE_ESCAPE
+from ..utils.pagination import keyset_paginate
+from ..utils.json_utils import json_list_response
+from .finance import invalidate_financial_summary
 import uuid
 
 bp = Blueprint('pos', __name__)
 
-def validate_inventory_availability(menu_item_id, quantity):
+# Invoice numbers are YYMMDD-NN: local date plus a per-business daily sequence.
+# The formatter is bound once rather than re-parsing an f-string per attempt.
+INVOICE_DATE_FORMAT = '%y%m%d'
+INVOICE_SEQUENCE_OFFSET = len('YYMMDD-') + 1  # 1-based SUBSTR position of NN
+_format_invoice_no = '{}-{:02d}'.format
+
+# Sales lists and invoice numbering skip the credit payment tracking records
+_NOT_PAYMENT_RECORD = Sale.is_payment_record == False
+
+# Statements and filters are built once at import time and run with bound
+# parameters, so requests reuse the engine's compiled-query cache
+_LAST_INVOICE_NUMBER_STMT = select(
+    func.max(cast(func.substr(Sale.invoice_no, INVOICE_SEQUENCE_OFFSET), Integer))
+).where(
+    Sale.business_id == bindparam('biz'),
+    Sale.invoice_no.like(bindparam('prefix')),
+    _NOT_PAYMENT_RECORD
+)
+
+# Sales search, served by the trigram indexes on PostgreSQL (bind 'search')
+_SALES_SEARCH = or_(
+    Sale.invoice_no.ilike(bindparam('search'), escape=LIKE_ESCAPE),
+    Sale.customer_name.ilike(bindparam('search'), escape=LIKE_ESCAPE),
+    Sale.customer_phone.ilike(bindparam('search'), escape=LIKE_ESCAPE)
+)
+
+def _insert_on_conflict(model):
+    """INSERT construct supporting ON CONFLICT for the session's database (PostgreSQL or SQLite)"""
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    return dialect.insert(model)
+
+def get_order_charge_rates(business_id):
+    """Tax and service charge rates (as fractions) of a business
+    
+    Read uncached inside the caller's transaction: the rates are stored into
+    sale totals, so a stale per-worker copy would charge the old rate.
+    """
+    tax_rate = float(SystemSetting.get_setting('tax_rate', 16, business_id) or 16) / 100
+    service_charge_rate = float(SystemSetting.get_setting('service_charge', 10, business_id) or 10) / 100
+    return tax_rate, service_charge_rate
+
+@event.listens_for(Session, 'before_flush')
+def _collect_pos_cache_changes(session, flush_context, instances):
+    """Record settings and menu data being written so their cached values can be dropped"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, SystemSetting):
+            session.info.setdefault('system_setting_changes', set()).add((obj.key, obj.business_id))
+        elif isinstance(obj, (MenuItem, MenuCategory, MenuRecipe)):
+            session.info.setdefault('menu_changes', set()).add(obj.business_id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_pos_caches_on_commit(session):
+    for key, business_id in session.info.pop('system_setting_changes', ()):
+        SystemSetting.invalidate_cache(key, business_id)
+    for business_id in session.info.pop('menu_changes', ()):
+        MenuItem.invalidate_menu_cache(business_id)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pos_cache_changes(session, previous_transaction):
+    session.info.pop('system_setting_changes', None)
+    session.info.pop('menu_changes', None)
+
+def cached_json_response(cache_key, build_payload):
+    """
+    JSON response kept in the cache with an ETag, answering If-None-Match with a 304
+    
+    On a cache hit neither the database nor the serializer is touched.
+    """
+    cached = cache.get(cache_key)
+    if cached is None:
+        body = current_app.json.dumps(build_payload()).encode()
+        cached = (body, hashlib.md5(body).hexdigest())
+        cache.set(cache_key, cached, timeout=MenuItem.MENU_CACHE_TIMEOUT)
+    
+    body, etag = cached
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    response.set_etag(etag)
+    # Clients keep the body but revalidate it on every request
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def recipe_requirements(item, quantity):
+    """
+    Ingredient quantities needed for `quantity` of a menu item
+    
+    Each recipe quantity is converted from Decimal once; callers reuse the
+    result rather than converting again per check.
+    Returns a list of (recipe, required quantity) pairs
+    """
+    return [(recipe, float(recipe.quantity) * quantity) for recipe in item.recipe_items]
+
+def validate_inventory_availability(item, quantity, reserved=None):
     """
     Validate if sufficient inventory is available for a menu item order
+    
+    `item` must be a MenuItem of the current business with recipe_items and their
+    inventory_item already loaded. `reserved` maps inventory item ids to quantities
+    claimed by earlier lines of the same order and is updated in place, so lines
+    sharing an ingredient are validated against their combined requirement.
     Returns True if sufficient stock, False otherwise
     """
-    try:
-        from flask_login import current_user
-        # MULTI-TENANT: Verify item belongs to user's business
-        item = MenuItem.query.filter_by(
-            id=menu_item_id,
-            business_id=current_user.business_id
-        ).first()
-        if not item or not item.recipe_items:
-            return True  # No recipe to validate
-        
-        # Check if sufficient stock exists for all ingredients
-        for recipe in item.recipe_items:
-            required_qty = float(recipe.quantity) * quantity
-            if float(recipe.inventory_item.current_stock) < required_qty:
-                return False  # Insufficient stock
-        
-        return True
-        
-    except Exception as e:
-        return False
+    if not item or not item.recipe_items:
+        return True  # No recipe to validate
+    
+    if reserved is None:
+        reserved = {}
+    
+    # Sum the requirement and read the stock level once per ingredient
+    required = {}
+    stock = {}
+    for recipe, required_qty in recipe_requirements(item, quantity):
+        inventory_item_id = recipe.inventory_item_id
+        required[inventory_item_id] = required.get(inventory_item_id, 0) + required_qty
+        if inventory_item_id not in stock:
+            stock[inventory_item_id] = float(recipe.inventory_item.current_stock)
+    
+    # Check if sufficient stock exists for all ingredients
+    for inventory_item_id, required_qty in required.items():
+        if stock[inventory_item_id] < reserved.get(inventory_item_id, 0) + required_qty:
+            return False  # Insufficient stock
+    
+    for inventory_item_id, required_qty in required.items():
+        reserved[inventory_item_id] = reserved.get(inventory_item_id, 0) + required_qty
+    
+    return True
 
-def deduct_inventory_for_menu_item(menu_item_id, quantity):
+def deduct_inventory_for_menu_item(item, quantity, audit_entries=None):
     """
     Deduct inventory based on menu item recipe and order quantity
+    
+    `item` must be a MenuItem of the current business with recipe_items and their
+    inventory_item already loaded. If `audit_entries` is given, the deduction
+    audit entries are appended to it for the caller to log after committing,
+    instead of being logged straight away.
     Returns True if successful, False if insufficient stock or error
     """
     try:
-        from flask_login import current_user
-        # MULTI-TENANT: Verify item belongs to user's business
-        item = MenuItem.query.filter_by(
-            id=menu_item_id,
-            business_id=current_user.business_id
-        ).first()
         if not item or not item.recipe_items:
             return True  # No recipe to deduct from
         
+        requirements = recipe_requirements(item, quantity)
+        
         # Check if sufficient stock exists for all ingredients
-        for recipe in item.recipe_items:
-            required_qty = float(recipe.quantity) * quantity
+        for recipe, required_qty in requirements:
             if float(recipe.inventory_item.current_stock) < required_qty:
                 return False  # Insufficient stock
         
         # Deduct from inventory
-        for recipe in item.recipe_items:
-            required_qty = float(recipe.quantity) * quantity
+        for recipe, required_qty in requirements:
             recipe.inventory_item.current_stock = float(recipe.inventory_item.current_stock) - required_qty
             
             # Log inventory deduction for audit
-            log_audit('inventory_deduct', 'inventory_item', recipe.inventory_item.id, {
+            audit_entry = ('inventory_deduct', 'inventory_item', recipe.inventory_item.id, {
                 'menu_item': item.name,
                 'ingredient': recipe.inventory_item.name,
                 'quantity_deducted': required_qty,
                 'remaining_stock': float(recipe.inventory_item.current_stock)
             })
+            if audit_entries is None:
+                log_audit(*audit_entry)
+            else:
+                audit_entries.append(audit_entry)
         
         return True
         
     except Exception as e:
         return False
 
+def deduct_inventory_lots_fifo(item_id, quantity):
+    """
+    Deduct a quantity from an item's inventory lots, oldest first, in one UPDATE
+    
+    A running total over the lots in FIFO order gives each lot's new quantity:
+    lots whose running total is within `quantity` are emptied, the lot where it
+    crosses `quantity` keeps the excess, and later lots are left untouched.
+    Any shortfall beyond the total on hand is ignored.
+    """
+    running = select(
+        InventoryLot.id,
+        InventoryLot.qty_on_hand,
+        func.sum(InventoryLot.qty_on_hand).over(
+            order_by=(InventoryLot.received_at, InventoryLot.id)
+        ).label('running_qty')
+    ).where(
+        and_(
+            InventoryLot.item_id == item_id,
+            InventoryLot.qty_on_hand > 0
+        )
+    ).subquery()
+    
+    db.session.execute(
+        update(InventoryLot)
+        .where(
+            InventoryLot.id == running.c.id,
+            running.c.running_qty - running.c.qty_on_hand < quantity  # Lot is reached by the deduction
+        )
+        .values(qty_on_hand=case(
+            (running.c.running_qty <= quantity, 0),
+            else_=running.c.running_qty - quantity
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+def load_order_menu_items(item_ids, with_recipes=True):
+    """
+    Load the current business's menu items for an order in one round trip
+    
+    With `with_recipes`, recipes and their inventory items are eager-loaded so
+    validation and deduction run against memory instead of lazy-loading per cart line.
+    Returns a dict of menu item id -> MenuItem
+    """
+    if not item_ids:
+        return {}
+    
+    query = MenuItem.query
+    if with_recipes:
+        query = query.options(selectinload(MenuItem.recipe_items).joinedload(MenuRecipe.inventory_item))
+    
+    # MULTI-TENANT: Only load items from user's business
+    menu_items = query.filter(
+        MenuItem.business_id == current_user.business_id,
+        MenuItem.id.in_(item_ids)
+    ).all()
+    return {menu_item.id: menu_item for menu_item in menu_items}
+
+def missing_items_response(item_ids, menu_items):
+    """Return a 400 response listing order item ids that were not found, or None if all exist"""
+    missing_ids = sorted(set(item_ids) - set(menu_items))
+    if missing_ids:
+        return jsonify({'error': f'Items not found: {missing_ids}'}), 400
+    return None
+
 @bp.route('/')
 @login_required
 @require_permissions('pos.view')
@@ -90,40 +267,53 @@ def get_menu():
     category_id = request.args.get('category_id', type=int)
     search_query = request.args.get('q', '').strip()
     
-    # MULTI-TENANT: Filter by business_id
-    query = MenuItem.query.filter(
-        MenuItem.business_id == current_user.business_id,
-        MenuItem.is_active == True
-    )
-    
-    if category_id:
-        query = query.filter(MenuItem.category_id == category_id)
-    
-    if search_query:
-        search_pattern = f'%{search_query}%'
-        query = query.filter(MenuItem.name.ilike(search_pattern))
-    
-    items = query.join(MenuCategory).order_by(MenuCategory.order_index, MenuItem.name).all()
+    def build_menu():
+        # MULTI-TENANT: Filter by business_id
+        query = MenuItem.query.filter(
+            MenuItem.business_id == current_user.business_id,
+            MenuItem.is_active == True
+        )
+        
+        if category_id:
+            query = query.filter(MenuItem.category_id == category_id)
+        
+        if search_query:
+            search_pattern = contains_pattern(search_query)
+            query = query.filter(MenuItem.name.ilike(search_pattern, escape=LIKE_ESCAPE))
+        
+        # The category join used for ordering also fills MenuItem.category; recipes and
+        # their ingredients are batch-loaded, so to_dict() does not lazy-load per item
+        items = query.join(MenuItem.category).options(
+            contains_eager(MenuItem.category),
+            selectinload(MenuItem.recipe_items).joinedload(MenuRecipe.inventory_item)
+        ).order_by(MenuCategory.order_index, MenuItem.name).all()
+        
+        return {
+            'items': [item.to_dict() for item in items]
+        }
     
-    return jsonify({
-        'items': [item.to_dict() for item in items]
-    })
+    cache_key = MenuItem.menu_cache_key(current_user.business_id, 'menu', category_id, search_query)
+    return cached_json_response(cache_key, build_menu)
 
 @bp.route('/api/categories')
 @login_required
 @require_permissions('pos.view')
 def get_categories():
-    # MULTI-TENANT: Filter by business_id
-    categories = MenuCategory.query.filter(
-        MenuCategory.business_id == current_user.business_id,
-        MenuCategory.is_active == True
-    ).order_by(MenuCategory.order_index).all()
+    def build_categories():
+        # MULTI-TENANT: Filter by business_id
+        categories = MenuCategory.query.filter(
+            MenuCategory.business_id == current_user.business_id,
+            MenuCategory.is_active == True
+        ).order_by(MenuCategory.order_index).all()
+        
+        return [{
+            'id': cat.id,
+            'name': cat.name,
+            'order_index': cat.order_index
+        } for cat in categories]
     
-    return jsonify([{
-        'id': cat.id,
-        'name': cat.name,
-        'order_index': cat.order_index
-    } for cat in categories])
+    cache_key = MenuItem.menu_cache_key(current_user.business_id, 'categories')
+    return cached_json_response(cache_key, build_categories)
 
 @bp.route('/api/check-inventory/<int:item_id>')
 @login_required
@@ -133,13 +323,23 @@ def check_inventory_availability(item_id):
     quantity = request.args.get('quantity', 1, type=float)
     
     # MULTI-TENANT: Verify item belongs to user's business
-    item = MenuItem.query.filter_by(
+    db.session.query(MenuItem.id).filter_by(
         id=item_id,
         business_id=current_user.business_id
     ).first_or_404()
     
+    # Recipe lines with their ingredient names and stock levels in one query
+    recipes = db.session.query(
+        MenuRecipe.quantity,
+        MenuRecipe.unit,
+        InventoryItem.name,
+        InventoryItem.current_stock
+    ).join(
+        InventoryItem, MenuRecipe.inventory_item_id == InventoryItem.id
+    ).filter(MenuRecipe.menu_item_id == item_id).order_by(MenuRecipe.id).all()
+    
     # Check if item has recipe
-    if not item.recipe_items:
+    if not recipes:
         return jsonify({
             'available': True,
             'message': 'No recipe defined - item available',
@@ -150,16 +350,16 @@ def check_inventory_availability(item_id):
     ingredients_status = []
     all_available = True
     
-    for recipe in item.recipe_items:
+    for recipe in recipes:
         required_qty = float(recipe.quantity) * quantity
-        current_stock = float(recipe.inventory_item.current_stock)
+        current_stock = float(recipe.current_stock)
         is_available = current_stock >= required_qty
         
         if not is_available:
             all_available = False
         
         ingredients_status.append({
-            'ingredient_name': recipe.inventory_item.name,
+            'ingredient_name': recipe.name,
             'required_quantity': required_qty,
             'current_stock': current_stock,
             'unit': recipe.unit,
@@ -210,58 +410,23 @@ def checkout():
         return jsonify({'error': 'No items in cart'}), 400
     
     try:
-        # Generate unique invoice number in format YYMMDD-NN using system's local time
-        current_time = datetime.now()  # Use system's actual local time
-        
-        # Format: YYMMDD (Year-Year-Month-Month-Day-Day)
-        date_part = current_time.strftime('%y%m%d')
-        
-        # Generate unique invoice number with proper sequential numbering
-        max_attempts = 100
-        invoice_no = None
-        
-        # MULTI-TENANT: Get the highest invoice number for today from current business
-        existing_invoices = Sale.query.filter(
-            Sale.business_id == current_user.business_id,
-            Sale.invoice_no.like(f'{date_part}-%')
-        ).order_by(Sale.invoice_no.desc()).all()
-        
-        # Find the next available number
-        next_number = 1
-        if existing_invoices:
-            # Extract the highest number from existing invoices
-            for sale in existing_invoices:
-                try:
-                    number_part = int(sale.invoice_no.split('-')[1])
-                    if number_part >= next_number:
-                        next_number = number_part + 1
-                except (IndexError, ValueError):
-                    continue
-        
-        # Try to find a unique invoice number
-        for attempt in range(max_attempts):
-            test_invoice_no = f'{date_part}-{next_number:02d}'
-            
-            # MULTI-TENANT: Check if this invoice number already exists in current business
-            existing_sale = Sale.query.filter_by(business_id=current_user.business_id, invoice_no=test_invoice_no).first()
-            if not existing_sale:
-                invoice_no = test_invoice_no
-                break
-            
-            # If it exists, try the next number
-            next_number += 1
+        try:
+            item_ids = [int(item_data['item_id']) for item_data in items]
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Invalid item in cart'}), 400
         
-        if not invoice_no:
-            return jsonify({'error': 'Unable to generate unique invoice number'}), 500
+        # Load every menu item in the cart, with recipes and ingredients, up front
+        menu_items = load_order_menu_items(set(item_ids))
+        error_response = missing_items_response(item_ids, menu_items)
+        if error_response:
+            return error_response
         
         # Calculate totals
         subtotal = 0
         sale_lines = []
         
-        for item_data in items:
-            item = MenuItem.query.get(item_data['item_id'])
-            if not item or item.business_id != current_user.business_id:
-                return jsonify({'error': f'Item not found: {item_data["item_id"]}'}), 400
+        for item_id, item_data in zip(item_ids, items):
+            item = menu_items[item_id]
             
             qty = float(item_data['qty'])
             unit_price = float(item.price)
@@ -276,10 +441,8 @@ def checkout():
                 'line_total': line_total
             })
         
-        # Get tax rate and service charge from global settings
-        from app.models import SystemSetting
-        tax_rate = float(SystemSetting.get_setting('tax_rate', 16)) / 100
-        service_charge_rate = float(SystemSetting.get_setting('service_charge', 10)) / 100
+        # Get tax rate and service charge from settings
+        tax_rate, service_charge_rate = get_order_charge_rates(current_user.business_id)
         
         # Calculate service charge on subtotal
         service_charge = subtotal * service_charge_rate
@@ -294,10 +457,20 @@ def checkout():
         current_local = datetime.now()  # Get actual system time
         utc_time = convert_local_to_utc(current_local)
         
+        # Generate unique invoice number in format YYMMDD-NN using system's local time
+        date_part = current_local.strftime(INVOICE_DATE_FORMAT)
+        
+        # MULTI-TENANT: Highest sequence number issued today in current business,
+        # read with one aggregate instead of loading every invoice of the day
+        last_number = db.session.execute(_LAST_INVOICE_NUMBER_STMT, {
+            'biz': current_user.business_id,
+            'prefix': f'{date_part}-%'
+        }).scalar() or 0
+        next_number = last_number + 1
+        
         # MULTI-TENANT: Add business_id
-        sale = Sale(
+        sale_values = dict(
             business_id=current_user.business_id,
-            invoice_no=invoice_no,
             customer_name=customer_name,
             customer_phone=customer_phone,
             table_number=table_number,
@@ -310,69 +483,62 @@ def checkout():
             created_at=utc_time.replace(tzinfo=None) if utc_time.tzinfo else utc_time  # Store as naive UTC
         )
         
-        db.session.add(sale)
-        db.session.flush()  # Get the sale ID
+        # The (business_id, invoice_no) unique constraint settles races with
+        # concurrent checkouts: ON CONFLICT DO NOTHING returns no row on a clash,
+        # so move on to the next number. One round-trip when uncontested, and the
+        # transaction is never aborted by a failed INSERT.
+        max_attempts = 10
+        for attempt in range(max_attempts):
+            stmt = _insert_on_conflict(Sale).values(
+                invoice_no=_format_invoice_no(date_part, next_number), **sale_values
+            ).on_conflict_do_nothing(index_elements=['business_id', 'invoice_no']).returning(Sale)
+            sale = db.session.scalars(stmt).first()
+            if sale is not None:
+                break
+            next_number += 1
+        else:
+            db.session.rollback()
+            return jsonify({'error': 'Unable to generate unique invoice number'}), 500
+        
+        invoice_no = sale.invoice_no
         
-        # Validate inventory availability before processing
-        for item_data in items:
-            if not validate_inventory_availability(item_data['item_id'], float(item_data['qty'])):
-                item = MenuItem.query.get(item_data['item_id'])
-                if item and item.business_id != current_user.business_id:
-                    return jsonify({'error': 'Access denied'}), 403
-                return jsonify({'error': f'Insufficient inventory for {item.name if item else "item"}'}), 400
+        # Validate inventory availability before processing, summing ingredient
+        # requirements across lines that share them
+        reserved = {}
+        for line_data in sale_lines:
+            item = menu_items[line_data['item_id']]
+            if not validate_inventory_availability(item, line_data['qty'], reserved):
+                db.session.rollback()
+                return jsonify({'error': f'Insufficient inventory for {item.name}'}), 400
         
-        # Create sale lines and update inventory
+        # Create sale lines with one multi-row INSERT
+        # MULTI-TENANT: Add business_id
+        db.session.execute(insert(SaleLine), [
+            dict(line_data, business_id=current_user.business_id, sale_id=sale.id)
+            for line_data in sale_lines
+        ])
+        
+        # Update inventory; audit entries are logged together once the sale is committed
+        audit_entries = []
         for line_data in sale_lines:
-            # MULTI-TENANT: Add business_id
-            sale_line = SaleLine(
-                business_id=current_user.business_id,
-                sale_id=sale.id,
-                item_id=line_data['item_id'],
-                qty=line_data['qty'],
-                unit_price=line_data['unit_price'],
-                line_total=line_data['line_total']
-            )
-            db.session.add(sale_line)
-            
             # Check if item has recipe - use recipe-based deduction, otherwise use legacy FIFO
-            item = MenuItem.query.get(line_data['item_id'])
-            if item and item.business_id != current_user.business_id:
-                db.session.rollback()
-                return jsonify({'error': 'Access denied'}), 403
-            if item and item.recipe_items:
+            item = menu_items[line_data['item_id']]
+            if item.recipe_items:
                 # Recipe-based inventory deduction
-                if not deduct_inventory_for_menu_item(line_data['item_id'], line_data['qty']):
+                if not deduct_inventory_for_menu_item(item, line_data['qty'], audit_entries):
                     db.session.rollback()
-                    return jsonify({'error': f'Failed to deduct inventory for {item.name if item else "item"}'}), 500
+                    return jsonify({'error': f'Failed to deduct inventory for {item.name}'}), 500
             else:
                 # Legacy inventory deduction for items without recipes (FIFO)
-                remaining_qty = line_data['qty']
-                lots = InventoryLot.query.filter(
-                    and_(
-                        InventoryLot.item_id == line_data['item_id'],
-                        InventoryLot.qty_on_hand > 0
-                    )
-                ).order_by(InventoryLot.received_at).all()
-                
-                for lot in lots:
-                    if remaining_qty <= 0:
-                        break
-                    
-                    if float(lot.qty_on_hand) >= remaining_qty:
-                        lot.qty_on_hand = float(lot.qty_on_hand) - remaining_qty
-                        remaining_qty = 0
-                    else:
-                        remaining_qty -= float(lot.qty_on_hand)
-                        lot.qty_on_hand = 0
+                deduct_inventory_lots_fifo(line_data['item_id'], line_data['qty'])
                 
                 # Update inventory item current stock for legacy items only
                 inventory_item = InventoryItem.query.get(line_data['item_id'])
                 if inventory_item and inventory_item.business_id == current_user.business_id:
                     inventory_item.current_stock = max(0, float(inventory_item.current_stock) - float(line_data['qty']))
         
-        db.session.commit()
-        
-        # Handle credit orders
+        # Handle credit orders: the credit record is written in the same
+        # transaction as the sale, so a credit sale is never left without one
         if payment_method == 'credit':
             # Create credit sale record
             credit_sale = CreditSale(
@@ -386,25 +552,39 @@ def checkout():
                 notes=f"Credit order for table {table_number}" if table_number else "Credit order"
             )
             db.session.add(credit_sale)
-            db.session.commit()
+            db.session.flush()  # Get the credit sale ID
             
             # Log credit sale audit
-            log_audit('create', 'credit_sale', credit_sale.id, {
+            audit_entries.append(('create', 'credit_sale', credit_sale.id, {
                 'invoice_no': invoice_no,
                 'credit_amount': float(total),
                 'customer': customer_name
-            })
+            }))
+        
+        sale_id = sale.id
+        db.session.commit()
+        
+        # The sale was written with an INSERT statement rather than a flush, so
+        # the financial summary is not invalidated by the session events
+        invalidate_financial_summary(current_user.business_id, sale_values['created_at'])
         
         # Clear cart
         session.pop('cart', None)
         
+        # Reload the committed sale with its lines and their menu items eagerly,
+        # rather than lazy-loading each line's item for the response
+        sale = Sale.query.options(
+            selectinload(Sale.lines).joinedload(SaleLine.item)
+        ).filter_by(id=sale_id).one()
+        
         # Log audit
-        log_audit('create', 'sale', sale.id, {
+        audit_entries.append(('create', 'sale', sale.id, {
             'invoice_no': invoice_no,
             'total': float(total),
             'customer': customer_name,
             'payment_method': payment_method
-        })
+        }))
+        log_audit_many(audit_entries)
         
         return jsonify({
             'success': True,
@@ -422,6 +602,7 @@ def checkout():
 def get_sales():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
     search = request.args.get('search', '').strip()
@@ -429,7 +610,7 @@ def get_sales():
     # MULTI-TENANT: Filter by business_id and exclude credit payment sale records
     query = Sale.query.filter(
         Sale.business_id == current_user.business_id,
-        ~Sale.invoice_no.like('%-PAY-%')
+        _NOT_PAYMENT_RECORD
     )
     
     if date_from:
@@ -447,20 +628,31 @@ def get_sales():
             pass
     
     if search:
-        search_pattern = f'%{search}%'
-        query = query.filter(
-            Sale.invoice_no.ilike(search_pattern) |
-            Sale.customer_name.ilike(search_pattern) |
-            Sale.customer_phone.ilike(search_pattern)
-        )
+        query = query.filter(_SALES_SEARCH).params(search=contains_pattern(search))
+    
+    # Keyset pagination on (created_at, id) when a cursor is passed (empty for the
+    # first page) - skips the COUNT(*) over the filtered set; page numbers still work
+    if cursor is not None:
+        try:
+            sales, next_cursor = keyset_paginate(query, [Sale.created_at, Sale.id], cursor=cursor, per_page=per_page)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return json_list_response('sales', sales, Sale.to_list_dict, {
+            'success': True,
+            'pagination': {
+                'per_page': per_page,
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor
+            }
+        })
     
     sales = query.order_by(Sale.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    return jsonify({
+    return json_list_response('sales', sales.items, Sale.to_list_dict, {
         'success': True,
-        'sales': [sale.to_dict() for sale in sales.items],
         'pagination': {
             'total': sales.total,
             'pages': sales.pages,
@@ -513,16 +705,24 @@ def update_sale(sale_id):
         
         # Update items if provided
         if 'items' in data:
-            # Remove existing sale lines
-            SaleLine.query.filter_by(sale_id=sale.id).delete()
+            try:
+                item_ids = [int(item_data['item_id']) for item_data in data['items']]
+            except (KeyError, TypeError, ValueError):
+                db.session.rollback()
+                return jsonify({'error': 'Invalid item in sale'}), 400
+            
+            menu_items = load_order_menu_items(set(item_ids), with_recipes=False)
+            error_response = missing_items_response(item_ids, menu_items)
+            if error_response:
+                db.session.rollback()
+                return error_response
             
             # Recalculate totals
             subtotal = 0
+            sale_lines = []
             
-            for item_data in data['items']:
-                item = MenuItem.query.get(item_data['item_id'])
-                if not item or item.business_id != current_user.business_id:
-                    return jsonify({'error': f'Item not found: {item_data["item_id"]}'}), 400
+            for item_id, item_data in zip(item_ids, data['items']):
+                item = menu_items[item_id]
                 
                 qty = float(item_data['qty'])
                 unit_price = float(item.price)
@@ -530,18 +730,23 @@ def update_sale(sale_id):
                 
                 subtotal += line_total
                 
-                sale_line = SaleLine(
-                    sale_id=sale.id,
-                    item_id=item.id,
-                    qty=qty,
-                    unit_price=unit_price,
-                    line_total=line_total
-                )
-                db.session.add(sale_line)
+                # MULTI-TENANT: Lines carry the sale's business_id
+                sale_lines.append({
+                    'business_id': sale.business_id,
+                    'sale_id': sale.id,
+                    'item_id': item.id,
+                    'qty': qty,
+                    'unit_price': unit_price,
+                    'line_total': line_total
+                })
+            
+            # Replace existing sale lines, inserting the new ones with one multi-row INSERT
+            SaleLine.query.filter_by(sale_id=sale.id).delete(synchronize_session=False)
+            if sale_lines:
+                db.session.execute(insert(SaleLine), sale_lines)
             
-            # Get tax rate from global settings
-            from app.models import SystemSetting
-            tax_rate = float(SystemSetting.get_setting('tax_rate', 16)) / 100
+            # Get tax rate from settings
+            tax_rate, _ = get_order_charge_rates(current_user.business_id)
             tax = subtotal * tax_rate
             total = subtotal + tax
             
@@ -551,6 +756,12 @@ def update_sale(sale_id):
         
         db.session.commit()
         
+        # Reload the sale with its lines and their menu items in one round trip,
+        # rather than lazy-loading each line's item for the response
+        sale = Sale.query.options(
+            selectinload(Sale.lines).joinedload(SaleLine.item)
+        ).filter_by(id=sale_id).one()
+        
         log_audit('update', 'sale', sale.id, {
             'invoice_no': sale.invoice_no,
             'total': float(sale.total)
@@ -712,11 +923,17 @@ def print_bill(sale_id):
 def get_credit_sales():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
     status = request.args.get('status', '')
     search = request.args.get('search', '').strip()
     
-    # MULTI-TENANT: Filter by business_id
-    query = CreditSale.query.filter_by(business_id=current_user.business_id)
+    # MULTI-TENANT: Filter by business_id; the sale, creator and payments that
+    # to_dict() reads are batch-loaded instead of lazy-loaded per row
+    query = CreditSale.query.filter_by(business_id=current_user.business_id).options(
+        joinedload(CreditSale.sale),
+        joinedload(CreditSale.creator),
+        selectinload(CreditSale.payments).joinedload(CreditPayment.receiver)
+    )
     
     if status:
         query = query.filter(CreditSale.status == status)
@@ -728,13 +945,31 @@ def get_credit_sales():
             CreditSale.customer_phone.ilike(search_pattern)
         )
     
+    # Keyset pagination on (credit_date, id) when a cursor is passed (empty for the
+    # first page) - skips the COUNT(*) over the filtered set; page numbers still work
+    if cursor is not None:
+        try:
+            credit_sales, next_cursor = keyset_paginate(
+                query, [CreditSale.credit_date, CreditSale.id], cursor=cursor, per_page=per_page
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return json_list_response('credit_sales', credit_sales, CreditSale.to_dict, {
+            'success': True,
+            'pagination': {
+                'per_page': per_page,
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor
+            }
+        })
+    
     credit_sales = query.order_by(CreditSale.credit_date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    return jsonify({
+    return json_list_response('credit_sales', credit_sales.items, CreditSale.to_dict, {
         'success': True,
-        'credit_sales': [cs.to_dict() for cs in credit_sales.items],
         'pagination': {
             'total': credit_sales.total,
             'pages': credit_sales.pages,
@@ -846,29 +1081,30 @@ def delete_credit_sale(credit_sale_id):
     try:
         from ..models import CreditPayment
         
-        # Get the associated sale
-        sale = credit_sale.sale
-        
-        # If force delete, also remove all associated payments
-        if force_delete:
-            CreditPayment.query.filter_by(credit_sale_id=credit_sale.id).delete()
-        
-        # Delete credit sale first
-        db.session.delete(credit_sale)
-        
-        # Delete associated sale and sale lines
-        if sale:
-            SaleLine.query.filter_by(sale_id=sale.id).delete()
-            db.session.delete(sale)
-        
-        db.session.commit()
-        
-        log_audit('delete', 'credit_sale', credit_sale_id, {
+        business_id = credit_sale.business_id
+        sale_id = credit_sale.sale_id
+        audit_meta = {
             'customer_name': credit_sale.customer_name,
             'credit_amount': float(credit_sale.credit_amount),
             'force_delete': force_delete,
             'had_payments': credit_sale.paid_amount > 0
-        })
+        }
+        
+        # Set-based deletes rather than ORM cascades, which load the payments and
+        # sale lines and delete them one row at a time: payments (the cascade
+        # removed them too), then the credit sale, then the sale and its lines
+        CreditPayment.query.filter_by(credit_sale_id=credit_sale.id).delete(synchronize_session=False)
+        CreditSale.query.filter_by(id=credit_sale.id).delete(synchronize_session=False)
+        if sale_id:
+            SaleLine.query.filter_by(sale_id=sale_id).delete(synchronize_session=False)
+            Sale.query.filter_by(id=sale_id).delete(synchronize_session=False)
+        
+        db.session.commit()
+        
+        # Bulk deletes bypass the flush events that drop the cached summary
+        invalidate_financial_summary(business_id)
+        
+        log_audit('delete', 'credit_sale', credit_sale_id, audit_meta)
         
         return jsonify({
             'success': True,
@@ -893,50 +1129,53 @@ def bulk_delete_credit_sales():
     
     try:
         from ..models import CreditPayment
-        deleted_count = 0
-        skipped_count = 0
         
-        for credit_sale_id in credit_sale_ids:
-            credit_sale = CreditSale.query.get(credit_sale_id)
-            
-            # MULTI-TENANT: Skip if not found or doesn't belong to user's business
-            if not credit_sale:
-                continue
-            if current_user.role != 'system_administrator' and credit_sale.business_id != current_user.business_id:
-                continue
-            if not credit_sale:
-                continue
-                
+        # One SELECT for every requested credit sale
+        query = db.session.query(
+            CreditSale.id, CreditSale.business_id, CreditSale.sale_id, CreditSale.customer_name,
+            CreditSale.credit_amount, CreditSale.paid_amount
+        ).filter(CreditSale.id.in_(credit_sale_ids))
+        
+        # MULTI-TENANT: Skip credit sales that don't belong to user's business
+        if current_user.role != 'system_administrator':
+            query = query.filter(CreditSale.business_id == current_user.business_id)
+        
+        to_delete = []
+        skipped_count = 0
+        for credit_sale in query.all():
             # Skip if has payments and not force delete
             if not force_delete and credit_sale.paid_amount > 0:
                 skipped_count += 1
                 continue
+            to_delete.append(credit_sale)
+        
+        deleted_count = len(to_delete)
+        if to_delete:
+            delete_ids = [credit_sale.id for credit_sale in to_delete]
+            sale_ids = [credit_sale.sale_id for credit_sale in to_delete if credit_sale.sale_id]
             
-            # Get the associated sale
-            sale = credit_sale.sale
-            
-            # If force delete, also remove all associated payments
-            if force_delete:
-                CreditPayment.query.filter_by(credit_sale_id=credit_sale.id).delete()
-            
-            # Delete credit sale
-            db.session.delete(credit_sale)
-            
-            # Delete associated sale and sale lines
-            if sale:
-                SaleLine.query.filter_by(sale_id=sale.id).delete()
-                db.session.delete(sale)
-            
-            deleted_count += 1
-            
-            log_audit('delete', 'credit_sale', credit_sale_id, {
+            # Set-based deletes: payments, then credit sales, then the associated sales and their lines
+            CreditPayment.query.filter(CreditPayment.credit_sale_id.in_(delete_ids)).delete(synchronize_session=False)
+            CreditSale.query.filter(CreditSale.id.in_(delete_ids)).delete(synchronize_session=False)
+            SaleLine.query.filter(SaleLine.sale_id.in_(sale_ids)).delete(synchronize_session=False)
+            Sale.query.filter(Sale.id.in_(sale_ids)).delete(synchronize_session=False)
+        
+        db.session.commit()
+        
+        # Bulk deletes bypass the flush events that drop the cached summary
+        for business_id in {credit_sale.business_id for credit_sale in to_delete}:
+            invalidate_financial_summary(business_id)
+        
+        # One audit entry per deleted credit sale, written together
+        log_audit_many([
+            ('delete', 'credit_sale', credit_sale.id, {
                 'customer_name': credit_sale.customer_name,
                 'credit_amount': float(credit_sale.credit_amount),
                 'bulk_delete': True,
                 'force_delete': force_delete
             })
-        
-        db.session.commit()
+            for credit_sale in to_delete
+        ])
         
         return jsonify({
             'success': True,
@@ -969,16 +1208,19 @@ def pay_credit_sale(credit_sale_id):
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
         
-        payment_amount = float(data.get('payment_amount', 0))
+        # Decimal throughout: the amounts are Numeric columns, so no float rounding
+        payment_amount = Decimal(str(data.get('payment_amount', 0)))
         payment_method = data.get('payment_method', 'cash')
         notes = data.get('notes', '')
         
         if payment_amount <= 0:
             return jsonify({'error': 'Payment amount must be greater than 0'}), 400
         
-        if payment_amount > float(credit_sale.remaining_amount):
+        if payment_amount > credit_sale.remaining_amount:
             return jsonify({'error': 'Payment amount cannot exceed remaining amount'}), 400
     
+    except InvalidOperation:
+        return jsonify({'error': 'Invalid payment amount'}), 400
     except Exception as e:
         return jsonify({'error': f'Validation error: {str(e)}'}), 400
     
@@ -992,12 +1234,13 @@ def pay_credit_sale(credit_sale_id):
             notes=notes,
             received_by=current_user.id
         )
+        # No flush here: nothing below needs payment.id, and the payment goes out
+        # with the credit sale update in the autoflush before the payment sale INSERT
         db.session.add(payment)
-        db.session.flush()  # Get the payment ID
         
         # Update credit sale amounts and status
-        credit_sale.paid_amount = float(credit_sale.paid_amount) + payment_amount
-        credit_sale.remaining_amount = float(credit_sale.remaining_amount) - payment_amount
+        credit_sale.paid_amount = credit_sale.paid_amount + payment_amount
+        credit_sale.remaining_amount = credit_sale.remaining_amount - payment_amount
         
         if credit_sale.remaining_amount <= 0:
             credit_sale.status = 'paid'
@@ -1007,47 +1250,53 @@ def pay_credit_sale(credit_sale_id):
         # Create a new sale record for the payment (for financial tracking)
         from app.utils.timezone_utils import get_current_time
         current_time = get_current_time()
-        date_part = current_time.strftime('%y%m%d')
+        date_part = current_time.strftime(INVOICE_DATE_FORMAT)
         
-        # Generate unique payment invoice number using timestamp to ensure uniqueness
+        # Payment invoice number from the timestamp (last 5 digits of ms)
         import time
-        timestamp = int(time.time() * 1000) % 100000  # Last 5 digits of timestamp
-        payment_invoice_no = f'{date_part}-PAY-{credit_sale.id}-{timestamp}'
-        
-        # Ensure uniqueness by checking if it exists
-        counter = 1
-        original_invoice_no = payment_invoice_no
-        while db.session.query(Sale).filter(Sale.invoice_no == payment_invoice_no).first():
-            payment_invoice_no = f'{original_invoice_no}-{counter}'
-            counter += 1
+        timestamp = int(time.time() * 1000) % 100000
+        original_invoice_no = f'{date_part}-PAY-{credit_sale.id}-{timestamp}'
         
         # Get tax rate from system settings
-        from app.models import SystemSetting
-        tax_rate = float(SystemSetting.get_setting('tax_rate', 16)) / 100
-        tax_multiplier = 1 + tax_rate
+        tax_rate, _ = get_order_charge_rates(current_user.business_id)
+        subtotal = (payment_amount / (1 + Decimal(str(tax_rate)))).quantize(Decimal('0.01'))
         
         # MULTI-TENANT: Add business_id to payment sale
-        payment_sale = Sale(
+        payment_sale_values = dict(
             business_id=current_user.business_id,
-            invoice_no=payment_invoice_no,
             customer_name=credit_sale.customer_name,
             customer_phone=credit_sale.customer_phone,
             table_number='',
-            subtotal=payment_amount / tax_multiplier,
-            tax=payment_amount - (payment_amount / tax_multiplier),
+            subtotal=subtotal,
+            tax=payment_amount - subtotal,
             total=payment_amount,
             payment_method=payment_method,
             user_id=current_user.id,
-            created_at=datetime.now(timezone.utc)
+            created_at=datetime.now(timezone.utc),
+            is_payment_record=True
         )
-        db.session.add(payment_sale)
+        
+        # The (business_id, invoice_no) unique constraint settles clashes instead
+        # of a SELECT per candidate: on conflict nothing is inserted, so retry
+        # with a -N suffix
+        max_attempts = 10
+        for attempt in range(max_attempts):
+            payment_invoice_no = f'{original_invoice_no}-{attempt}' if attempt else original_invoice_no
+            stmt = _insert_on_conflict(Sale).values(
+                invoice_no=payment_invoice_no, **payment_sale_values
+            ).on_conflict_do_nothing(index_elements=['business_id', 'invoice_no']).returning(Sale.id)
+            if db.session.execute(stmt).scalar() is not None:
+                break
+        else:
+            db.session.rollback()
+            return jsonify({'error': 'Unable to generate unique invoice number'}), 500
         
         db.session.commit()
         
         # Log audit
         log_audit('create', 'credit_payment', payment.id, {
             'credit_sale_id': credit_sale.id,
-            'payment_amount': payment_amount,
+            'payment_amount': float(payment_amount),
             'payment_method': payment_method,
             'customer': credit_sale.customer_name
         })
@@ -1,21 +1,37 @@
+import io
 import os
+import time
 import uuid
+import hashlib
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from PIL import Image
+from sqlalchemy import exists, or_
 from ..models import User
 from ..extensions import db
 from ..auth import log_audit
 
 bp = Blueprint('profile', __name__)
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp'})
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Stored profile_picture values are this URL prefix plus the file name (admin
+# uploads store the bare file name)
+PROFILE_PICTURE_URL_PREFIX = '/static/uploads/profiles/'
+
+# Unreferenced picture files are only removed once this old (seconds), so an
+# upload whose user row is not committed yet - or an admin upload waiting for
+# its user form to be submitted - is never swept
+ORPHAN_PICTURE_MIN_AGE = 24 * 3600
+
+# Leading bytes of the allowed formats (WebP is RIFF....WEBP, checked separately)
+IMAGE_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a')
+
+def is_image_data(header):
+    """Check the first 12 bytes of an upload against the allowed image formats"""
+    return header.startswith(IMAGE_SIGNATURES) or (header[:4] == b'RIFF' and header[8:12] == b'WEBP')
 
 def create_upload_folder():
     """Create upload folder if it doesn't exist"""
@@ -24,23 +40,96 @@ def create_upload_folder():
         os.makedirs(upload_folder)
     return upload_folder
 
-def resize_image(image_path, max_size=(300, 300)):
-    """Resize image to maximum dimensions while maintaining aspect ratio"""
+def remove_file_quietly(path):
+    """Delete a file, ignoring errors (e.g. it is already gone)"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def release_profile_picture(profile_picture):
+    """
+    Delete a replaced or removed picture file unless another user still uses it
+    
+    Call after committing the user's new picture. Pictures are content-addressed
+    and may be shared by several users, so the file is only removed once no
+    profile_picture (URL or bare file name) refers to it.
+    
+    Args:
+        profile_picture: The user's previous profile_picture value (may be None)
+    """
+    if not profile_picture:
+        return
+    
+    filename = os.path.basename(profile_picture)
+    in_use = db.session.query(exists().where(or_(
+        User.profile_picture == filename,
+        User.profile_picture == PROFILE_PICTURE_URL_PREFIX + filename
+    ))).scalar()
+    if not in_use:
+        remove_file_quietly(os.path.join(create_upload_folder(), filename))
+
+def remove_orphaned_profile_pictures(min_age=ORPHAN_PICTURE_MIN_AGE):
+    """
+    Delete picture files no user references any more
+    
+    Replaced and removed pictures are released on the request path; this sweep
+    only catches leftovers such as admin uploads whose user form was never
+    submitted. Run by the scheduler where it is enabled.
+    
+    Returns:
+        int: Number of files removed
+    """
+    upload_folder = create_upload_folder()
+    
+    # Stored values are /static/uploads/profiles/<name> URLs or bare file names
+    # (admin uploads), so compare by file name
+    referenced = {
+        os.path.basename(profile_picture)
+        for (profile_picture,) in db.session.query(User.profile_picture).filter(User.profile_picture.isnot(None))
+    }
+    
+    cutoff = time.time() - min_age
+    removed = 0
+    with os.scandir(upload_folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name not in referenced and entry.stat().st_mtime < cutoff:
+                remove_file_quietly(entry.path)
+                removed += 1
+    return removed
+
+def resize_image(image_file, max_size=(300, 300)):
+    """
+    Resize image to maximum dimensions while maintaining aspect ratio
+    
+    Args:
+        image_file: Path or file object (e.g. the upload stream) to read
+        max_size: Bounding box for the result
+    
+    Returns:
+        bytes: The resized image encoded as JPEG
+    """
     try:
-        with Image.open(image_path) as img:
+        with Image.open(image_file) as img:
+            # Palette images would be resized nearest-neighbour, so expand them first
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            
+            # Resize maintaining aspect ratio before any other per-pixel work.
+            # JPEGs are decoded straight at a reduced scale (libjpeg-turbo DCT
+            # scaling via draft()), so the full-size image is never decoded.
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            
             # Convert to RGB if necessary (for PNG with transparency)
-            if img.mode in ('RGBA', 'LA', 'P'):
+            if img.mode in ('RGBA', 'LA'):
                 background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
                 background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
                 img = background
             
-            # Resize maintaining aspect ratio
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Save as JPEG with high quality
-            img.save(image_path, 'JPEG', quality=90, optimize=True)
+            # Encode as JPEG with high quality
+            output = io.BytesIO()
+            img.save(output, 'JPEG', quality=90, optimize=True)
+            return output.getvalue()
             
     except Exception as e:
         current_app.logger.error(f"Error resizing image: {str(e)}")
@@ -61,8 +150,30 @@ def upload_profile_picture():
         if file.filename == '':
             return jsonify({'success': False, 'message': 'No file selected'}), 400
         
-        # Validate file type
-        if not allowed_file(file.filename):
+        # Validate file type (the extension is parsed once; the stored file is always .jpg)
+        extension = os.path.splitext(file.filename)[1][1:].lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            return jsonify({
+                'success': False, 
+                'message': 'Invalid file type. Please upload PNG, JPG, JPEG, GIF, or WebP files only.'
+            }), 400
+        
+        # Check the size and the content's leading bytes before anything is
+        # decoded or written to disk
+        file.stream.seek(0, os.SEEK_END)
+        file_size = file.stream.tell()
+        file.stream.seek(0)
+        
+        if file_size > MAX_FILE_SIZE:
+            return jsonify({
+                'success': False,
+                'message': 'File size too large. Maximum 5MB allowed.'
+            }), 413
+        
+        header = file.stream.read(12)
+        file.stream.seek(0)
+        
+        if not is_image_data(header):
             return jsonify({
                 'success': False, 
                 'message': 'Invalid file type. Please upload PNG, JPG, JPEG, GIF, or WebP files only.'
@@ -71,38 +182,40 @@ def upload_profile_picture():
         # Create upload folder
         upload_folder = create_upload_folder()
         
-        # Generate unique filename
-        file_extension = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{current_user.id}_{uuid.uuid4().hex}.jpg"  # Always save as JPG after processing
-        file_path = os.path.join(upload_folder, filename)
-        
-        # Save the uploaded file temporarily
-        temp_path = os.path.join(upload_folder, f"temp_{filename}")
-        file.save(temp_path)
+        # The processed image is written to a temporary file in the same folder,
+        # so the final move is an atomic rename rather than a copy
+        temp_path = os.path.join(upload_folder, f"temp_{uuid.uuid4().hex}.jpg")
         
         try:
-            # Resize and optimize the image
-            resize_image(temp_path, max_size=(300, 300))
+            # Resize and optimize the image straight from the upload stream; only
+            # the small result is written to disk
+            image_data = resize_image(file.stream, max_size=(300, 300))
             
-            # Move to final location
-            if os.path.exists(file_path):
-                os.remove(file_path)  # Remove old file if exists
-            os.rename(temp_path, file_path)
+            # Content-addressed filename: re-uploads of the same picture (by anyone)
+            # reuse the stored file instead of writing another copy
+            filename = f"{hashlib.sha256(image_data).hexdigest()[:16]}.jpg"  # Always save as JPG after processing
+            file_path = os.path.join(upload_folder, filename)
             
-            # Remove old profile picture if exists
-            if current_user.profile_picture:
-                old_path = os.path.join(current_app.root_path, 'static', current_user.profile_picture.lstrip('/'))
-                if os.path.exists(old_path):
-                    try:
-                        os.remove(old_path)
-                    except OSError:
-                        pass  # Ignore errors when removing old file
+            if os.path.exists(file_path):
+                # Refresh the age the orphan sweep goes by
+                os.utime(file_path)
+            else:
+                with open(temp_path, 'wb') as temp_file:
+                    temp_file.write(image_data)
+                
+                # Move to final location (replacing any file of that name in one step)
+                os.replace(temp_path, file_path)
             
             # Update user profile picture path in database
-            profile_picture_url = f"/static/uploads/profiles/{filename}"
+            previous_picture = current_user.profile_picture
+            profile_picture_url = PROFILE_PICTURE_URL_PREFIX + filename
             current_user.profile_picture = profile_picture_url
             db.session.commit()
             
+            # The replaced picture may be shared, so it is only deleted once unused
+            if previous_picture != profile_picture_url:
+                release_profile_picture(previous_picture)
+            
             # Log the action
             log_audit('update', 'user_profile', current_user.id, {
                 'action': 'profile_picture_upload',
@@ -133,18 +246,11 @@ def upload_profile_picture():
 def remove_profile_picture():
     """Remove user profile picture"""
     try:
-        # Remove file from filesystem
-        if current_user.profile_picture:
-            old_path = os.path.join(current_app.root_path, 'static', current_user.profile_picture.lstrip('/'))
-            if os.path.exists(old_path):
-                try:
-                    os.remove(old_path)
-                except OSError:
-                    pass  # Ignore errors when removing file
-        
-        # Update database
+        # Update database, then delete the file unless another user shares it
+        previous_picture = current_user.profile_picture
         current_user.profile_picture = None
         db.session.commit()
+        release_profile_picture(previous_picture)
         
         # Log the action
         log_audit('update', 'user_profile', current_user.id, {
@@ -1,17 +1,55 @@
-from flask import Blueprint, render_template, request, jsonify, make_response
+from flask import Blueprint, Response, render_template, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func, and_
-from ..models import Sale, SaleLine, MenuItem, MenuCategory, Expense
+from sqlalchemy import and_, case, func, literal, select, union_all
+from ..models import Sale, SaleLine, MenuItem, MenuCategory, Expense, User
 from ..extensions import db
 from ..auth import require_permissions
 from ..utils.business_hours import get_business_day, get_business_day_range
 from ..utils.currency_utils import get_system_currency, get_currency_symbol
+from ..utils.json_utils import json_response, json_list_response
 import csv
 import io
 
 bp = Blueprint('reports', __name__)
 
+# CSV exports are streamed in chunks of about this many characters
+CSV_CHUNK_SIZE = 64 * 1024
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per round trip while streaming an export
+
+def csv_response(filename_prefix, header, rows):
+    """
+    Stream a CSV attachment, writing rows as they are read from the database
+    
+    At most about CSV_CHUNK_SIZE of text is held at once, whatever the export
+    range, so nothing is spilled to a temp file: writing one first would add a
+    full disk pass and delay the first byte until every row has been read.
+    
+    Args:
+        filename_prefix: Download name before the date suffix, e.g. 'sales_report'
+        header: Column titles
+        rows: Lazy iterable of row values (a generator, so its query only runs
+            once the response body is read, inside the kept request context)
+    
+    Returns:
+        Response: Streaming text/csv response
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= CSV_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename_prefix}_{datetime.now(timezone.utc).strftime("%Y%m%d")}.csv'
+    return response
+
 @bp.route('/')
 @login_required
 @require_permissions('reports.view')
@@ -30,156 +68,86 @@ def sales_report():
     
     # Sales report: Revenue = Cash+Online+Account sales + Credit payments received
     # Order count includes all order types (Cash+Online+Account+Credit) excluding payment tracking
-    
-    # MULTI-TENANT: Get cash/online/account sales by date
     from flask_login import current_user
-    sales_query = db.session.query(
-        func.date(Sale.created_at).label('date'),
-        func.count(Sale.id).label('order_count'),
-        func.sum(Sale.total).label('sales_total')
-    ).filter(
-        Sale.business_id == current_user.business_id,
-        ~Sale.invoice_no.like('%-PAY-%'),
-        Sale.payment_method.in_(['cash', 'online', 'account'])
-    )
+    from ..models import CreditPayment
     
-    # MULTI-TENANT: Get all orders count (including credit) by date for accurate order counting
-    all_orders_query = db.session.query(
-        func.date(Sale.created_at).label('date'),
-        func.count(Sale.id).label('total_order_count')
-    ).filter(
+    # Period key of a timestamp column; strftime is SQLite-only, PostgreSQL truncates
+    postgres = db.session.get_bind().dialect.name == 'postgresql'
+    
+    def date_bucket(column):
+        """Grouping expression for the requested period"""
+        if group_by == 'week':
+            return func.date_trunc('week', column) if postgres else func.strftime('%Y-%W', column)
+        if group_by == 'month':
+            return func.date_trunc('month', column) if postgres else func.strftime('%Y-%m', column)
+        return func.date(column)
+    
+    # Each expression is built once and reused in the select, filters and grouping
+    sale_day = func.date(Sale.created_at)
+    sale_bucket = date_bucket(Sale.created_at)
+    payment_day = func.date(CreditPayment.payment_date)
+    payment_bucket = date_bucket(CreditPayment.payment_date)
+    
+    # MULTI-TENANT: Order count, paid sales and total order value per period in one
+    # grouped scan - credit orders count as orders but not as revenue. A period is
+    # labelled with its first day that has data.
+    sales_query = select(
+        sale_bucket.label('bucket'),
+        func.min(sale_day).label('date'),
+        func.count().label('order_count'),
+        func.sum(case((Sale.payment_method.in_(['cash', 'online', 'account']), Sale.total), else_=0)).label('sales_total'),
+        func.sum(Sale.total).label('total_order_value'),
+        literal(0).label('credit_payments')
+    ).where(
         Sale.business_id == current_user.business_id,
-        ~Sale.invoice_no.like('%-PAY-%')
-    )
-    
-    if start_date:
-        sales_query = sales_query.filter(func.date(Sale.created_at) >= start_date)
-        all_orders_query = all_orders_query.filter(func.date(Sale.created_at) >= start_date)
-    
-    if end_date:
-        sales_query = sales_query.filter(func.date(Sale.created_at) <= end_date)
-        all_orders_query = all_orders_query.filter(func.date(Sale.created_at) <= end_date)
-    
-    if group_by == 'day':
-        sales_query = sales_query.group_by(func.date(Sale.created_at))
-        all_orders_query = all_orders_query.group_by(func.date(Sale.created_at))
-    elif group_by == 'week':
-        sales_query = sales_query.group_by(func.strftime('%Y-%W', Sale.created_at))
-        all_orders_query = all_orders_query.group_by(func.strftime('%Y-%W', Sale.created_at))
-    elif group_by == 'month':
-        sales_query = sales_query.group_by(func.strftime('%Y-%m', Sale.created_at))
-        all_orders_query = all_orders_query.group_by(func.strftime('%Y-%m', Sale.created_at))
-    
-    sales_results = sales_query.order_by('date').all()
-    orders_results = all_orders_query.order_by('date').all()
-    
-    # MULTI-TENANT: Get credit payments by date
-    from ..models import CreditPayment
-    credit_payments_query = db.session.query(
-        func.date(CreditPayment.payment_date).label('date'),
+        Sale.is_payment_record == False
+    ).group_by(sale_bucket)
+    
+    # MULTI-TENANT: Credit payments received per period, added to revenue
+    credit_payments_query = select(
+        payment_bucket.label('bucket'),
+        func.min(payment_day).label('date'),
+        literal(0).label('order_count'),
+        literal(0).label('sales_total'),
+        literal(0).label('total_order_value'),
         func.sum(CreditPayment.payment_amount).label('credit_payments')
-    ).filter(
+    ).where(
         CreditPayment.business_id == current_user.business_id
-    )
+    ).group_by(payment_bucket)
     
     if start_date:
-        credit_payments_query = credit_payments_query.filter(func.date(CreditPayment.payment_date) >= start_date)
+        sales_query = sales_query.where(sale_day >= start_date)
+        credit_payments_query = credit_payments_query.where(payment_day >= start_date)
     
     if end_date:
-        credit_payments_query = credit_payments_query.filter(func.date(CreditPayment.payment_date) <= end_date)
-    
-    if group_by == 'day':
-        credit_payments_query = credit_payments_query.group_by(func.date(CreditPayment.payment_date))
-    elif group_by == 'week':
-        credit_payments_query = credit_payments_query.group_by(func.strftime('%Y-%W', CreditPayment.payment_date))
-    elif group_by == 'month':
-        credit_payments_query = credit_payments_query.group_by(func.strftime('%Y-%m', CreditPayment.payment_date))
-    
-    credit_results = credit_payments_query.order_by('date').all()
-    
-    # MULTI-TENANT: Get total order value (all orders including credit) by date
-    total_orders_query = db.session.query(
-        func.date(Sale.created_at).label('date'),
-        func.sum(Sale.total).label('total_order_value')
-    ).filter(
-        Sale.business_id == current_user.business_id,
-        ~Sale.invoice_no.like('%-PAY-%')
-    )
-    
-    if start_date:
-        total_orders_query = total_orders_query.filter(func.date(Sale.created_at) >= start_date)
-    
-    if end_date:
-        total_orders_query = total_orders_query.filter(func.date(Sale.created_at) <= end_date)
-    
-    if group_by == 'day':
-        total_orders_query = total_orders_query.group_by(func.date(Sale.created_at))
-    elif group_by == 'week':
-        total_orders_query = total_orders_query.group_by(func.strftime('%Y-%W', Sale.created_at))
-    elif group_by == 'month':
-        total_orders_query = total_orders_query.group_by(func.strftime('%Y-%m', Sale.created_at))
+        sales_query = sales_query.where(sale_day <= end_date)
+        credit_payments_query = credit_payments_query.where(payment_day <= end_date)
     
-    total_orders_results = total_orders_query.order_by('date').all()
+    # Both grouped results come back in one round trip
+    results = db.session.execute(
+        union_all(sales_query, credit_payments_query).order_by('date')
+    ).all()
     
-    # Combine results by date
+    # Combine results by period; rows come ordered by date, so the first row of a
+    # period carries its earliest day
     data = {}
-    
-    # Add sales data
-    for row in sales_results:
-        date_str = str(row.date)
-        data[date_str] = {
-            'date': date_str,
+    for row in results:
+        entry = data.setdefault(str(row.bucket), {
+            'date': str(row.date),
             'order_count': 0,
-            'total_sales': float(row.sales_total or 0),
+            'total_sales': 0,
             'total_order_value': 0,
             'avg_order_value': 0
-        }
+        })
+        entry['order_count'] += row.order_count
+        entry['total_sales'] += float(row.sales_total or 0) + float(row.credit_payments or 0)
+        entry['total_order_value'] += float(row.total_order_value or 0)
+    
+    for entry in data.values():
+        if entry['order_count'] > 0:
+            entry['avg_order_value'] = entry['total_sales'] / entry['order_count']
     
-    # Add order counts
-    for row in orders_results:
-        date_str = str(row.date)
-        if date_str not in data:
-            data[date_str] = {
-                'date': date_str,
-                'order_count': 0,
-                'total_sales': 0,
-                'total_order_value': 0,
-                'avg_order_value': 0
-            }
-        data[date_str]['order_count'] = row.total_order_count
-        if row.total_order_count > 0:
-            data[date_str]['avg_order_value'] = data[date_str]['total_sales'] / row.total_order_count
-    
-    # Add total order values
-    for row in total_orders_results:
-        date_str = str(row.date)
-        if date_str not in data:
-            data[date_str] = {
-                'date': date_str,
-                'order_count': 0,
-                'total_sales': 0,
-                'total_order_value': 0,
-                'avg_order_value': 0
-            }
-        data[date_str]['total_order_value'] = float(row.total_order_value or 0)
-    
-    # Add credit payments to revenue
-    for row in credit_results:
-        date_str = str(row.date)
-        if date_str not in data:
-            data[date_str] = {
-                'date': date_str,
-                'order_count': 0,
-                'total_sales': 0,
-                'total_order_value': 0,
-                'avg_order_value': 0
-            }
-        data[date_str]['total_sales'] += float(row.credit_payments or 0)
-        # Recalculate avg order value with updated revenue
-        if data[date_str]['order_count'] > 0:
-            data[date_str]['avg_order_value'] = data[date_str]['total_sales'] / data[date_str]['order_count']
-    
-    return jsonify({
+    return json_response({
         'success': True,
         'data': list(data.values())
     })
@@ -195,10 +163,11 @@ def top_items_report():
         
         # MULTI-TENANT: Filter by business_id
         from flask_login import current_user
+        total_qty = func.sum(SaleLine.qty).label('total_qty')
         query = db.session.query(
             MenuItem.name,
             MenuCategory.name.label('category'),
-            func.sum(SaleLine.qty).label('total_qty'),
+            total_qty,
             func.sum(SaleLine.line_total).label('total_revenue')
         ).select_from(SaleLine)\
          .join(MenuItem, SaleLine.item_id == MenuItem.id)\
@@ -213,10 +182,10 @@ def top_items_report():
             query = query.filter(func.date(Sale.created_at) <= end_date)
         
         results = query.group_by(MenuItem.id, MenuItem.name, MenuCategory.name)\
-                      .order_by(func.sum(SaleLine.qty).desc())\
+                      .order_by(total_qty.desc())\
                       .limit(limit).all()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'data': [{
                 'item_name': row.name,
@@ -244,13 +213,13 @@ def expenses_report():
     if group_by == 'category':
         query = db.session.query(
             Expense.category,
-            func.count(Expense.id).label('count'),
+            func.count().label('count'),
             func.sum(Expense.amount).label('total_amount')
         ).filter(Expense.business_id == current_user.business_id).group_by(Expense.category)
     else:  # by date
         query = db.session.query(
             func.date(Expense.incurred_at).label('date'),
-            func.count(Expense.id).label('count'),
+            func.count().label('count'),
             func.sum(Expense.amount).label('total_amount')
         ).filter(Expense.business_id == current_user.business_id).group_by(func.date(Expense.incurred_at))
     
@@ -262,7 +231,7 @@ def expenses_report():
     
     results = query.order_by('total_amount').all()
     
-    return jsonify({
+    return json_response({
         'success': True,
         'data': [{
             'label': str(row[0]),  # category or date
@@ -279,52 +248,53 @@ def export_sales():
     end_date = request.args.get('end_date')
     
     # MULTI-TENANT: Export sales: All order types (Cash + Online + Account + Credit) - exclude only payment tracking records
+    # Only the exported columns are selected, with the cashier name joined in
+    # rather than lazy-loaded per sale
     from flask_login import current_user
-    query = Sale.query.filter(
+    query = select(
+        Sale.invoice_no,
+        Sale.created_at,
+        Sale.customer_name,
+        Sale.customer_phone,
+        Sale.table_number,
+        Sale.subtotal,
+        Sale.tax,
+        Sale.total,
+        Sale.payment_method,
+        User.full_name
+    ).outerjoin(User, Sale.user_id == User.id).where(
         Sale.business_id == current_user.business_id,
-        ~Sale.invoice_no.like('%-PAY-%')
+        Sale.is_payment_record == False
     )
     
     if start_date:
-        query = query.filter(func.date(Sale.created_at) >= start_date)
+        query = query.where(func.date(Sale.created_at) >= start_date)
     
     if end_date:
-        query = query.filter(func.date(Sale.created_at) <= end_date)
-    
-    sales = query.order_by(Sale.created_at.desc()).all()
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
+        query = query.where(func.date(Sale.created_at) <= end_date)
+    
+    def sale_rows():
+        rows = db.session.execute(
+            query.order_by(Sale.created_at.desc()).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in rows:
+            yield [
+                row.invoice_no,
+                row.created_at.strftime('%Y-%m-%d %H:%M'),
+                row.customer_name or '',
+                row.customer_phone or '',
+                row.table_number or '',
+                float(row.subtotal),
+                float(row.tax),
+                float(row.total),
+                row.payment_method,
+                row.full_name or ''
+            ]
+    
+    return csv_response('sales_report', [
         'Invoice No', 'Date', 'Customer', 'Phone', 'Table', 
         'Subtotal', 'Tax', 'Total', 'Payment Method', 'Cashier'
-    ])
-    
-    # Data
-    for sale in sales:
-        writer.writerow([
-            sale.invoice_no,
-            sale.created_at.strftime('%Y-%m-%d %H:%M'),
-            sale.customer_name or '',
-            sale.customer_phone or '',
-            sale.table_number or '',
-            float(sale.subtotal),
-            float(sale.tax),
-            float(sale.total),
-            sale.payment_method,
-            sale.user.full_name
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=sales_report_{datetime.now(timezone.utc).strftime("%Y%m%d")}.csv'
-    
-    return response
+    ], sale_rows())
 
 @bp.route('/api/export/expenses')
 @login_required
@@ -333,44 +303,41 @@ def export_expenses():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # MULTI-TENANT: Filter by business_id
+    # MULTI-TENANT: Filter by business_id; exported columns only, with the
+    # name of the user who added each expense joined in
     from flask_login import current_user
-    query = Expense.query.filter_by(business_id=current_user.business_id)
+    query = select(
+        Expense.incurred_at,
+        Expense.category,
+        Expense.amount,
+        Expense.note,
+        User.full_name
+    ).outerjoin(User, Expense.user_id == User.id).where(
+        Expense.business_id == current_user.business_id
+    )
     
     if start_date:
-        query = query.filter(func.date(Expense.incurred_at) >= start_date)
+        query = query.where(func.date(Expense.incurred_at) >= start_date)
     
     if end_date:
-        query = query.filter(func.date(Expense.incurred_at) <= end_date)
-    
-    expenses = query.order_by(Expense.incurred_at.desc()).all()
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
+        query = query.where(func.date(Expense.incurred_at) <= end_date)
+    
+    def expense_rows():
+        rows = db.session.execute(
+            query.order_by(Expense.incurred_at.desc()).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in rows:
+            yield [
+                row.incurred_at.strftime('%Y-%m-%d'),
+                row.category,
+                float(row.amount),
+                row.note or '',
+                row.full_name or ''
+            ]
+    
+    return csv_response('expenses_report', [
         'Date', 'Category', 'Amount', 'Description', 'Added By'
-    ])
-    
-    # Data
-    for expense in expenses:
-        writer.writerow([
-            expense.incurred_at.strftime('%Y-%m-%d'),
-            expense.category,
-            float(expense.amount),
-            expense.note or '',
-            expense.user.full_name
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=expenses_report_{datetime.now(timezone.utc).strftime("%Y%m%d")}.csv'
-    
-    return response
+    ], expense_rows())
 
 @bp.route('/api/inventory')
 @login_required
@@ -394,20 +361,26 @@ def inventory_report():
     if low_stock_only:
         query = query.filter(InventoryItem.current_stock <= InventoryItem.min_stock_level)
     
-    items = query.order_by(InventoryItem.name).all()
-    
-    # Calculate totals
-    total_items = len(items)
-    total_value = sum(float(item.current_stock) * float(item.unit_cost) for item in items)
-    low_stock_items = sum(1 for item in items if item.current_stock <= item.min_stock_level)
-    
-    return jsonify({
+    # Totals in one aggregate row instead of passes over the fetched items
+    total_items, total_value, low_stock_items = query.with_entities(
+        func.count(),
+        func.coalesce(func.sum(
+            func.coalesce(InventoryItem.current_stock, 0) * func.coalesce(InventoryItem.unit_cost, 0)
+        ), 0),
+        func.coalesce(func.sum(
+            case((InventoryItem.current_stock <= InventoryItem.min_stock_level, 1), else_=0)
+        ), 0)
+    ).one()
+    
+    # Read-only list: plain column rows streamed in batches, no ORM hydration
+    items = query.with_entities(*InventoryItem.list_columns()).order_by(InventoryItem.name).yield_per(EXPORT_BATCH_SIZE)
+    
+    return json_list_response('items', items, InventoryItem.row_to_dict, {
         'success': True,
-        'items': [item.to_dict() for item in items],
         'summary': {
             'total_items': total_items,
-            'total_value': total_value,
-            'low_stock_items': low_stock_items
+            'total_value': float(total_value),
+            'low_stock_items': int(low_stock_items)
         }
     })
 
@@ -421,52 +394,49 @@ def export_inventory():
     category = request.args.get('category')
     low_stock_only = request.args.get('low_stock_only', 'false').lower() == 'true'
     
-    # MULTI-TENANT: Filter by business_id
-    query = InventoryItem.query.filter(
+    # MULTI-TENANT: Filter by business_id; exported columns only
+    query = select(
+        InventoryItem.sku,
+        InventoryItem.name,
+        InventoryItem.category,
+        InventoryItem.unit,
+        InventoryItem.current_stock,
+        InventoryItem.min_stock_level,
+        InventoryItem.max_stock_level,
+        InventoryItem.unit_cost
+    ).where(
         InventoryItem.business_id == current_user.business_id,
         InventoryItem.is_active == True
     )
     
     if category:
-        query = query.filter(InventoryItem.category == category)
+        query = query.where(InventoryItem.category == category)
     
     if low_stock_only:
-        query = query.filter(InventoryItem.current_stock <= InventoryItem.min_stock_level)
-    
-    items = query.order_by(InventoryItem.name).all()
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
+        query = query.where(InventoryItem.current_stock <= InventoryItem.min_stock_level)
+    
+    def item_rows():
+        rows = db.session.execute(
+            query.order_by(InventoryItem.name).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in rows:
+            total_value = float(row.current_stock) * float(row.unit_cost)
+            status = 'Low Stock' if row.current_stock <= row.min_stock_level else 'Normal'
+            
+            yield [
+                row.sku,
+                row.name,
+                row.category,
+                row.unit,
+                float(row.current_stock),
+                float(row.min_stock_level),
+                float(row.max_stock_level),
+                float(row.unit_cost),
+                total_value,
+                status
+            ]
+    
+    return csv_response('inventory_report', [
         'SKU', 'Name', 'Category', 'Unit', 'Current Stock', 
         'Min Stock', 'Max Stock', 'Unit Cost', 'Total Value', 'Status'
-    ])
-    
-    # Data
-    for item in items:
-        total_value = float(item.current_stock) * float(item.unit_cost)
-        status = 'Low Stock' if item.current_stock <= item.min_stock_level else 'Normal'
-        
-        writer.writerow([
-            item.sku,
-            item.name,
-            item.category,
-            item.unit,
-            float(item.current_stock),
-            float(item.min_stock_level),
-            float(item.max_stock_level),
-            float(item.unit_cost),
-            total_value,
-            status
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=inventory_report_{datetime.now(timezone.utc).strftime("%Y%m%d")}.csv'
-    
-    return response
+    ], item_rows())
@@ -10,9 +10,13 @@ from ..extensions import db
 from ..models import Business, Subscription, Invoice, PaymentMethod
 from ..services.subscription_service import SubscriptionService
 from ..business_context import get_current_business
+from ..utils.json_utils import json_response, json_list_response, json_stream_response
+from ..utils.pagination import keyset_paginate, page_info
 
 bp = Blueprint('subscriptions', __name__, url_prefix='/subscriptions')
 
+EXPORT_BATCH_SIZE = 500  # Invoice rows fetched per round trip while streaming an export
+
 @bp.route('/')
 @login_required
 def index():
@@ -22,8 +26,7 @@ def index():
         flash('Business not found', 'error')
         return redirect(url_for('dashboard.index'))
     
-    subscription_status = SubscriptionService.get_subscription_status(business.id)
-    usage_stats = SubscriptionService.get_usage_stats(business.id)
+    bundle = SubscriptionService.get_dashboard_bundle(business.id)
     
     # Get billing history
     invoices = Invoice.query.filter_by(
@@ -31,8 +34,8 @@ def index():
     ).order_by(Invoice.created_at.desc()).limit(10).all()
     
     return render_template('subscriptions/index.html',
-                         subscription=subscription_status,
-                         usage=usage_stats,
+                         subscription=bundle['subscription'],
+                         usage=bundle['usage'],
                          invoices=invoices,
                          plans=SubscriptionService.get_all_plans())
 
@@ -44,13 +47,7 @@ def api_status():
     if not business:
         return jsonify({'error': 'Business not found'}), 404
     
-    status = SubscriptionService.get_subscription_status(business.id)
-    usage = SubscriptionService.get_usage_stats(business.id)
-    
-    return jsonify({
-        'subscription': status,
-        'usage': usage
-    })
+    return json_response(SubscriptionService.get_dashboard_bundle(business.id))
 
 @bp.route('/api/upgrade', methods=['POST'])
 @login_required
@@ -151,21 +148,58 @@ def api_invoices():
     if not business:
         return jsonify({'error': 'Business not found'}), 404
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(request.args.get('per_page', 10, type=int), 1)
+    cursor = request.args.get('cursor')
+    # The COUNT(*) is the expensive part of a page, so it only runs on request
+    include_total = request.args.get('include_total', 'false').lower() in ('1', 'true')
     
-    invoices = Invoice.query.filter_by(
+    # Read-only page: plain column rows, skipping payment details and ORM hydration
+    query = Invoice.query.filter_by(
         business_id=business.id
-    ).order_by(Invoice.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    return jsonify({
-        'invoices': [inv.to_dict() for inv in invoices.items],
-        'total': invoices.total,
-        'pages': invoices.pages,
-        'current_page': page
-    })
+    ).with_entities(*Invoice.list_columns())
+    
+    # Keyset pagination on (created_at, id) when a cursor is passed (empty for the
+    # first page) - no OFFSET scan
+    if cursor is not None:
+        try:
+            invoices, next_cursor = keyset_paginate(
+                query, [Invoice.created_at, Invoice.id], cursor=cursor, per_page=per_page
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        extra = {'next_cursor': next_cursor, 'has_next': next_cursor is not None}
+        if include_total:
+            extra['total'] = query.order_by(None).count()
+        return json_list_response('invoices', invoices, Invoice.row_to_dict, extra)
+    
+    # Page numbers: fetch one extra row to learn whether another page exists
+    invoices = query.order_by(Invoice.created_at.desc(), Invoice.id.desc()).limit(per_page + 1).offset((page - 1) * per_page).all()
+    
+    extra = {'current_page': page, 'has_next': len(invoices) > per_page}
+    if include_total:
+        pagination = page_info(page, per_page, query.order_by(None).count())
+        extra.update(total=pagination['total'], pages=pagination['pages'])
+    return json_list_response('invoices', invoices[:per_page], Invoice.row_to_dict, extra)
+
+@bp.route('/api/invoices/export')
+@login_required
+def api_invoices_export():
+    """Full billing history as a streamed JSON array, newest first"""
+    business = get_current_business()
+    if not business:
+        return jsonify({'error': 'Business not found'}), 404
+    
+    query = Invoice.query.filter_by(
+        business_id=business.id
+    ).with_entities(*Invoice.list_columns()).order_by(Invoice.created_at.desc(), Invoice.id.desc())
+    
+    def invoice_rows():
+        # Rows arrive from the database in batches instead of all at once
+        yield from query.yield_per(EXPORT_BATCH_SIZE)
+    
+    return json_stream_response(invoice_rows(), Invoice.row_to_dict)
 
 @bp.route('/api/invoice/<int:invoice_id>')
 @login_required
@@ -183,7 +217,7 @@ def api_invoice_detail(invoice_id):
     if not invoice:
         return jsonify({'error': 'Invoice not found'}), 404
     
-    return jsonify(invoice.to_dict())
+    return json_response(invoice.to_dict())
 
 @bp.route('/plans')
 @login_required
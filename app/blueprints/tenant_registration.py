@@ -3,12 +3,23 @@ Tenant Registration Blueprint
 Handles new business registration for multi-tenant ERP
 """
 from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from sqlalchemy import exists, func, select
+from ..models import Business, BusinessNameHistory, SubscriptionPlan, SystemSetting, User
 from ..services.tenant_service import TenantService
+from ..services.subscription_service import SubscriptionService
+from ..services.verification_service import VerificationService
 from ..extensions import db
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 bp = Blueprint('tenant', __name__)
 
+# Compiled once; checked on every registration POST
+EMAIL_RE = re.compile(r'^[^@]+@[^@]+\.[^@]+$')
+VERIFICATION_CODE_RE = re.compile(r'[0-9]{6}')  # Codes are 6 ASCII digits
+
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Public tenant registration page"""
@@ -29,7 +40,7 @@ def register():
         if not business_name or len(business_name) < 2:
             errors.append('Business name must be at least 2 characters long')
         
-        if not owner_email or not re.match(r'^[^@]+@[^@]+\.[^@]+$', owner_email):
+        if not owner_email or not EMAIL_RE.match(owner_email):
             errors.append('Please enter a valid email address')
         
         if not owner_name or len(owner_name) < 2:
@@ -41,34 +52,34 @@ def register():
         if not password or len(password) < 8:
             errors.append('Password must be at least 8 characters long')
         
-        if not email_verification_code or len(email_verification_code) != 6:
+        if not VERIFICATION_CODE_RE.fullmatch(email_verification_code):
             errors.append('Please enter the 6-digit email verification code')
         
-        if not mobile_verification_code or len(mobile_verification_code) != 6:
+        if not VERIFICATION_CODE_RE.fullmatch(mobile_verification_code):
             errors.append('Please enter the 6-digit mobile verification code')
         
-        # Validate plan exists in database
-        from ..models import SubscriptionPlan
-        plan_exists = SubscriptionPlan.query.filter_by(plan_code=subscription_plan, is_active=True).first()
-        if not plan_exists:
-            subscription_plan = 'basic'  # Fallback to basic plan
-        
-        # Get plans for rendering
-        from ..models import SubscriptionPlan
-        plans_query = SubscriptionPlan.query.filter_by(is_active=True, is_visible=True).order_by(SubscriptionPlan.display_order).all()
-        plans = [plan.to_dict() for plan in plans_query]
-        
+        # Bail out on bad input before any plan lookup
         if errors:
             for error in errors:
                 flash(error, 'error')
             return render_template('tenant/register.html', 
-                                 plans=plans,
+                                 plans=SubscriptionService.get_visible_plans(),
                                  business_name=business_name,
                                  owner_email=owner_email,
                                  owner_name=owner_name,
                                  phone_number=phone_number,
                                  subscription_plan=subscription_plan)
         
+        # Validate plan is one of the plans offered on the form. Checked against the
+        # database, not the cached list, which may lag a plan edit on other workers.
+        plan_offered = db.session.query(exists().where(
+            SubscriptionPlan.plan_code == subscription_plan,
+            SubscriptionPlan.is_active == True,
+            SubscriptionPlan.is_visible == True
+        )).scalar()
+        if not plan_offered:
+            subscription_plan = 'basic'  # Fallback to basic plan
+        
         try:
             # TODO: Verify the codes against stored codes in session/cache
             # For now, we'll proceed with registration
@@ -90,7 +101,7 @@ def register():
         except ValueError as e:
             flash(str(e), 'error')
             return render_template('tenant/register.html',
-                                 plans=plans,
+                                 plans=SubscriptionService.get_visible_plans(),
                                  business_name=business_name,
                                  owner_email=owner_email,
                                  owner_name=owner_name,
@@ -100,21 +111,17 @@ def register():
             # Show actual error for debugging
             flash(f'Registration failed: {str(e)}', 'error')
             # Log error details
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Registration error: {str(e)}", exc_info=True)
             return render_template('tenant/register.html',
-                                 plans=plans,
+                                 plans=SubscriptionService.get_visible_plans(),
                                  business_name=business_name,
                                  owner_email=owner_email,
                                  owner_name=owner_name,
                                  phone_number=phone_number,
                                  subscription_plan=subscription_plan)
     
-    # GET request - fetch plans from database
-    from ..models import SubscriptionPlan
-    plans_query = SubscriptionPlan.query.filter_by(is_active=True, is_visible=True).order_by(SubscriptionPlan.display_order).all()
-    plans = [plan.to_dict() for plan in plans_query]
+    # GET request - plans from the cached list
+    plans = SubscriptionService.get_visible_plans()
     
     return render_template('tenant/register.html', plans=plans)
 
@@ -133,52 +140,51 @@ def check_availability():
         'message': ''
     }
     
+    # Every requested check as one EXISTS in a single SELECT, so the
+    # availability check is one round trip however many fields are filled in
+    checks = {}
     if business_name:
-        from ..models import Business, BusinessNameHistory, SystemSetting
-        from sqlalchemy import func
-        
-        # Check official business names (case-insensitive)
-        existing_business = Business.query.filter(
-            func.lower(Business.business_name) == business_name.lower()
-        ).first()
-        if existing_business:
-            result['business_name_available'] = False
-            result['message'] = 'This business name is already registered'
-        else:
-            # Check current display names in settings (case-insensitive)
-            existing_display = SystemSetting.query.filter(
-                SystemSetting.key == 'restaurant_name',
-                func.lower(SystemSetting.value) == business_name.lower()
-            ).first()
-            if existing_display:
-                result['business_name_available'] = False
-                result['message'] = 'This business name is currently in use as a display name'
-            else:
-                # Check historical names (case-insensitive)
-                historical_name = BusinessNameHistory.query.filter(
-                    func.lower(BusinessNameHistory.business_name) == business_name.lower()
-                ).first()
-                if historical_name:
-                    result['business_name_available'] = False
-                    result['message'] = 'This business name was previously used and cannot be reused'
+        name = business_name.lower()
+        checks['business'] = exists().where(func.lower(Business.business_name) == name)
+        checks['display'] = exists().where(
+            SystemSetting.key == 'restaurant_name',
+            func.lower(SystemSetting.value) == name
+        )
+        checks['history'] = exists().where(func.lower(BusinessNameHistory.business_name) == name)
     
     if owner_email:
-        from ..models import User
-        existing_user = User.query.filter_by(email=owner_email).first()
-        result['email_available'] = existing_user is None
+        checks['email'] = exists().where(User.email == owner_email)
     
     if phone_number:
-        from ..models import User
-        existing_phone = User.query.filter_by(phone=phone_number).first()
-        result['phone_available'] = existing_phone is None
+        checks['phone'] = exists().where(User.phone == phone_number)
+    
+    if checks:
+        taken = db.session.execute(
+            select(*[check.label(label) for label, check in checks.items()])
+        ).one()._asdict()
+        
+        # Official names first, then current display names, then historical names
+        if taken.get('business'):
+            result['business_name_available'] = False
+            result['message'] = 'This business name is already registered'
+        elif taken.get('display'):
+            result['business_name_available'] = False
+            result['message'] = 'This business name is currently in use as a display name'
+        elif taken.get('history'):
+            result['business_name_available'] = False
+            result['message'] = 'This business name was previously used and cannot be reused'
+        
+        if owner_email:
+            result['email_available'] = not taken['email']
+        
+        if phone_number:
+            result['phone_available'] = not taken['phone']
     
     return jsonify(result)
 
 @bp.route('/api/send-verification-codes', methods=['POST'])
 def send_verification_codes():
     """API endpoint to send verification codes to email and phone"""
-    from ..services.verification_service import VerificationService
-    
     data = request.get_json()
     email = data.get('email', '').strip().lower()
     phone = data.get('phone', '').strip()
@@ -191,15 +197,13 @@ def send_verification_codes():
         }), 400
     
     # Send both verification codes
-    result = VerificationService.send_both_codes(email, phone, business_name)
+    result = VerificationService.send_both_codes_async(email, phone, business_name)
     
     return jsonify(result)
 
 @bp.route('/api/verify-codes', methods=['POST'])
 def verify_codes():
     """API endpoint to verify email and SMS codes"""
-    from ..services.verification_service import VerificationService
-    
     data = request.get_json()
     email = data.get('email', '').strip().lower()
     phone = data.get('phone', '').strip()
@@ -220,7 +224,6 @@ def verify_codes():
 @bp.route('/plans')
 def plans():
     """Subscription plans page"""
-    from ..services.subscription_service import SubscriptionService
     
     plans = SubscriptionService.PLAN_PRICING
     periods = SubscriptionService.SUBSCRIPTION_PERIODS
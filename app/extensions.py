@@ -1,3 +1,4 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
@@ -9,3 +10,12 @@ migrate = Migrate()
 login_manager = LoginManager()
 mail = Mail()
 cache = Cache()
+
+def cache_is_shared():
+    """Whether the configured cache backend is shared by all worker processes
+    
+    SimpleCache (the default) lives in each process, so a delete on one worker
+    leaves the other workers' copies in place.
+    """
+    cache_type = str(current_app.config.get('CACHE_TYPE') or '').rsplit('.', 1)[-1].lower()
+    return cache_type.startswith(('redis', 'memcached', 'saslmemcached', 'filesystem'))
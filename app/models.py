@@ -1,8 +1,9 @@
 from datetime import datetime, timezone, timedelta
+import hashlib
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from .extensions import db
+from .extensions import db, cache, cache_is_shared
 
 # ============================================================================
 # MULTI-TENANT: BUSINESS MODEL
@@ -29,6 +30,11 @@ class Business(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
+    __table_args__ = (
+        # Backs the case-insensitive name availability check at registration
+        db.Index('ix_businesses_business_name_lower', db.func.lower(business_name)),
+    )
+    
     # Relationships with CASCADE DELETE
     users = db.relationship('User', backref='business', lazy=True, foreign_keys='User.business_id', cascade='all, delete-orphan')
     menu_categories = db.relationship('MenuCategory', backref='business_ref', lazy=True, cascade='all, delete-orphan')
@@ -157,7 +163,7 @@ class User(UserMixin, db.Model):
     full_name = db.Column(db.String(100), nullable=False)
     department = db.Column(db.String(50))
     designation = db.Column(db.String(50))
-    phone = db.Column(db.String(20))
+    phone = db.Column(db.String(20), index=True)  # Looked up by the registration availability check
     address = db.Column(db.Text)
     
     # System fields
@@ -415,21 +421,46 @@ class MenuItem(db.Model):
     # Relationships
     recipe_items = db.relationship('MenuRecipe', backref='menu_item', lazy=True, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        # Backs the per-business menu item list ordered by id
+        db.Index('ix_menu_items_business_id_id', 'business_id', 'id'),
+        # Backs the highest-SKU lookup in generate_next_sku
+        db.Index('ix_menu_items_business_sku', 'business_id', 'sku'),
+    )
+    
+    MENU_CACHE_TIMEOUT = 60  # Seconds
+    
+    @staticmethod
+    def menu_cache_key(business_id, *filters):
+        """Cache key for POS menu data of a business under the given filters"""
+        # Menu edits bump the business generation (or the global one, for shared
+        # categories); recipe stock levels in to_dict() follow the inventory stats generation
+        generations = cache.get_many(f'menu_gen:{business_id}', 'menu_gen:None', f'inventory_stats_gen:{business_id}')
+        digest = hashlib.blake2b('|'.join(map(str, filters)).encode(), digest_size=16).hexdigest()
+        return f"pos_menu:{business_id}:{':'.join(str(generation or 0) for generation in generations)}:{digest}"
+    
+    @staticmethod
+    def invalidate_menu_cache(business_id):
+        """Drop cached POS menu data of a business (None: data shared by all businesses)"""
+        generation_key = f'menu_gen:{business_id}'
+        # add() seeds the counter without overwriting it; the backend's inc() is an
+        # atomic INCRBY on Redis, so concurrent invalidations never share a generation
+        cache.add(generation_key, 0, timeout=0)
+        cache.cache.inc(generation_key)
+    
     @staticmethod
     def generate_next_sku(business_id=None):
         """Generate the next SKU in format MENU001, MENU002, etc."""
         # MULTI-TENANT: Get the highest SKU for this business
+        # Only the sku column is fetched; (business_id, sku) lets this stop at the first index entry
+        query = db.session.query(MenuItem.sku).filter(MenuItem.sku.like('MENU%'))
         if business_id:
-            last_item = MenuItem.query.filter(
-                MenuItem.business_id == business_id,
-                MenuItem.sku.like('MENU%')
-            ).order_by(MenuItem.sku.desc()).first()
-        else:
-            last_item = MenuItem.query.filter(MenuItem.sku.like('MENU%')).order_by(MenuItem.sku.desc()).first()
+            query = query.filter(MenuItem.business_id == business_id)
+        last_sku = query.order_by(MenuItem.sku.desc()).limit(1).scalar()
         
-        if last_item and last_item.sku:
+        if last_sku:
             try:
-                last_num = int(last_item.sku[4:])  # Extract number after 'MENU'
+                last_num = int(last_sku[4:])  # Extract number after 'MENU'
                 next_id = last_num + 1
             except (ValueError, IndexError):
                 next_id = 1
@@ -465,6 +496,11 @@ class Supplier(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
     purchase_orders = db.relationship('PurchaseOrder', backref='supplier', lazy=True)
+    
+    __table_args__ = (
+        # Backs the active supplier list
+        db.Index('ix_suppliers_business_active', business_id, postgresql_where=is_active),
+    )
 
 class PurchaseOrder(db.Model):
     __tablename__ = 'purchase_orders'
@@ -479,6 +515,11 @@ class PurchaseOrder(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
     lines = db.relationship('PurchaseOrderLine', backref='purchase_order', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Backs the per-business purchase order list ordered by id
+        db.Index('ix_purchase_orders_business_id_id', 'business_id', 'id'),
+    )
 
 class PurchaseOrderLine(db.Model):
     __tablename__ = 'purchase_order_lines'
@@ -504,6 +545,11 @@ class InventoryLot(db.Model):
     received_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
     item = db.relationship('MenuItem', backref='inventory_lots')
+    
+    __table_args__ = (
+        # Covering index for per-item stock sums in the inventory list
+        db.Index('ix_inventory_lots_item_cover', 'item_id', postgresql_include=['qty_on_hand', 'unit_cost']),
+    )
 
 class Sale(db.Model):
     __tablename__ = 'sales'
@@ -521,11 +567,27 @@ class Sale(db.Model):
     total = db.Column(db.Numeric(10, 2), nullable=False)
     payment_method = db.Column(db.String(20), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    is_payment_record = db.Column(db.Boolean, default=False, nullable=False, index=True)  # Credit payment tracking row (-PAY- invoice)
     
     lines = db.relationship('SaleLine', backref='sale', lazy=True, cascade='all, delete-orphan')
     user = db.relationship('User', backref='sales')
     
-    def to_dict(self):
+    __table_args__ = (
+        db.UniqueConstraint('business_id', 'invoice_no', name='uq_sales_business_invoice'),
+        # Sales list: newest first within a business, payment tracking rows excluded
+        db.Index('ix_sales_business_payment_created', 'business_id', 'is_payment_record', 'created_at'),
+        # Covering index for finance revenue sums (index-only scan on PostgreSQL)
+        db.Index('ix_sales_finance_cover', business_id, created_at,
+                 postgresql_include=['total', 'payment_method'],
+                 postgresql_where=is_payment_record == False),
+        # Sales report: filtered and grouped on date(created_at), index-only on PostgreSQL
+        db.Index('ix_sales_report_date', business_id, db.func.date(created_at),
+                 postgresql_include=['total', 'payment_method'],
+                 postgresql_where=is_payment_record == False),
+    )
+    
+    def to_list_dict(self):
+        """Sale header for list views: scalar columns only, so no relationship is loaded"""
         from app.utils.timezone_utils import convert_utc_to_local
         # Convert UTC timestamp to local timezone for display
         local_time = convert_utc_to_local(self.created_at) if self.created_at else None
@@ -541,9 +603,13 @@ class Sale(db.Model):
             'service_charge': float(self.service_charge) if self.service_charge else 0,
             'tax': float(self.tax),
             'total': float(self.total),
-            'payment_method': self.payment_method,
-            'lines': [line.to_dict() for line in self.lines]
+            'payment_method': self.payment_method
         }
+    
+    def to_dict(self):
+        data = self.to_list_dict()
+        data['lines'] = [line.to_dict() for line in self.lines]
+        return data
 
 class SaleLine(db.Model):
     __tablename__ = 'sale_lines'
@@ -558,6 +624,11 @@ class SaleLine(db.Model):
     
     item = db.relationship('MenuItem', backref='sale_lines')
     
+    __table_args__ = (
+        # Sale -> lines lookups and the per-item grouping of the top items report
+        db.Index('ix_sale_lines_sale_item', 'sale_id', 'item_id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -581,6 +652,15 @@ class Expense(db.Model):
     
     user = db.relationship('User', backref='expenses')
     
+    __table_args__ = (
+        # Backs the filtered, keyset-paginated expense list
+        db.Index('ix_expenses_business_category_incurred', 'business_id', 'category', 'incurred_at', 'id'),
+        # Covering index for finance expense sums
+        db.Index('ix_expenses_finance_cover', 'business_id', 'incurred_at', postgresql_include=['amount']),
+        # Expenses report: filtered and grouped on date(incurred_at)
+        db.Index('ix_expenses_report_date', business_id, db.func.date(incurred_at), postgresql_include=['category', 'amount']),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -772,6 +852,12 @@ class SystemSetting(db.Model):
     description = db.Column(db.String(255))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
+    __table_args__ = (
+        # Backs the case-insensitive display name availability check at registration
+        db.Index('ix_system_settings_restaurant_name_lower', db.func.lower(value),
+                 postgresql_where=key == 'restaurant_name'),
+    )
+    
     @classmethod
     def get_setting(cls, key, default=None, business_id='_AUTO_'):
         """Get setting value, optionally filtered by business_id
@@ -799,6 +885,38 @@ class SystemSetting(db.Model):
         
         return setting.value if setting else default
     
+    CACHE_TIMEOUT = 60  # Seconds
+    
+    @staticmethod
+    def _cache_key(key, business_id):
+        return f"system_setting:{business_id or 'global'}:{key}"
+    
+    @classmethod
+    def get_cached_setting(cls, key, default=None, business_id=None):
+        """Get a setting value for a business (None=global), cached briefly
+        
+        Writes through the session drop the cached value on commit. Only a
+        shared backend (Redis) sees that delete on every worker, so with a
+        per-process cache the setting is read uncached instead.
+        """
+        if not cache_is_shared():
+            value = cls.get_setting(key, business_id=business_id)
+            return value if value is not None else default
+        
+        cache_key = cls._cache_key(key, business_id)
+        cached = cache.get(cache_key)
+        if cached is None:
+            # Wrapped in a tuple so a missing setting is cached too
+            cached = (cls.get_setting(key, business_id=business_id),)
+            cache.set(cache_key, cached, timeout=cls.CACHE_TIMEOUT)
+        value = cached[0]
+        return value if value is not None else default
+    
+    @classmethod
+    def invalidate_cache(cls, key, business_id=None):
+        """Drop the cached value of a setting"""
+        cache.delete(cls._cache_key(key, business_id))
+    
     @classmethod
     def set_setting(cls, key, value, description=None, business_id='_AUTO_'):
         """Set setting value, optionally for specific business
@@ -856,21 +974,68 @@ class InventoryItem(db.Model):
     # Relationships
     recipe_usages = db.relationship('MenuRecipe', backref='inventory_item', lazy=True)
     
+    __table_args__ = (
+        # Backs the system-wide DISTINCT category lookup
+        db.Index('ix_inventory_items_active_category', category, postgresql_where=is_active),
+        # Backs the per-business inventory item list ordered by created_at
+        db.Index('ix_inventory_items_business_created', 'business_id', 'created_at'),
+        # Backs the highest-SKU lookup in generate_next_sku
+        db.Index('ix_inventory_items_business_sku', 'business_id', 'sku'),
+    )
+    
+    CATEGORY_CACHE_TIMEOUT = 60  # Seconds
+    
+    @staticmethod
+    def get_active_categories(business_id=None):
+        """Get distinct categories of active items (system-wide if no business_id), cached briefly"""
+        cache_key = f"inventory_categories:{business_id or 'all'}"
+        categories = cache.get(cache_key)
+        if categories is None:
+            query = db.session.query(InventoryItem.category).filter(InventoryItem.is_active == True)
+            if business_id:
+                # MULTI-TENANT: Only this business's categories
+                query = query.filter(InventoryItem.business_id == business_id)
+            categories = [cat[0] for cat in query.distinct().all() if cat[0]]
+            cache.set(cache_key, categories, timeout=InventoryItem.CATEGORY_CACHE_TIMEOUT)
+        return categories
+    
+    STATS_CACHE_TIMEOUT = 30  # Seconds
+    
+    @staticmethod
+    def stats_cache_key(business_id, *filters):
+        """Cache key for inventory list statistics of a business under the given filters"""
+        # The per-business generation lets one write invalidate every filter combination
+        generation = cache.get(f'inventory_stats_gen:{business_id}') or 0
+        digest = hashlib.blake2b('|'.join(map(str, filters)).encode(), digest_size=16).hexdigest()
+        return f'inventory_stats:{business_id}:{generation}:{digest}'
+    
+    @staticmethod
+    def invalidate_stats_cache(business_id):
+        """Drop cached inventory list statistics of a business (all filter combinations)"""
+        generation_key = f'inventory_stats_gen:{business_id}'
+        # add() seeds the counter without overwriting it; the backend's inc() is an
+        # atomic INCRBY on Redis, so concurrent invalidations never share a generation
+        cache.add(generation_key, 0, timeout=0)
+        cache.cache.inc(generation_key)
+    
+    @staticmethod
+    def invalidate_category_cache(business_id=None):
+        """Drop cached categories after an inventory item is created, edited or deactivated"""
+        cache.delete_many('inventory_categories:all', f'inventory_categories:{business_id}')
+    
     @staticmethod
     def generate_next_sku(business_id=None):
         """Generate the next SKU in format INV001, INV002, etc."""
         # MULTI-TENANT: Get the highest SKU for this business
+        # Only the sku column is fetched; (business_id, sku) lets this stop at the first index entry
+        query = db.session.query(InventoryItem.sku).filter(InventoryItem.sku.like('INV%'))
         if business_id:
-            last_item = InventoryItem.query.filter(
-                InventoryItem.business_id == business_id,
-                InventoryItem.sku.like('INV%')
-            ).order_by(InventoryItem.sku.desc()).first()
-        else:
-            last_item = InventoryItem.query.filter(InventoryItem.sku.like('INV%')).order_by(InventoryItem.sku.desc()).first()
+            query = query.filter(InventoryItem.business_id == business_id)
+        last_sku = query.order_by(InventoryItem.sku.desc()).limit(1).scalar()
         
-        if last_item and last_item.sku:
+        if last_sku:
             try:
-                last_num = int(last_item.sku[3:])  # Extract number after 'INV'
+                last_num = int(last_sku[3:])  # Extract number after 'INV'
                 next_id = last_num + 1
             except (ValueError, IndexError):
                 next_id = 1
@@ -879,22 +1044,37 @@ class InventoryItem(db.Model):
         
         return f"INV{next_id:03d}"
     
-    def to_dict(self):
+    @staticmethod
+    def list_columns():
+        """Columns read by row_to_dict, for read-only list queries that skip ORM hydration"""
+        return (
+            InventoryItem.id, InventoryItem.sku, InventoryItem.name, InventoryItem.category,
+            InventoryItem.unit, InventoryItem.current_stock, InventoryItem.min_stock_level,
+            InventoryItem.max_stock_level, InventoryItem.unit_cost, InventoryItem.is_active,
+            InventoryItem.created_at, InventoryItem.updated_at
+        )
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize an InventoryItem or a row of list_columns()"""
         return {
-            'id': self.id,
-            'sku': self.sku,
-            'name': self.name,
-            'category': self.category,
-            'unit': self.unit,
-            'current_stock': float(self.current_stock),
-            'min_stock_level': float(self.min_stock_level),
-            'max_stock_level': float(self.max_stock_level),
-            'unit_cost': float(self.unit_cost),
-            'is_active': self.is_active,
-            'stock_status': 'low' if self.current_stock <= self.min_stock_level else 'normal',
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'id': row.id,
+            'sku': row.sku,
+            'name': row.name,
+            'category': row.category,
+            'unit': row.unit,
+            'current_stock': float(row.current_stock),
+            'min_stock_level': float(row.min_stock_level),
+            'max_stock_level': float(row.max_stock_level),
+            'unit_cost': float(row.unit_cost),
+            'is_active': row.is_active,
+            'stock_status': 'low' if row.current_stock <= row.min_stock_level else 'normal',
+            'created_at': row.created_at.isoformat(),
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None
         }
+    
+    def to_dict(self):
+        return InventoryItem.row_to_dict(self)
 
 class MenuRecipe(db.Model):
     __tablename__ = 'menu_recipes'
@@ -941,6 +1121,11 @@ class CreditSale(db.Model):
     creator = db.relationship('User', backref='created_credit_sales')
     payments = db.relationship('CreditPayment', backref='credit_sale', lazy=True, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        # Credit sales list: newest first within a business
+        db.Index('ix_credit_sales_business_date', 'business_id', 'credit_date'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -974,6 +1159,13 @@ class CreditPayment(db.Model):
     # Relationships
     receiver = db.relationship('User', backref='received_credit_payments')
     
+    __table_args__ = (
+        # Covering index for finance credit-payment sums
+        db.Index('ix_credit_payments_finance_cover', 'business_id', 'payment_date', postgresql_include=['payment_amount']),
+        # Sales report credit payments: filtered and grouped on date(payment_date)
+        db.Index('ix_credit_payments_report_date', business_id, db.func.date(payment_date), postgresql_include=['payment_amount']),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -1265,29 +1457,49 @@ class Invoice(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
+    __table_args__ = (
+        # Backs the per-business billing history, newest first, keyset-paginated on (created_at, id)
+        db.Index('ix_invoices_business_created_id', 'business_id', 'created_at', 'id'),
+    )
+    
     def is_overdue(self):
         """Check if invoice is overdue"""
         if self.status != 'paid':
             return datetime.now(timezone.utc) > self.due_date
         return False
     
-    def to_dict(self):
+    @staticmethod
+    def list_columns():
+        """Columns read by row_to_dict, for read-only list queries that skip ORM hydration"""
+        return (
+            Invoice.id, Invoice.invoice_number, Invoice.amount, Invoice.currency,
+            Invoice.tax_amount, Invoice.total_amount, Invoice.status, Invoice.payment_status,
+            Invoice.billing_period_start, Invoice.billing_period_end, Invoice.due_date,
+            Invoice.paid_at, Invoice.created_at
+        )
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize an Invoice or a row of list_columns()"""
         return {
-            'id': self.id,
-            'invoice_number': self.invoice_number,
-            'amount': float(self.amount),
-            'currency': self.currency,
-            'tax_amount': float(self.tax_amount),
-            'total_amount': float(self.total_amount),
-            'status': self.status,
-            'payment_status': self.payment_status,
-            'billing_period_start': self.billing_period_start.isoformat(),
-            'billing_period_end': self.billing_period_end.isoformat(),
-            'due_date': self.due_date.isoformat(),
-            'paid_at': self.paid_at.isoformat() if self.paid_at else None,
-            'is_overdue': self.is_overdue(),
-            'created_at': self.created_at.isoformat()
+            'id': row.id,
+            'invoice_number': row.invoice_number,
+            'amount': float(row.amount),
+            'currency': row.currency,
+            'tax_amount': float(row.tax_amount),
+            'total_amount': float(row.total_amount),
+            'status': row.status,
+            'payment_status': row.payment_status,
+            'billing_period_start': row.billing_period_start.isoformat(),
+            'billing_period_end': row.billing_period_end.isoformat(),
+            'due_date': row.due_date.isoformat(),
+            'paid_at': row.paid_at.isoformat() if row.paid_at else None,
+            'is_overdue': Invoice.is_overdue(row),
+            'created_at': row.created_at.isoformat()
         }
+    
+    def to_dict(self):
+        return Invoice.row_to_dict(self)
 
 class PaymentMethod(db.Model):
     """Stored payment methods for businesses"""
@@ -1396,6 +1608,12 @@ class SubscriptionPlan(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
+    __table_args__ = (
+        # Backs the active, visible plan list in display order
+        db.Index('ix_subscription_plans_visible_order', 'is_active', 'is_visible', 'display_order',
+                 postgresql_where=db.and_(is_active, is_visible)),
+    )
+    
     def get_features_list(self):
         """Parse features JSON string to list"""
         if self.features:
@@ -1521,6 +1739,11 @@ class BusinessNameHistory(db.Model):
     changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     changed_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     
+    __table_args__ = (
+        # Backs the case-insensitive historical name check at registration
+        db.Index('ix_business_name_history_name_lower', db.func.lower(business_name)),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,126 @@
+import os
+import queue
+import atexit
+import threading
+import logging
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
+
+class AuditService:
+    """Service for writing audit log rows in batches off the request path"""
+    
+    BATCH_SIZE = 100  # Max events per INSERT
+    FLUSH_INTERVAL = 0.1  # Seconds to wait for more events before writing
+    
+    def __init__(self, app=None):
+        self.app = app
+        self.queue = queue.SimpleQueue()  # Lock-free put on the request path
+        self.enabled = True
+        self.worker_thread = None
+        self.worker_pid = None
+        self._lock = threading.Lock()
+        
+        if app:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Initialize the audit service with Flask app"""
+        self.app = app
+        self.enabled = app.config.get('AUDIT_LOG_ASYNC', True)
+        
+        # Write whatever is still queued when the process exits
+        atexit.register(self.flush)
+    
+    def enqueue(self, event):
+        """Queue an audit event (dict of AuditLog column values) for writing"""
+        if not self.enabled or self.app is None:
+            self._write([event])
+            return
+        
+        self._ensure_worker()
+        self.queue.put_nowait(event)
+    
+    def enqueue_many(self, events):
+        """Queue several audit events; written with a single INSERT when not async"""
+        if not events:
+            return
+        
+        if not self.enabled or self.app is None:
+            self._write(events)
+            return
+        
+        self._ensure_worker()
+        for event in events:
+            self.queue.put_nowait(event)
+    
+    def flush(self):
+        """Synchronously write all queued events"""
+        while True:
+            events = self._drain(block=False)
+            if not events:
+                break
+            self._write(events)
+    
+    def _ensure_worker(self):
+        """Start the writer thread in this process if it is not running
+        
+        Started lazily rather than in init_app because gunicorn --preload
+        forks workers after app creation and threads do not survive the fork.
+        """
+        pid = os.getpid()
+        if self.worker_pid == pid and self.worker_thread and self.worker_thread.is_alive():
+            return
+        
+        with self._lock:
+            if self.worker_pid == pid and self.worker_thread and self.worker_thread.is_alive():
+                return
+            self.worker_thread = threading.Thread(target=self._run_worker, name='audit-writer', daemon=True)
+            self.worker_pid = pid
+            self.worker_thread.start()
+    
+    def _run_worker(self):
+        """Writer loop: wait for events, then write them in batches"""
+        while True:
+            events = self._drain(block=True)
+            if events:
+                self._write(events)
+    
+    def _drain(self, block):
+        """Collect up to BATCH_SIZE queued events"""
+        events = []
+        try:
+            if block:
+                events.append(self.queue.get())
+            while len(events) < self.BATCH_SIZE:
+                events.append(self.queue.get(timeout=self.FLUSH_INTERVAL) if block else self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+    
+    def _write(self, events):
+        """Insert a batch of audit events with a single multi-row INSERT"""
+        from flask import current_app
+        from app.extensions import db
+        from app.models import AuditLog
+        
+        try:
+            app = self.app or current_app._get_current_object()
+            # Fresh app context gives a dedicated session, so the caller's
+            # pending changes are never committed by an audit write
+            with app.app_context():
+                try:
+                    db.session.execute(insert(AuditLog), events)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+        except Exception as e:
+            try:
+                from logging_config import log_audit_error
+                log_audit_error(f"Audit log error: {str(e)}")
+            except ImportError:
+                logger.error(f"Audit log error: {str(e)}")
+
+# Global audit service instance
+audit_service = AuditService()
@@ -67,6 +67,9 @@ class SchedulerService:
                     
                     # Check database integrity (daily)
                     self._check_database_integrity()
+                    
+                    # Delete profile pictures no user references any more
+                    self._remove_orphaned_profile_pictures()
                 
                 # Sleep for 1 hour before next check
                 time.sleep(3600)
@@ -153,5 +156,18 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Error checking database integrity: {str(e)}")
 
+    def _remove_orphaned_profile_pictures(self):
+        """Sweep unreferenced profile picture files"""
+        try:
+            # Lazy import to avoid circular dependencies
+            from app.blueprints.profile import remove_orphaned_profile_pictures
+            
+            removed = remove_orphaned_profile_pictures()
+            if removed:
+                logger.info(f"Removed {removed} orphaned profile picture(s)")
+                
+        except Exception as e:
+            logger.error(f"Error removing orphaned profile pictures: {str(e)}")
+
 # Global scheduler service instance
 scheduler_service = SchedulerService()
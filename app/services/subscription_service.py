@@ -11,9 +11,62 @@ Handles all subscription-related operations including:
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 from flask import current_app
-from sqlalchemy import func
-from ..extensions import db
-from ..models import Business, Subscription, Invoice, PaymentMethod, PlanFeature, User
+from sqlalchemy import and_, func, event, select
+from sqlalchemy.orm import Session
+from ..extensions import db, cache, cache_is_shared
+from ..models import Business, Subscription, Invoice, PaymentMethod, PlanFeature, SubscriptionPlan, User
+
+# Plan lists and prices: read by the pricing, registration and billing pages, edited rarely
+PLAN_CACHE_TIMEOUT = 300  # Seconds
+_ALL_PLANS_CACHE_KEY = 'subscription_plans:all'
+_VISIBLE_PLANS_CACHE_KEY = 'subscription_plans:visible'
+_PRICING_CACHE_KEY = 'subscription_plans:pricing'
+
+@event.listens_for(Session, 'before_flush')
+def _collect_plan_changes(session, flush_context, instances):
+    """Note when subscription plans are being written so the cached lists can be dropped"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, SubscriptionPlan):
+            session.info['subscription_plan_changes'] = True
+            return
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_plan_cache_on_commit(session):
+    if session.info.pop('subscription_plan_changes', False):
+        SubscriptionService.invalidate_plan_cache()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_plan_changes(session, previous_transaction):
+    session.info.pop('subscription_plan_changes', None)
+
+# Billing dashboard status + usage: polled on every visit, stale usage counts are harmless briefly
+DASHBOARD_CACHE_TIMEOUT = 30  # Seconds
+
+def _dashboard_cache_key(business_id):
+    return f'subscription_dashboard:{business_id}'
+
+@event.listens_for(Session, 'before_flush')
+def _collect_dashboard_changes(session, flush_context, instances):
+    """Note businesses whose subscription or plan is being written"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Subscription):
+            business_id = obj.business_id
+        elif isinstance(obj, Business):
+            business_id = obj.id
+        else:
+            continue
+        if business_id is not None:
+            session.info.setdefault('subscription_dashboard_changes', set()).add(business_id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dashboard_on_commit(session):
+    changed = session.info.pop('subscription_dashboard_changes', None)
+    if changed:
+        cache.delete_many(*[_dashboard_cache_key(business_id) for business_id in changed])
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_dashboard_changes(session, previous_transaction):
+    session.info.pop('subscription_dashboard_changes', None)
 
 class SubscriptionService:
     """Service class for subscription management"""
@@ -255,23 +308,14 @@ class SubscriptionService:
     @classmethod
     def get_plan_pricing(cls, plan, subscription_months=1):
         """Get pricing for a specific plan from database"""
-        from ..models import SubscriptionPlan
-        
-        # Try to get plan from database
-        plan_config = SubscriptionPlan.query.filter_by(plan_code=plan, is_active=True).first()
+        plan_price = cls._get_pricing_table().get(plan)
         
-        if plan_config:
+        if plan_price:
             # Calculate pricing based on subscription months
-            monthly_price = float(plan_config.monthly_price)
+            monthly_price = plan_price['monthly_price']
             
             # Apply discount for longer periods
-            discount = 0
-            if subscription_months >= 12:
-                discount = 20
-            elif subscription_months >= 6:
-                discount = 15
-            elif subscription_months >= 3:
-                discount = 10
+            discount = cls.get_discount_percentage(subscription_months)
             
             discounted_price = monthly_price * (1 - discount / 100)
             total_price = discounted_price * subscription_months
@@ -280,8 +324,8 @@ class SubscriptionService:
                 'monthly_price': monthly_price,
                 'total_price': total_price,
                 'discount_percentage': discount,
-                'currency': plan_config.currency,
-                'trial_days': plan_config.trial_days if plan_config.has_trial else 0
+                'currency': plan_price['currency'],
+                'trial_days': plan_price['trial_days']
             }
         
         # Fallback pricing if plan not found
@@ -293,6 +337,36 @@ class SubscriptionService:
             'trial_days': 0
         }
     
+    @staticmethod
+    def _get_pricing_table():
+        """
+        Monthly price, currency and trial days of every active plan by plan code
+        
+        Prices feed subscription charges, so the table is only cached when the
+        cache backend is shared: a per-process cache would keep charging the old
+        price on workers that did not see the plan edit.
+        """
+        shared = cache_is_shared()
+        table = cache.get(_PRICING_CACHE_KEY) if shared else None
+        if table is None:
+            rows = db.session.execute(
+                select(
+                    SubscriptionPlan.plan_code, SubscriptionPlan.monthly_price, SubscriptionPlan.currency,
+                    SubscriptionPlan.has_trial, SubscriptionPlan.trial_days
+                ).where(SubscriptionPlan.is_active == True)
+            )
+            table = {
+                row.plan_code: {
+                    'monthly_price': float(row.monthly_price),
+                    'currency': row.currency,
+                    'trial_days': row.trial_days if row.has_trial else 0
+                }
+                for row in rows
+            }
+            if shared:
+                cache.set(_PRICING_CACHE_KEY, table, timeout=PLAN_CACHE_TIMEOUT)
+        return table
+    
     @classmethod
     def calculate_monthly_price(cls, plan, subscription_months=1):
         """Calculate monthly price for a subscription period"""
@@ -310,12 +384,32 @@ class SubscriptionService:
             return 10
         return 0
     
+    @classmethod
+    def get_visible_plans(cls):
+        """SubscriptionPlan.to_dict() of the active, visible plans in display order, cached"""
+        plans = cache.get(_VISIBLE_PLANS_CACHE_KEY)
+        if plans is None:
+            plans = [plan.to_dict() for plan in cls._query_visible_plans()]
+            cache.set(_VISIBLE_PLANS_CACHE_KEY, plans, timeout=PLAN_CACHE_TIMEOUT)
+        return plans
+    
+    @staticmethod
+    def invalidate_plan_cache():
+        """Drop the cached plan lists"""
+        cache.delete_many(_ALL_PLANS_CACHE_KEY, _VISIBLE_PLANS_CACHE_KEY, _PRICING_CACHE_KEY)
+    
+    @staticmethod
+    def _query_visible_plans():
+        return SubscriptionPlan.query.filter_by(is_active=True, is_visible=True).order_by(SubscriptionPlan.display_order).all()
+    
     @classmethod
     def get_all_plans(cls):
-        """Get all available plans from database"""
-        from ..models import SubscriptionPlan
+        """Get all available plans from database, cached until a plan is written"""
+        cached = cache.get(_ALL_PLANS_CACHE_KEY)
+        if cached is not None:
+            return cached
         
-        plans = SubscriptionPlan.query.filter_by(is_active=True, is_visible=True).order_by(SubscriptionPlan.display_order).all()
+        plans = cls._query_visible_plans()
         
         result = []
         for plan in plans:
@@ -349,6 +443,7 @@ class SubscriptionService:
                 'badge_color': plan.badge_color
             })
         
+        cache.set(_ALL_PLANS_CACHE_KEY, result, timeout=PLAN_CACHE_TIMEOUT)
         return result
     
     @classmethod
@@ -660,6 +755,59 @@ class SubscriptionService:
             status='active'
         ).order_by(Subscription.created_at.desc()).first()
         
+        return cls._status_dict(subscription, cls.get_plan_limits)
+    
+    @classmethod
+    def get_usage_stats(cls, business_id):
+        """Get current usage stats compared to plan limits"""
+        business = Business.query.get(business_id)
+        if not business:
+            return None
+        
+        return cls._usage_dict(business_id, cls.get_plan_limits(business.subscription_plan))
+    
+    @classmethod
+    def get_dashboard_bundle(cls, business_id):
+        """
+        Subscription status and usage stats for the billing dashboard, cached per business
+        
+        Returns:
+            dict: {'subscription': ..., 'usage': ...} shaped like get_subscription_status
+            and get_usage_stats, or None if the business does not exist
+        """
+        cache_key = _dashboard_cache_key(business_id)
+        bundle = cache.get(cache_key)
+        if bundle is not None:
+            return bundle
+        
+        # Business and its latest active subscription in one round-trip
+        row = db.session.execute(
+            select(Business, Subscription)
+            .outerjoin(Subscription, and_(Subscription.business_id == Business.id, Subscription.status == 'active'))
+            .where(Business.id == business_id)
+            .order_by(Subscription.created_at.desc())
+            .limit(1)
+        ).first()
+        if row is None:
+            return None
+        business, subscription = row
+        
+        # Subscription plan and business plan normally match; look each up once
+        limits_by_plan = {}
+        def plan_limits(plan):
+            if plan not in limits_by_plan:
+                limits_by_plan[plan] = cls.get_plan_limits(plan)
+            return limits_by_plan[plan]
+        
+        bundle = {
+            'subscription': cls._status_dict(subscription, plan_limits),
+            'usage': cls._usage_dict(business_id, plan_limits(business.subscription_plan))
+        }
+        cache.set(cache_key, bundle, timeout=DASHBOARD_CACHE_TIMEOUT)
+        return bundle
+    
+    @staticmethod
+    def _status_dict(subscription, plan_limits):
         if not subscription:
             return {
                 'has_subscription': False,
@@ -678,30 +826,26 @@ class SubscriptionService:
             'currency': subscription.currency,
             'billing_cycle': subscription.billing_cycle,
             'days_until_renewal': subscription.days_until_renewal(),
-            'limits': cls.get_plan_limits(subscription.plan)
+            'limits': plan_limits(subscription.plan)
         }
     
-    @classmethod
-    def get_usage_stats(cls, business_id):
-        """Get current usage stats compared to plan limits"""
-        business = Business.query.get(business_id)
-        if not business:
-            return None
-        
-        limits = cls.get_plan_limits(business.subscription_plan)
-        
+    @staticmethod
+    def _usage_dict(business_id, limits):
         # Get current usage
         from ..models import MenuItem, Sale
         
-        user_count = User.query.filter_by(business_id=business_id).count()
-        menu_item_count = MenuItem.query.filter_by(business_id=business_id).count()
-        
         # Monthly sales
         first_day = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_sales = Sale.query.filter(
-            Sale.business_id == business_id,
-            Sale.created_at >= first_day
-        ).count()
+        
+        # All three counts in one statement
+        user_count, menu_item_count, monthly_sales = db.session.execute(select(
+            select(func.count(User.id)).where(User.business_id == business_id).scalar_subquery(),
+            select(func.count(MenuItem.id)).where(MenuItem.business_id == business_id).scalar_subquery(),
+            select(func.count(Sale.id)).where(
+                Sale.business_id == business_id,
+                Sale.created_at >= first_day
+            ).scalar_subquery()
+        )).one()
         
         return {
             'users': {
@@ -7,6 +7,7 @@ import secrets
 import string
 from datetime import datetime, timezone
 from flask import current_app
+from sqlalchemy import exists, select
 from ..extensions import db
 from ..models import Business, User, SystemSetting
 
@@ -31,20 +32,23 @@ class TenantService:
             dict: Created business and user information
         """
         try:
-            # Check if business name already exists (current or historical)
+            # Check business name (current or historical) and email in one round-trip
             from ..models import BusinessNameHistory
-            existing_business = Business.query.filter_by(business_name=business_name).first()
-            if existing_business:
+            taken = db.session.execute(select(
+                exists().where(Business.business_name == business_name).label('business'),
+                exists().where(BusinessNameHistory.business_name == business_name).label('history'),
+                exists().where(User.email == owner_email).label('email')
+            )).one()
+            
+            if taken.business:
                 raise ValueError(f"Business name '{business_name}' is already registered")
             
             # Check if name was used before by any business
-            historical_name = BusinessNameHistory.query.filter_by(business_name=business_name).first()
-            if historical_name:
+            if taken.history:
                 raise ValueError(f"Business name '{business_name}' was previously used and cannot be reused")
             
             # Check if email already exists
-            existing_user = User.query.filter_by(email=owner_email).first()
-            if existing_user:
+            if taken.email:
                 raise ValueError(f"Email '{owner_email}' already registered")
             
             # Get plan details from SubscriptionPlan table
@@ -236,8 +240,7 @@ class TenantService:
         while True:
             employee_id = f"{base_id}{counter:03d}"
             # Check if this employee_id exists in any business (global uniqueness)
-            existing = User.query.filter_by(employee_id=employee_id).first()
-            if not existing:
+            if not db.session.query(exists().where(User.employee_id == employee_id)).scalar():
                 return employee_id
             counter += 1
             
@@ -6,11 +6,22 @@ Supports multiple SMS providers: MSG91, TextLocal, Fast2SMS
 import secrets
 import string
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from flask import current_app
 from flask_mail import Message
 from ..extensions import mail, cache
 
+# Threads for the SMS half of send_both_codes_async (the email is sent on the
+# request thread). Each request submits one send, so the pool is sized above
+# gunicorn's request threads per worker (--threads 4) and never queues a
+# request's SMS behind other requests' sends.
+_sms_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='verification-sms')
+
+def _run_in_app(app, func, *args):
+    # Senders read config and Flask-Mail state, so each worker needs an app context
+    with app.app_context():
+        return func(*args)
 
 class VerificationService:
     """Service for managing verification codes"""
@@ -529,20 +540,8 @@ class VerificationService:
             return {'success': False, 'message': f'Fast2SMS exception: {str(e)}'}
     
     @staticmethod
-    def verify_email_code(email, code):
-        """
-        Verify email verification code
-        
-        Args:
-            email (str): Email address
-            code (str): Code to verify
-            
-        Returns:
-            dict: Result with success status
-        """
-        cache_key = VerificationService._get_cache_key(email, 'email')
-        stored_code = cache.get(cache_key)
-        
+    def _check_code(stored_code, code, success_message):
+        """Compare a submitted code with the stored one"""
         if not stored_code:
             return {
                 'success': False,
@@ -555,14 +554,32 @@ class VerificationService:
                 'message': 'Invalid verification code. Please try again.'
             }
         
-        # Code is valid - remove it from cache
-        cache.delete(cache_key)
-        
         return {
             'success': True,
-            'message': 'Email verification successful!'
+            'message': success_message
         }
     
+    @staticmethod
+    def verify_email_code(email, code):
+        """
+        Verify email verification code
+        
+        Args:
+            email (str): Email address
+            code (str): Code to verify
+            
+        Returns:
+            dict: Result with success status
+        """
+        cache_key = VerificationService._get_cache_key(email, 'email')
+        result = VerificationService._check_code(cache.get(cache_key), code, 'Email verification successful!')
+        
+        if result['success']:
+            # Code is valid - remove it from cache
+            cache.delete(cache_key)
+        
+        return result
+    
     @staticmethod
     def verify_sms_code(phone_number, code):
         """
@@ -576,27 +593,13 @@ class VerificationService:
             dict: Result with success status
         """
         cache_key = VerificationService._get_cache_key(phone_number, 'sms')
-        stored_code = cache.get(cache_key)
+        result = VerificationService._check_code(cache.get(cache_key), code, 'Mobile verification successful!')
         
-        if not stored_code:
-            return {
-                'success': False,
-                'message': 'Code expired or not found. Please request a new code.'
-            }
-        
-        if stored_code != code:
-            return {
-                'success': False,
-                'message': 'Invalid verification code. Please try again.'
-            }
-        
-        # Code is valid - remove it from cache
-        cache.delete(cache_key)
+        if result['success']:
+            # Code is valid - remove it from cache
+            cache.delete(cache_key)
         
-        return {
-            'success': True,
-            'message': 'Mobile verification successful!'
-        }
+        return result
     
     @staticmethod
     def send_both_codes(email, phone_number, business_name=None):
@@ -620,6 +623,28 @@ class VerificationService:
             'both_sent': email_result['success'] and sms_result['success']
         }
     
+    @staticmethod
+    def send_both_codes_async(email, phone_number, business_name=None):
+        """
+        Send verification codes to both email and phone concurrently
+        
+        SMTP and the SMS provider are independent network calls, so the request
+        waits for the slower of the two instead of their sum.
+        
+        Returns:
+            dict: Same shape as send_both_codes
+        """
+        app = current_app._get_current_object()
+        sms_future = _sms_executor.submit(_run_in_app, app, VerificationService.send_sms_code, phone_number, business_name)
+        email_result = VerificationService.send_email_code(email, business_name)
+        sms_result = sms_future.result()
+        
+        return {
+            'email': email_result,
+            'sms': sms_result,
+            'both_sent': email_result['success'] and sms_result['success']
+        }
+    
     @staticmethod
     def verify_both_codes(email, phone_number, email_code, sms_code):
         """
@@ -634,8 +659,18 @@ class VerificationService:
         Returns:
             dict: Verification results
         """
-        email_result = VerificationService.verify_email_code(email, email_code)
-        sms_result = VerificationService.verify_sms_code(phone_number, sms_code)
+        email_key = VerificationService._get_cache_key(email, 'email')
+        sms_key = VerificationService._get_cache_key(phone_number, 'sms')
+        # One MGET round-trip on Redis instead of two GETs
+        stored_email_code, stored_sms_code = cache.get_many(email_key, sms_key)
+        
+        email_result = VerificationService._check_code(stored_email_code, email_code, 'Email verification successful!')
+        sms_result = VerificationService._check_code(stored_sms_code, sms_code, 'Mobile verification successful!')
+        
+        # Valid codes are single-use
+        used_keys = [key for key, result in ((email_key, email_result), (sms_key, sms_result)) if result['success']]
+        if used_keys:
+            cache.delete_many(*used_keys)
         
         return {
             'email_verified': email_result['success'],
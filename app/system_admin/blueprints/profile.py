@@ -10,6 +10,7 @@ from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from PIL import Image
 from ...extensions import db
+from ...blueprints.profile import release_profile_picture
 from ..decorators import system_admin_api_required
 
 bp = Blueprint('system_admin_profile', __name__, url_prefix='/system-admin/profile')
@@ -26,14 +27,14 @@ def resize_image(image_path, max_size=(300, 300)):
     """Resize image to maximum dimensions while maintaining aspect ratio"""
     try:
         with Image.open(image_path) as img:
+            # Resize image first, so the alpha flattening works on the small copy
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            
             # Convert RGBA to RGB if necessary
             if img.mode in ('RGBA', 'LA'):
                 background = Image.new('RGB', img.size, (255, 255, 255))
                 background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
                 img = background
-            
-            # Resize image
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
             img.save(image_path, 'JPEG', quality=85, optimize=True)
             return True
     except Exception as e:
@@ -77,33 +78,31 @@ def upload_profile_picture():
         unique_filename = f"{current_user.id}_{uuid.uuid4().hex}.{file_extension}"
         file_path = os.path.join(upload_dir, unique_filename)
         
-        # Save file
-        file.save(file_path)
+        # Save file next to its final path, so the processed image is moved in
+        # with an atomic rename and a partly written file is never served
+        temp_path = os.path.join(upload_dir, f"temp_{unique_filename}")
+        file.save(temp_path)
         
         # Resize image
-        if not resize_image(file_path):
+        if not resize_image(temp_path):
             # If resize fails, remove the file and return error
             try:
-                os.remove(file_path)
+                os.remove(temp_path)
             except:
                 pass
             return jsonify({'error': 'Failed to process image'}), 500
         
-        # Remove old profile picture if exists
-        if current_user.profile_picture:
-            old_file_path = os.path.join(current_app.static_folder, 'uploads', 'profiles', 
-                                       os.path.basename(current_user.profile_picture))
-            try:
-                if os.path.exists(old_file_path):
-                    os.remove(old_file_path)
-            except:
-                pass  # Ignore errors when removing old file
+        os.replace(temp_path, file_path)
         
         # Update user profile picture in database
+        previous_picture = current_user.profile_picture
         profile_picture_url = f"/static/uploads/profiles/{unique_filename}"
         current_user.profile_picture = profile_picture_url
         db.session.commit()
         
+        # Remove old profile picture unless another user shares it
+        release_profile_picture(previous_picture)
+        
         return jsonify({
             'success': True,
             'message': 'Profile picture updated successfully',
@@ -389,7 +389,10 @@ def get_all_invoices():
         per_page = request.args.get('per_page', 25, type=int)
         status_filter = request.args.get('status', '', type=str)
         
-        query = Invoice.query
+        # Business name joined in, instead of one Business lookup per invoice
+        query = Invoice.query.with_entities(
+            *Invoice.list_columns(), Business.business_name
+        ).outerjoin(Business, Business.id == Invoice.business_id)
         
         if status_filter:
             query = query.filter(Invoice.payment_status == status_filter)
@@ -399,16 +402,9 @@ def get_all_invoices():
         )
         
         invoice_list = []
-        for invoice in invoices.items:
-            business = Business.query.get(invoice.business_id)
-            invoice_data = invoice.to_dict() if hasattr(invoice, 'to_dict') else {
-                'id': invoice.id,
-                'invoice_number': invoice.invoice_number,
-                'amount': float(invoice.total_amount),
-                'status': invoice.payment_status,
-                'due_date': invoice.due_date.isoformat()
-            }
-            invoice_data['business_name'] = business.business_name if business else 'Unknown'
+        for row in invoices.items:
+            invoice_data = Invoice.row_to_dict(row)
+            invoice_data['business_name'] = row.business_name or 'Unknown'
             invoice_list.append(invoice_data)
         
         return jsonify({
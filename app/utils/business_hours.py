@@ -2,6 +2,22 @@
 Business hours utility functions for managing opening/closing times and new day logic
 """
 from datetime import datetime, time, timedelta
+from functools import wraps
+from flask import g, has_request_context
+
+def request_cached(func):
+    """Memoize a helper on flask.g so repeated calls within one request are computed once"""
+    @wraps(func)
+    def wrapper(*args):
+        if not has_request_context():
+            return func(*args)
+        
+        cache = g.setdefault('_business_hours_cache', {})
+        key = (func.__name__,) + args
+        if key not in cache:
+            cache[key] = func(*args)
+        return cache[key]
+    return wrapper
 
 def get_business_hours():
     """Get the configured business opening and closing times"""
@@ -16,6 +32,7 @@ def get_business_hours():
     
     return opening_time, closing_time
 
+@request_cached
 def get_new_day_start_time():
     """Get the configured new day start time"""
     from app.models import SystemSetting
@@ -48,6 +65,7 @@ def is_business_open(check_time=None):
         # Normal operating hours within same day
         return opening_time <= current_time <= closing_time
 
+@request_cached
 def get_business_day(check_datetime=None):
     """
     Get the business day for a given datetime based on new_day_start_time
@@ -77,6 +95,7 @@ def get_business_day(check_datetime=None):
     
     return business_day
 
+@request_cached
 def get_business_day_range(business_date):
     """
     Get the datetime range for a specific business day
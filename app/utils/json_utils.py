@@ -0,0 +1,164 @@
+"""
+Fast JSON response helpers (orjson when installed, Flask's jsonify otherwise)
+"""
+import json
+from flask import current_app, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Streamed JSON arrays are sent in chunks of about this many bytes
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+
+def json_response(payload, status=200):
+    """
+    Serialize a payload of plain JSON types into a JSON response
+    
+    Only use for payloads built from dict/list/str/int/float/bool/None:
+    orjson does not apply Flask's Decimal and date conversions.
+    
+    Args:
+        payload: Data to serialize
+        status: HTTP status code
+    
+    Returns:
+        Response: application/json response
+    """
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    
+    return current_app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+def _dumps(obj):
+    """Encode a plain-JSON value to bytes"""
+    if orjson is None:
+        return json.dumps(obj, separators=(',', ':')).encode()
+    return orjson.dumps(obj)
+
+def json_list_response(key, rows, serialize, extra=None, status=200):
+    """
+    Build {key: [serialize(row), ...], **extra} encoding one row at a time
+    
+    Each row's dict is encoded and dropped before the next is built, so the
+    full list of dicts is never held alongside its encoded body. Rows are
+    encoded here rather than in a streamed generator because after_request
+    hooks commit the session (expiring every row) before a stream is read.
+    The same plain-JSON-types rule as json_response applies.
+    
+    Args:
+        key: Name of the list member
+        rows: Rows to serialize (e.g. ORM objects of the current page)
+        serialize: Callable turning one row into a dict
+        extra: Other top-level members (totals, pagination, ...)
+        status: HTTP status code
+    
+    Returns:
+        Response: application/json response
+    """
+    parts = [b'{', _dumps(key), b':[']
+    for index, row in enumerate(rows):
+        if index:
+            parts.append(b',')
+        parts.append(_dumps(serialize(row)))
+    parts.append(b']')
+    for name, value in (extra or {}).items():
+        parts += [b',', _dumps(name), b':', _dumps(value)]
+    parts.append(b'}')
+    
+    return current_app.response_class(b''.join(parts), status=status, mimetype='application/json')
+
+def json_stream_response(rows, serialize, status=200):
+    """
+    Stream [serialize(row), ...] as a JSON array while rows are read
+    
+    At most about JSON_STREAM_CHUNK_SIZE of encoded output is buffered, so
+    memory stays flat however many rows the export covers. Pass column rows
+    (not ORM objects): after_request hooks commit the session before the body
+    is read, which would expire entities mid-stream. The same plain-JSON-types
+    rule as json_response applies.
+    
+    Args:
+        rows: Lazy iterable of rows (a generator, so its query only runs once
+            the response body is read, inside the kept request context)
+        serialize: Callable turning one row into a dict
+        status: HTTP status code
+    
+    Returns:
+        Response: Streaming application/json response
+    """
+    def generate():
+        buffer = bytearray(b'[')
+        for index, row in enumerate(rows):
+            if index:
+                buffer += b','
+            buffer += _dumps(serialize(row))
+            if len(buffer) >= JSON_STREAM_CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b']'
+        yield bytes(buffer)
+    
+    return current_app.response_class(stream_with_context(generate()), status=status, mimetype='application/json')
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson while keeping Flask's output
+    
+    Dates, Decimals and __html__ objects still go through DefaultJSONProvider's
+    default() (HTTP dates, Decimal as string), and keys stay sorted, so jsonify()
+    responses carry the same values. Anything orjson cannot encode, or calls with
+    custom json.dumps arguments, fall back to the stdlib encoder.
+    """
+    
+    def _orjson_options(self, sort_keys, indent=False):
+        """orjson option flags matching the requested json.dumps settings"""
+        options = orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+    
+    def _orjson_dumps(self, obj, **kwargs):
+        """Encode with orjson, or return None to use the stdlib encoder"""
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', (',', ':'))
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)  # Jinja's tojson passes sort_keys
+        if kwargs or separators != (',', ':') or indent not in (None, 2):
+            return None
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(sort_keys, indent=indent == 2))
+        except TypeError:
+            return None  # e.g. non-str dict keys or out-of-range ints
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            encoded = self._orjson_dumps(obj, **kwargs)
+            if encoded is not None:
+                return encoded.decode()
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass  # Let the stdlib raise its usual error (or accept NaN etc.)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._orjson_options(self.sort_keys, indent=indent))
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
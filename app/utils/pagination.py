@@ -0,0 +1,96 @@
+"""
+Pagination helpers for list APIs
+
+Keyset (seek) pages are addressed by an opaque cursor holding the sort-key
+values of the last row served, so fetching page N costs the same as fetching
+page 1 and no COUNT(*) is needed.
+"""
+import json
+import math
+import base64
+import binascii
+from datetime import date, datetime
+from sqlalchemy import tuple_
+
+MAX_PER_PAGE = 1000  # Largest page served; the inventory page asks for 1000 items at once
+
+def encode_cursor(values):
+    """Encode sort-key values into an opaque URL-safe cursor string"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor back into values typed for the given columns
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw_values, list) or len(raw_values) != len(columns):
+            raise ValueError('Invalid cursor')
+        
+        values = []
+        for value, column in zip(raw_values, columns):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif value is None or isinstance(value, (bool, list, dict)):
+                raise ValueError('Invalid cursor')
+            else:
+                # Typed here so a bad value is a 400, not a database type error
+                value = python_type(value)
+            values.append(value)
+        return values
+    except (TypeError, ValueError, ArithmeticError, NotImplementedError, binascii.Error, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+def keyset_paginate(query, columns, cursor=None, per_page=50):
+    """
+    Seek-paginate a query in descending order of `columns`
+    
+    The last column must be unique (normally the primary key) so the order is total.
+    
+    Args:
+        query: SQLAlchemy query (ORM entities or labelled column rows)
+        columns: Sort-key columns, e.g. [Expense.incurred_at, Expense.id]
+        cursor: Cursor returned with the previous page (None for the first page)
+        per_page: Page size, clamped to 1..MAX_PER_PAGE
+    
+    Returns:
+        tuple: (rows, next_cursor) - next_cursor is None on the last page
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    
+    if cursor:
+        query = query.filter(tuple_(*columns) < tuple_(*decode_cursor(cursor, columns)))
+    
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        return rows, None
+    
+    rows = rows[:per_page]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+def page_info(page, per_page, total):
+    """
+    Page metadata for an OFFSET page whose total is already known
+    
+    Mirrors the fields of Flask-SQLAlchemy's Pagination, for endpoints that
+    get the total from an aggregate or COUNT(*) OVER () instead of paginate().
+    """
+    pages = math.ceil(total / per_page) if total else 0
+    return {
+        'total': total,
+        'pages': pages,
+        'has_prev': page > 1,
+        'has_next': page < pages,
+        'prev_num': page - 1 if page > 1 else None,
+        'next_num': page + 1 if page < pages else None
+    }
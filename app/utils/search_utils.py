@@ -0,0 +1,22 @@
+"""
+Helpers for user-supplied LIKE/ILIKE search terms
+"""
+
+LIKE_ESCAPE = '\\'
+
+def contains_pattern(term):
+    """
+    Build a '%term%' pattern with LIKE wildcards in the term escaped
+    
+    Use with column.ilike(pattern, escape=LIKE_ESCAPE) so a user typing '%' or '_'
+    matches those characters literally instead of widening the scan. Unanchored
+    ILIKE patterns are served by the pg_trgm GIN indexes on PostgreSQL.
+    
+    Args:
+        term: Raw search text
+    
+    Returns:
+        str: Escaped pattern
+    """
+    escaped = term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace('%', LIKE_ESCAPE + '%').replace('_', LIKE_ESCAPE + '_')
+    return f'%{escaped}%'
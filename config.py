@@ -26,6 +26,13 @@ class Config:
         SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(instance_dir, "erp.db")}'
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        # Larger compiled-statement cache so the hot aggregate queries stay compiled
+        'query_cache_size': int(os.environ.get('SQLALCHEMY_QUERY_CACHE_SIZE') or 1200),
+    }
+    
+    # Run independent finance aggregates on parallel connections (needs spare pool capacity)
+    FINANCE_PARALLEL_AGGREGATES = os.environ.get('FINANCE_PARALLEL_AGGREGATES', 'false').lower() == 'true'
     
     # ERP Configuration
     ERP_NAME = os.environ.get('ERP_NAME') or 'TSG Cafe ERP'
@@ -80,6 +87,9 @@ class Config:
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
     
+    # Audit log: write in background batches (set to 'false' for synchronous writes)
+    AUDIT_LOG_ASYNC = os.environ.get('AUDIT_LOG_ASYNC', 'true').lower() == 'true'
+    
     # Logging
     LOG_TO_STDOUT = os.environ.get('LOG_TO_STDOUT')
 
@@ -0,0 +1,26 @@
+"""add_expense_list_index
+
+Revision ID: 20261016090000
+Revises: 5d69d6a621a9
+Create Date: 2026-10-16 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016090000'
+down_revision = '5d69d6a621a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Composite index backing the keyset-paginated expense list (filter by category, seek on incurred_at, id)
+    op.create_index('ix_expenses_business_category_incurred', 'expenses',
+                    ['business_id', 'category', 'incurred_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_expenses_business_category_incurred', table_name='expenses')
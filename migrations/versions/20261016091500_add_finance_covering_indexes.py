@@ -0,0 +1,34 @@
+"""add_finance_covering_indexes
+
+Revision ID: 20261016091500
+Revises: 20261016090000
+Create Date: 2026-10-16 09:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016091500'
+down_revision = '20261016090000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covering indexes for the finance summary / daily closing sums.
+    # INCLUDE and partial WHERE are PostgreSQL-only; other databases get a plain composite index.
+    op.create_index('ix_sales_finance_cover', 'sales', ['business_id', 'created_at'], unique=False,
+                    postgresql_include=['total', 'payment_method'],
+                    postgresql_where=~sa.column('invoice_no').like('%-PAY-%'))
+    op.create_index('ix_credit_payments_finance_cover', 'credit_payments', ['business_id', 'payment_date'], unique=False,
+                    postgresql_include=['payment_amount'])
+    op.create_index('ix_expenses_finance_cover', 'expenses', ['business_id', 'incurred_at'], unique=False,
+                    postgresql_include=['amount'])
+
+
+def downgrade():
+    op.drop_index('ix_expenses_finance_cover', table_name='expenses')
+    op.drop_index('ix_credit_payments_finance_cover', table_name='credit_payments')
+    op.drop_index('ix_sales_finance_cover', table_name='sales')
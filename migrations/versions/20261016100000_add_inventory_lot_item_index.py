@@ -0,0 +1,27 @@
+"""add_inventory_lot_item_index
+
+Revision ID: 20261016100000
+Revises: 20261016091500
+Create Date: 2026-10-16 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016100000'
+down_revision = '20261016091500'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covering index for the per-item stock subqueries in the inventory list.
+    # INCLUDE is PostgreSQL-only; other databases get a plain index on item_id.
+    op.create_index('ix_inventory_lots_item_cover', 'inventory_lots', ['item_id'], unique=False,
+                    postgresql_include=['qty_on_hand', 'unit_cost'])
+
+
+def downgrade():
+    op.drop_index('ix_inventory_lots_item_cover', table_name='inventory_lots')
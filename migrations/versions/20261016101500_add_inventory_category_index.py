@@ -0,0 +1,27 @@
+"""add_inventory_category_index
+
+Revision ID: 20261016101500
+Revises: 20261016100000
+Create Date: 2026-10-16 10:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016101500'
+down_revision = '20261016100000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Partial index for the DISTINCT category lookup over active inventory items.
+    # The WHERE clause is PostgreSQL-only; other databases get a plain index on category.
+    op.create_index('ix_inventory_items_active_category', 'inventory_items', ['category'], unique=False,
+                    postgresql_where=sa.column('is_active'))
+
+
+def downgrade():
+    op.drop_index('ix_inventory_items_active_category', table_name='inventory_items')
@@ -0,0 +1,47 @@
+"""add_list_and_search_indexes
+
+Revision ID: 20261016103000
+Revises: 20261016101500
+Create Date: 2026-10-16 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016103000'
+down_revision = '20261016101500'
+branch_labels = None
+depends_on = None
+
+# Trigram indexes serving the ILIKE '%q%' searches (PostgreSQL only)
+TRGM_INDEXES = [
+    ('ix_inventory_items_name_trgm', 'inventory_items', 'name'),
+    ('ix_inventory_items_sku_trgm', 'inventory_items', 'sku'),
+    ('ix_menu_items_name_trgm', 'menu_items', 'name'),
+]
+
+
+def upgrade():
+    # Composite indexes so the paginated lists scan in index order instead of sorting
+    op.create_index('ix_inventory_items_business_created', 'inventory_items', ['business_id', 'created_at'], unique=False)
+    op.create_index('ix_menu_items_business_id_id', 'menu_items', ['business_id', 'id'], unique=False)
+    op.create_index('ix_purchase_orders_business_id_id', 'purchase_orders', ['business_id', 'id'], unique=False)
+    
+    # Not declared on the models: db.create_all() would fail where pg_trgm is not installed
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index_name, table_name, column_name in TRGM_INDEXES:
+            op.create_index(index_name, table_name, [column_name], unique=False,
+                            postgresql_using='gin', postgresql_ops={column_name: 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for index_name, table_name, column_name in reversed(TRGM_INDEXES):
+            op.drop_index(index_name, table_name=table_name)
+    
+    op.drop_index('ix_purchase_orders_business_id_id', table_name='purchase_orders')
+    op.drop_index('ix_menu_items_business_id_id', table_name='menu_items')
+    op.drop_index('ix_inventory_items_business_created', table_name='inventory_items')
@@ -0,0 +1,27 @@
+"""add_sku_lookup_indexes
+
+Revision ID: 20261016104500
+Revises: 20261016103000
+Create Date: 2026-10-16 10:45:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016104500'
+down_revision = '20261016103000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Highest-SKU-per-business lookups used when generating the next SKU
+    op.create_index('ix_menu_items_business_sku', 'menu_items', ['business_id', 'sku'], unique=False)
+    op.create_index('ix_inventory_items_business_sku', 'inventory_items', ['business_id', 'sku'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_items_business_sku', table_name='inventory_items')
+    op.drop_index('ix_menu_items_business_sku', table_name='menu_items')
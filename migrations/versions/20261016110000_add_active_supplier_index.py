@@ -0,0 +1,27 @@
+"""add_active_supplier_index
+
+Revision ID: 20261016110000
+Revises: 20261016104500
+Create Date: 2026-10-16 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016110000'
+down_revision = '20261016104500'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Partial index for the active supplier list.
+    # The WHERE clause is PostgreSQL-only; other databases get a plain index on business_id.
+    op.create_index('ix_suppliers_business_active', 'suppliers', ['business_id'], unique=False,
+                    postgresql_where=sa.column('is_active'))
+
+
+def downgrade():
+    op.drop_index('ix_suppliers_business_active', table_name='suppliers')
@@ -0,0 +1,75 @@
+"""add_sale_invoice_unique_constraint
+
+Revision ID: 20261016111500
+Revises: 20261016110000
+Create Date: 2026-10-16 11:15:00
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016111500'
+down_revision = '20261016110000'
+branch_labels = None
+depends_on = None
+
+
+# Regular sale numbers: YYMMDD-NN (local date plus a per-business daily sequence)
+SEQUENCE_INVOICE_RE = re.compile(r'([0-9]{6})-([0-9]+)')
+
+
+def renumber_duplicate_invoices(conn):
+    """
+    Give every duplicate (business_id, invoice_no) but the oldest a free number
+    
+    The old check-then-insert checkout could race and store the same number
+    twice. Regular numbers move to the next free sequence number of their day,
+    so the numbering query's integer cast keeps working; anything else (payment
+    records, legacy formats) gets its row id appended.
+    """
+    duplicates = conn.execute(sa.text(
+        'SELECT s.id, s.business_id, s.invoice_no FROM sales s '
+        'WHERE EXISTS (SELECT 1 FROM sales o WHERE o.business_id = s.business_id '
+        'AND o.invoice_no = s.invoice_no AND o.id < s.id) ORDER BY s.id'
+    )).fetchall()
+    
+    next_sequence = {}  # (business_id, date part) -> next free sequence number
+    for sale_id, business_id, invoice_no in duplicates:
+        match = SEQUENCE_INVOICE_RE.fullmatch(invoice_no)
+        if match:
+            date_part = match.group(1)
+            key = (business_id, date_part)
+            if key not in next_sequence:
+                taken = conn.execute(
+                    sa.text('SELECT invoice_no FROM sales WHERE business_id = :biz AND invoice_no LIKE :prefix'),
+                    {'biz': business_id, 'prefix': f'{date_part}-%'}
+                ).scalars()
+                next_sequence[key] = max(
+                    (int(m.group(2)) for m in map(SEQUENCE_INVOICE_RE.fullmatch, taken) if m), default=0
+                ) + 1
+            new_invoice_no = f'{date_part}-{next_sequence[key]:02d}'
+            next_sequence[key] += 1
+        else:
+            new_invoice_no = f'{invoice_no}-{sale_id}'
+        
+        conn.execute(
+            sa.text('UPDATE sales SET invoice_no = :invoice_no WHERE id = :id'),
+            {'invoice_no': new_invoice_no, 'id': sale_id}
+        )
+
+
+def upgrade():
+    renumber_duplicate_invoices(op.get_bind())
+    
+    # Invoice numbers are unique per business; checkout relies on this to
+    # detect numbers taken by a concurrent sale.
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_sales_business_invoice', ['business_id', 'invoice_no'])
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_sales_business_invoice', type_='unique')
@@ -0,0 +1,55 @@
+"""add_sale_payment_flag_and_search_indexes
+
+Revision ID: 20261016113000
+Revises: 20261016111500
+Create Date: 2026-10-16 11:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016113000'
+down_revision = '20261016111500'
+branch_labels = None
+depends_on = None
+
+# Trigram indexes serving the sales list ILIKE '%q%' search (PostgreSQL only)
+TRGM_INDEXES = [
+    ('ix_sales_invoice_no_trgm', 'invoice_no'),
+    ('ix_sales_customer_name_trgm', 'customer_name'),
+    ('ix_sales_customer_phone_trgm', 'customer_phone'),
+]
+
+
+def upgrade():
+    # Flag credit payment tracking rows so lists can filter on a column
+    # instead of NOT LIKE '%-PAY-%'
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_payment_record', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.create_index(batch_op.f('ix_sales_is_payment_record'), ['is_payment_record'], unique=False)
+    
+    sales = sa.table('sales', sa.column('invoice_no', sa.String), sa.column('is_payment_record', sa.Boolean))
+    op.execute(
+        sales.update()
+        .where(sales.c.invoice_no.like('%-PAY-%'))
+        .values(is_payment_record=sa.true())
+    )
+    
+    # Not declared on the model: db.create_all() would fail where pg_trgm is not installed
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index_name, column_name in TRGM_INDEXES:
+            op.create_index(index_name, 'sales', [column_name], unique=False,
+                            postgresql_using='gin', postgresql_ops={column_name: 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for index_name, column_name in reversed(TRGM_INDEXES):
+            op.drop_index(index_name, table_name='sales')
+    
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sales_is_payment_record'))
+        batch_op.drop_column('is_payment_record')
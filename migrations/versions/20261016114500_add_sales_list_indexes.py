@@ -0,0 +1,27 @@
+"""add_sales_list_indexes
+
+Revision ID: 20261016114500
+Revises: 20261016113000
+Create Date: 2026-10-16 11:45:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016114500'
+down_revision = '20261016113000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Composite indexes so the paginated sales and credit sales lists scan in index order
+    op.create_index('ix_sales_business_payment_created', 'sales', ['business_id', 'is_payment_record', 'created_at'], unique=False)
+    op.create_index('ix_credit_sales_business_date', 'credit_sales', ['business_id', 'credit_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_credit_sales_business_date', table_name='credit_sales')
+    op.drop_index('ix_sales_business_payment_created', table_name='sales')
@@ -0,0 +1,25 @@
+"""add_sale_lines_sale_item_index
+
+Revision ID: 20261016120000
+Revises: 20261016114500
+Create Date: 2026-10-16 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016120000'
+down_revision = '20261016114500'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sale lines are read by sale and grouped by item (top items report)
+    op.create_index('ix_sale_lines_sale_item', 'sale_lines', ['sale_id', 'item_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sale_lines_sale_item', table_name='sale_lines')
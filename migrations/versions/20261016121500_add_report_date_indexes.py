@@ -0,0 +1,34 @@
+"""add_report_date_indexes
+
+Revision ID: 20261016121500
+Revises: 20261016120000
+Create Date: 2026-10-16 12:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016121500'
+down_revision = '20261016120000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Expression indexes on the report date buckets, so filtering and grouping on
+    # date(...) can use them. INCLUDE and partial WHERE are PostgreSQL-only.
+    op.create_index('ix_sales_report_date', 'sales', ['business_id', sa.text('date(created_at)')], unique=False,
+                    postgresql_include=['total', 'payment_method'],
+                    postgresql_where=~sa.column('invoice_no').like('%-PAY-%'))
+    op.create_index('ix_credit_payments_report_date', 'credit_payments', ['business_id', sa.text('date(payment_date)')], unique=False,
+                    postgresql_include=['payment_amount'])
+    op.create_index('ix_expenses_report_date', 'expenses', ['business_id', sa.text('date(incurred_at)')], unique=False,
+                    postgresql_include=['category', 'amount'])
+
+
+def downgrade():
+    op.drop_index('ix_expenses_report_date', table_name='expenses')
+    op.drop_index('ix_credit_payments_report_date', table_name='credit_payments')
+    op.drop_index('ix_sales_report_date', table_name='sales')
@@ -0,0 +1,40 @@
+"""use_payment_flag_in_partial_sales_indexes
+
+Revision ID: 20261016123000
+Revises: 20261016121500
+Create Date: 2026-10-16 12:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016123000'
+down_revision = '20261016121500'
+branch_labels = None
+depends_on = None
+
+
+def _recreate_sales_partial_indexes(predicate):
+    # Only the partial WHERE changes, and it is PostgreSQL-only; other databases
+    # just get the same plain index back.
+    op.drop_index('ix_sales_report_date', table_name='sales')
+    op.drop_index('ix_sales_finance_cover', table_name='sales')
+    op.create_index('ix_sales_finance_cover', 'sales', ['business_id', 'created_at'], unique=False,
+                    postgresql_include=['total', 'payment_method'],
+                    postgresql_where=predicate)
+    op.create_index('ix_sales_report_date', 'sales', ['business_id', sa.text('date(created_at)')], unique=False,
+                    postgresql_include=['total', 'payment_method'],
+                    postgresql_where=predicate)
+
+
+def upgrade():
+    # Sales queries now exclude payment tracking rows with is_payment_record = false
+    # instead of invoice_no NOT LIKE '%-PAY-%'; PostgreSQL only uses a partial index
+    # when the query predicate matches its WHERE.
+    _recreate_sales_partial_indexes(sa.column('is_payment_record') == sa.false())
+
+
+def downgrade():
+    _recreate_sales_partial_indexes(~sa.column('invoice_no').like('%-PAY-%'))
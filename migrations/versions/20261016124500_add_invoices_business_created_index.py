@@ -0,0 +1,25 @@
+"""add_invoices_business_created_index
+
+Revision ID: 20261016124500
+Revises: 20261016123000
+Create Date: 2026-10-16 12:45:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016124500'
+down_revision = '20261016123000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Billing history is listed newest first per business and keyset-paginated on (created_at, id)
+    op.create_index('ix_invoices_business_created_id', 'invoices', ['business_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invoices_business_created_id', table_name='invoices')
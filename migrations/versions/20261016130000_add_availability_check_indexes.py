@@ -0,0 +1,33 @@
+"""add_availability_check_indexes
+
+Revision ID: 20261016130000
+Revises: 20261016124500
+Create Date: 2026-10-16 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016130000'
+down_revision = '20261016124500'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Expression indexes for the case-insensitive name checks in the registration
+    # availability API, plus the phone lookup. The partial WHERE is PostgreSQL-only.
+    op.create_index('ix_businesses_business_name_lower', 'businesses', [sa.text('lower(business_name)')], unique=False)
+    op.create_index('ix_system_settings_restaurant_name_lower', 'system_settings', [sa.text('lower(value)')], unique=False,
+                    postgresql_where=sa.column('key') == 'restaurant_name')
+    op.create_index('ix_business_name_history_name_lower', 'business_name_history', [sa.text('lower(business_name)')], unique=False)
+    op.create_index(op.f('ix_users_phone'), 'users', ['phone'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_users_phone'), table_name='users')
+    op.drop_index('ix_business_name_history_name_lower', table_name='business_name_history')
+    op.drop_index('ix_system_settings_restaurant_name_lower', table_name='system_settings')
+    op.drop_index('ix_businesses_business_name_lower', table_name='businesses')
@@ -0,0 +1,27 @@
+"""add_subscription_plans_visible_order_index
+
+Revision ID: 20261016131500
+Revises: 20261016130000
+Create Date: 2026-10-16 13:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016131500'
+down_revision = '20261016130000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plan lists filter on is_active/is_visible and order by display_order.
+    # The partial WHERE is PostgreSQL-only; other databases get the plain composite index.
+    op.create_index('ix_subscription_plans_visible_order', 'subscription_plans', ['is_active', 'is_visible', 'display_order'], unique=False,
+                    postgresql_where=sa.and_(sa.column('is_active'), sa.column('is_visible')))
+
+
+def downgrade():
+    op.drop_index('ix_subscription_plans_visible_order', table_name='subscription_plans')